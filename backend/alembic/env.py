@@ -1,3 +1,4 @@
+import os
 import sys
 from os.path import dirname, abspath
 sys.path.insert(0, dirname(dirname(abspath(__file__))))
@@ -18,6 +19,11 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# DATABASE_URL (as used by the app) takes precedence over alembic.ini, so
+# `alembic upgrade head` migrates whichever database the server will use
+if os.getenv("DATABASE_URL"):
+    config.set_main_option("sqlalchemy.url", os.environ["DATABASE_URL"].replace("%", "%%"))
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 from src.models.base import Base
@@ -0,0 +1,44 @@
+"""record the model and run metadata behind each assessment result
+
+Revision ID: assessment_model_metadata_001
+Revises: binary_uuid_001
+Create Date: 2026-10-19
+
+Results graded before this revision keep NULL in every new column.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "assessment_model_metadata_001"
+down_revision: Union[str, None] = "binary_uuid_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    ("model_name", sa.String()),
+    ("model_digest", sa.String()),
+    ("prompt_hash", sa.String()),
+    ("prompt_eval_count", sa.Integer()),
+    ("eval_count", sa.Integer()),
+    ("prompt_eval_ms", sa.Float()),
+    ("eval_ms", sa.Float()),
+    ("attempts", sa.Integer()),
+)
+
+
+def upgrade() -> None:
+    for name, type_ in COLUMNS:
+        op.add_column("assessment_results", sa.Column(name, type_, nullable=True))
+    op.create_index(
+        "ix_assessment_results_model_name", "assessment_results", ["model_name", "generated_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_assessment_results_model_name", table_name="assessment_results")
+    with op.batch_alter_table("assessment_results") as batch_op:
+        for name, _ in reversed(COLUMNS):
+            batch_op.drop_column(name)
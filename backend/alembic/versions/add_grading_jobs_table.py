@@ -0,0 +1,51 @@
+"""add grading_jobs table for persisted, leased grading work
+
+Revision ID: add_grading_jobs_001
+Revises: add_marking_trials_001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "add_grading_jobs_001"
+down_revision: Union[str, None] = "add_marking_trials_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE = sa.text("status IN ('queued', 'running')")
+
+
+def upgrade() -> None:
+    key_type = sa.LargeBinary(16) if op.get_bind().dialect.name == "sqlite" else sa.Uuid()
+    op.create_table(
+        "grading_jobs",
+        sa.Column("id", key_type, nullable=False),
+        sa.Column("submission_id", key_type, nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("lease_owner", sa.String(), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("assessment_id", key_type, nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.ForeignKeyConstraint(["submission_id"], ["submissions.id"], ondelete="CASCADE"),
+    )
+    op.create_index("ix_grading_jobs_status_created_at", "grading_jobs", ["status", "created_at"])
+    op.create_index(
+        "uq_grading_jobs_active_submission", "grading_jobs", ["submission_id"], unique=True,
+        sqlite_where=ACTIVE, postgresql_where=ACTIVE,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_grading_jobs_active_submission", table_name="grading_jobs")
+    op.drop_index("ix_grading_jobs_status_created_at", table_name="grading_jobs")
+    op.drop_table("grading_jobs")
@@ -0,0 +1,42 @@
+"""add indexes for keyset-paginated listings
+
+Revision ID: add_listing_indexes_001
+Revises: add_assessment_001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "add_listing_indexes_001"
+down_revision: Union[str, None] = "add_assessment_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_students_class_group_name_id", "students", ["class_group", "name", "id"]
+    )
+    op.create_index(
+        "ix_submissions_last_updated_at_id", "submissions", ["last_updated_at", "id"]
+    )
+    op.create_index(
+        "ix_submissions_project_id_status", "submissions", ["project_id", "status"]
+    )
+    op.create_index(
+        "ix_submissions_student_id_project_id", "submissions", ["student_id", "project_id"]
+    )
+    op.create_index(
+        "ix_assessment_results_submission_id", "assessment_results", ["submission_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_assessment_results_submission_id", table_name="assessment_results")
+    op.drop_index("ix_submissions_student_id_project_id", table_name="submissions")
+    op.drop_index("ix_submissions_project_id_status", table_name="submissions")
+    op.drop_index("ix_submissions_last_updated_at_id", table_name="submissions")
+    op.drop_index("ix_students_class_group_name_id", table_name="students")
@@ -0,0 +1,55 @@
+"""add marking_trials table for model comparison runs
+
+Revision ID: add_marking_trials_001
+Revises: assessment_model_metadata_001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "add_marking_trials_001"
+down_revision: Union[str, None] = "assessment_model_metadata_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Same key storage as the rest of the schema after binary_uuid_001
+    key_type = sa.LargeBinary(16) if op.get_bind().dialect.name == "sqlite" else sa.Uuid()
+    op.create_table(
+        "marking_trials",
+        sa.Column("id", key_type, nullable=False),
+        sa.Column("run_id", sa.String(), nullable=False),
+        sa.Column("config_name", sa.String(), nullable=False),
+        sa.Column("submission_id", key_type, nullable=False),
+        sa.Column("genre", sa.String(), nullable=False),
+        sa.Column("total_score", sa.Integer(), nullable=True),
+        sa.Column("max_score", sa.Integer(), nullable=True),
+        sa.Column(
+            "criteria_scores", sa.JSON().with_variant(postgresql.JSONB(), "postgresql"), nullable=False
+        ),
+        sa.Column("model_name", sa.String(), nullable=True),
+        sa.Column("model_digest", sa.String(), nullable=True),
+        sa.Column("prompt_hash", sa.String(), nullable=True),
+        sa.Column("prompt_eval_count", sa.Integer(), nullable=True),
+        sa.Column("eval_count", sa.Integer(), nullable=True),
+        sa.Column("prompt_eval_ms", sa.Float(), nullable=True),
+        sa.Column("eval_ms", sa.Float(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=True),
+        sa.Column("duration_ms", sa.Float(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.ForeignKeyConstraint(["submission_id"], ["submissions.id"], ondelete="CASCADE"),
+    )
+    op.create_index("ix_marking_trials_run_id", "marking_trials", ["run_id", "config_name"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_marking_trials_run_id", table_name="marking_trials")
+    op.drop_table("marking_trials")
@@ -0,0 +1,29 @@
+"""add updated_at row versions to students and projects
+
+Revision ID: add_row_versions_001
+Revises: add_listing_indexes_001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "add_row_versions_001"
+down_revision: Union[str, None] = "add_listing_indexes_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ("students", "projects"):
+        op.add_column(table, sa.Column("updated_at", sa.DateTime(), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = created_at")
+
+
+def downgrade() -> None:
+    for table in ("projects", "students"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("updated_at")
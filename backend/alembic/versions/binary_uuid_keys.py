@@ -0,0 +1,74 @@
+"""store UUID keys as 16-byte blobs on SQLite
+
+Revision ID: binary_uuid_001
+Revises: postgres_jsonb_001
+Create Date: 2026-10-19
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "binary_uuid_001"
+down_revision: Union[str, None] = "postgres_jsonb_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Every UUID column; references convert with the same function as the keys
+# they point at, so they keep matching.
+UUID_COLUMNS = {
+    "students": ("id",),
+    "teachers": ("id",),
+    "projects": ("id",),
+    "submissions": ("id", "student_id", "project_id"),
+    "assessment_results": ("id", "submission_id"),
+}
+
+
+def _alter(table, columns, new_type) -> None:
+    with op.batch_alter_table(table) as batch_op:
+        for column in columns:
+            batch_op.alter_column(column, type_=new_type, existing_nullable=False)
+
+
+def _rewrite(table, columns, length, convert) -> None:
+    """Apply ``convert`` to every value of ``length`` bytes/characters."""
+    bind = op.get_bind()
+    for column in columns:
+        rows = bind.execute(
+            sa.text(f"SELECT rowid, {column} FROM {table} WHERE length({column}) = :length"),
+            {"length": length},
+        ).all()
+        if rows:
+            bind.execute(
+                sa.text(f"UPDATE {table} SET {column} = :value WHERE rowid = :rowid"),
+                [{"rowid": rowid, "value": convert(value)} for rowid, value in rows],
+            )
+
+
+def _hex_to_bytes(value) -> bytes:
+    # The batch copy CASTs the hex text to BLOB, so it may arrive as ASCII bytes
+    if isinstance(value, bytes):
+        value = value.decode("ascii")
+    return uuid.UUID(value).bytes
+
+
+def upgrade() -> None:
+    # PostgreSQL already stores sa.Uuid as its native 16-byte uuid type
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for table, columns in UUID_COLUMNS.items():
+        _alter(table, columns, sa.LargeBinary(16))
+        _rewrite(table, columns, 32, _hex_to_bytes)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for table, columns in UUID_COLUMNS.items():
+        # Back to hex before the type change, which would CAST raw bytes as text
+        _rewrite(table, columns, 16, lambda raw: uuid.UUID(bytes=raw).hex)
+        _alter(table, columns, sa.CHAR(32))
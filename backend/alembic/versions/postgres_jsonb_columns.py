@@ -0,0 +1,48 @@
+"""store JSON documents as JSONB with GIN indexes on PostgreSQL
+
+Revision ID: postgres_jsonb_001
+Revises: add_row_versions_001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "postgres_jsonb_001"
+down_revision: Union[str, None] = "add_row_versions_001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JSONB_COLUMNS = (
+    ("projects", "assigned_class_groups", "ix_projects_assigned_class_groups_gin"),
+    ("assessment_results", "criteria_scores", "ix_assessment_results_criteria_scores_gin"),
+)
+
+
+def upgrade() -> None:
+    # SQLite keeps JSON as text; nothing to change there
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, column, index in JSONB_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=postgresql.JSONB(),
+            postgresql_using=f"{column}::jsonb",
+        )
+        op.create_index(index, table, [column], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, column, index in reversed(JSONB_COLUMNS):
+        op.drop_index(index, table_name=table)
+        op.alter_column(
+            table, column,
+            type_=sa.JSON(),
+            postgresql_using=f"{column}::json",
+        )
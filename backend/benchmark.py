@@ -5,16 +5,62 @@ Performance Benchmark Script for Abigail Spelling Assessment App
 Tests:
 - SC-001: Student login to first sentence (<30 seconds)
 - SC-002: CSV roster upload for 30 students (<20 seconds)
+- Login storm: a whole class logging in at the start of a lesson
+- Serialisation: encoder time and wire bytes for the dashboard payloads
+- Autosave load: many students autosaving at once while the event loop is probed
+- UUID storage: index size and lookup time for hex vs 16-byte keys (offline)
 """
 
 import time
 import csv
+import gzip
 import io
+import json
+import statistics
+import uuid
+from datetime import datetime, timezone
 import requests
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
 
 # Configuration
 API_BASE = "http://localhost:8000/api"
+LOGIN_STORM_SIZE = 30
+LOGIN_STORM_PASSWORD = "password123"  # Password used by the SC-002 test roster
+SERIALISATION_CLASS_SIZE = 30
+AUTOSAVE_WRITERS = 100
+AUTOSAVE_ROUNDS = 5
+TEACHER_CREDENTIALS = {"username": "admin", "password": "abigail2026"}
+
+
+def _teacher_headers() -> Dict[str, str]:
+    response = requests.post(f"{API_BASE}/auth/login", json=TEACHER_CREDENTIALS)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _latency_summary(latencies: List[float]) -> str:
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    return (f"median {statistics.median(latencies) * 1000:.0f} ms, "
+            f"p95 {p95 * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms")
+
+def _get_all_pages(url: str, params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    """Follow X-Next-Cursor to the end, like the unpaged endpoints used to return."""
+    params = dict(params or {})
+    rows = []
+    while True:
+        response = requests.get(url, params=params)
+        response.raise_for_status()
+        rows.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return rows
+        params["cursor"] = cursor
+
+SERIALISATION_ROUNDS = 50
+UUID_BENCH_SUBMISSIONS = 100_000
+UUID_BENCH_LOOKUPS = 10_000
 
 def benchmark_student_login_time():
     """
@@ -90,7 +136,7 @@ def benchmark_student_login_time():
     step4_start = time.time()
     try:
         response = requests.get(f"{API_BASE}/student/projects/{projects[0]['id']}", headers=headers)
-        project = response.json()
+        response.json()
         step4_time = time.time() - step4_start
         print(f"  ✓ Editor loaded in {step4_time:.3f}s")
     except Exception as e:
@@ -147,7 +193,9 @@ def benchmark_csv_upload_time():
     
     try:
         files = {"file": ("roster.csv", csv_content, "text/csv")}
-        response = requests.post(f"{API_BASE}/roster/upload", files=files)
+        response = requests.post(
+            f"{API_BASE}/roster/upload", files=files, headers=_teacher_headers()
+        )
         
         upload_time = time.time() - start_time
         
@@ -176,6 +224,353 @@ def benchmark_csv_upload_time():
     print()
 
 
+def benchmark_login_storm(concurrency: int = LOGIN_STORM_SIZE):
+    """
+    Login storm: N students submit their password at the same moment.
+
+    Measures per-login latency and wall-clock time for the whole class, which
+    shows whether bcrypt verification is serialised on the server. Also times
+    the full roster (comparable with the pre-pagination baseline) against the
+    class-first login grid.
+    """
+    print("=" * 60)
+    print(f"BENCHMARK: Login storm - {concurrency} concurrent student logins")
+    print("=" * 60)
+
+    try:
+        # The whole roster, as the unpaged list returned before pagination
+        started = time.perf_counter()
+        roster = _get_all_pages(f"{API_BASE}/student/list")
+        roster_time = time.perf_counter() - started
+    except Exception as e:
+        print(f"  ✗ Failed to load students: {e}")
+        return
+    students = [s for s in roster if s.get("id_code", "").startswith("TEST")]
+    if not students:
+        print("  ⚠ No TEST students found. Run the SC-002 CSV benchmark first.")
+        return
+
+    # What the login page now fetches: the class list, then one class's first page
+    started = time.perf_counter()
+    requests.get(f"{API_BASE}/student/class-groups").raise_for_status()
+    grid = requests.get(f"{API_BASE}/student/list",
+                        params={"class_group": students[0]["class_group"], "limit": 60})
+    grid.raise_for_status()
+    grid_time = time.perf_counter() - started
+    print(f"  ✓ Full roster: {len(roster)} students in {roster_time:.3f}s (all pages)")
+    print(f"  ✓ Login grid: {len(grid.json())} students of class "
+          f"{students[0]['class_group']} in {grid_time:.3f}s (class list + first page)")
+
+    def login(student: Dict[str, Any]):
+        started = time.perf_counter()
+        response = requests.post(
+            f"{API_BASE}/student/auth/login",
+            json={"student_id": student["id"], "password": LOGIN_STORM_PASSWORD},
+        )
+        return response.status_code, time.perf_counter() - started
+
+    targets = [students[i % len(students)] for i in range(concurrency)]
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(login, targets))
+    total_time = time.perf_counter() - start_time
+
+    latencies = sorted(elapsed for _, elapsed in results)
+    failures = sum(1 for code, _ in results if code != 200)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(f"  ✓ {len(results) - failures}/{len(results)} logins succeeded")
+    print(f"    - Wall clock: {total_time:.3f}s")
+    print(f"    - Median latency: {statistics.median(latencies):.3f}s")
+    print(f"    - p95 latency: {p95:.3f}s")
+    print(f"    - Slowest login: {latencies[-1]:.3f}s")
+    print("=" * 60)
+    print()
+
+
+def benchmark_autosave_load(writers: int = AUTOSAVE_WRITERS, rounds: int = AUTOSAVE_ROUNDS):
+    """
+    Autosave load: N editors autosave at the same moment, several times over.
+
+    Probes poll /api/health and the dashboard's submission list throughout:
+    their latency shows whether database work stalls the event loop, and
+    whether dashboard reads wait behind autosave commits.
+    """
+    print("=" * 60)
+    print(f"BENCHMARK: Autosave load - {writers} concurrent writers x {rounds} saves")
+    print("=" * 60)
+
+    students = [s for s in _get_all_pages(f"{API_BASE}/student/list")
+                if s.get("id_code", "").startswith("TEST")]
+    if not students:
+        print("  ⚠ No TEST students found. Run the SC-002 CSV benchmark first.")
+        return
+    teacher = _teacher_headers()
+    project = requests.post(f"{API_BASE}/projects", headers=teacher, json={
+        "title": f"Autosave load {int(time.time())}",
+        "genre": "NARRATIVE",
+        "instructions": "Load test",
+        "stimulus_html": "<p>Load test</p>",
+        "assigned_class_groups": sorted({s["class_group"] for s in students}),
+    }).json()
+
+    tokens = []
+    for student in students:
+        response = requests.post(f"{API_BASE}/student/auth/login", json={
+            "student_id": student["id"], "password": LOGIN_STORM_PASSWORD,
+        })
+        if response.status_code == 200:
+            tokens.append(response.json()["access_token"])
+    if not tokens:
+        print("  ✗ No TEST student could log in")
+        return
+
+    paragraph = "The wind rattled the shutters as the storm rolled in from the sea. " * 30
+    url = f"{API_BASE}/student/submissions/{project['id']}"
+
+    def writer(index: int):
+        session = requests.Session()
+        session.headers["Authorization"] = f"Bearer {tokens[index % len(tokens)]}"
+        timings, failures = [], 0
+        for r in range(rounds):
+            text = f"{paragraph} [{index}.{r}]"
+            started = time.perf_counter()
+            response = session.post(url, json={
+                "content_raw": text,
+                "content_html": f"<p>{text}</p>",
+                "content_json": {"type": "doc"},
+            })
+            timings.append(time.perf_counter() - started)
+            failures += response.status_code != 200
+        return timings, failures
+
+    probe_latencies: Dict[str, List[float]] = {"/health": [], "dashboard read": []}
+    storm_over = False
+
+    def probe():
+        session = requests.Session()
+        targets = {
+            "/health": (f"{API_BASE}/health", {}),
+            "dashboard read": (f"{API_BASE}/submissions?project_id={project['id']}", teacher),
+        }
+        while not storm_over:
+            for name, (probe_url, headers) in targets.items():
+                started = time.perf_counter()
+                session.get(probe_url, headers=headers)
+                probe_latencies[name].append(time.perf_counter() - started)
+            time.sleep(0.05)
+
+    with ThreadPoolExecutor(max_workers=writers + 1) as pool:
+        probe_future = pool.submit(probe)
+        start_time = time.perf_counter()
+        results = list(pool.map(writer, range(writers)))
+        total_time = time.perf_counter() - start_time
+        storm_over = True
+        probe_future.result()
+
+    latencies = [t for timings, _ in results for t in timings]
+    failures = sum(f for _, f in results)
+    print(f"  ✓ {len(latencies) - failures}/{len(latencies)} autosaves succeeded "
+          f"in {total_time:.2f}s ({len(latencies) / total_time:.0f}/s)")
+    print(f"    - Autosave latency: {_latency_summary(latencies)}")
+    for name, samples in probe_latencies.items():
+        print(f"    - {name} during load: {_latency_summary(samples)}")
+    print("=" * 60)
+    print()
+
+
+def _dashboard_payloads():
+    """A class worth of submissions and reports shaped like the dashboard responses."""
+    from src.schemas.assessment import AssessmentResultResponse
+    from src.schemas.submission import SubmissionResponse
+
+    paragraph = "The storm rolled over the hills and the old lighthouse flickered. " * 12
+    now = datetime.now(timezone.utc)
+    submissions, results = [], []
+    for i in range(SERIALISATION_CLASS_SIZE):
+        paragraphs = [f"{paragraph} ({i}.{p})" for p in range(8)]
+        submissions.append(SubmissionResponse(
+            id=uuid.uuid4(),
+            student_id=uuid.uuid4(),
+            project_id=uuid.uuid4(),
+            content_raw="\n\n".join(paragraphs),
+            content_html="".join(f"<p>{p}</p>" for p in paragraphs),
+            content_json={"type": "doc", "content": [
+                {"type": "paragraph", "content": [{"type": "text", "text": p}]} for p in paragraphs
+            ]},
+            status="SUBMITTED",
+            submitted_at=now,
+            last_updated_at=now,
+        ))
+        results.append(AssessmentResultResponse(
+            id=uuid.uuid4(),
+            submission_id=submissions[-1].id,
+            genre="NARRATIVE",
+            total_score=31,
+            max_score=47,
+            generated_at=now,
+            overall_strengths=["Vivid setting", "Clear structure"],
+            overall_weaknesses=["Paragraphing", "Punctuation of dialogue"],
+            criteria_scores={
+                f"criterion_{c}": {"score": 3, "max_score": 5, "feedback": paragraph[:200],
+                                   "evidence": [paragraph[:80]], "recommendations": [paragraph[:60]]}
+                for c in range(10)
+            },
+            full_report_md="## Report\n\n" + paragraph * 6,
+        ))
+    return {"GET /api/submissions": submissions, "GET /api/marking/results": results}
+
+
+def benchmark_serialisation(rounds: int = SERIALISATION_ROUNDS):
+    """
+    Serialisation: encoder time and wire size for the dashboard payloads.
+
+    Compares FastAPI's old jsonable_encoder + json.dumps path, pydantic's
+    dump_json (used for routes with a response_model) and orjson (used for
+    WebSocket broadcasts), then gzip/brotli sizes and compression time.
+    Runs offline; no server is needed.
+    """
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+
+    from src.services.compression import (
+        COMPRESSION_BROTLI_QUALITY,
+        COMPRESSION_GZIP_LEVEL,
+        brotli,
+    )
+    from src.services.json_codec import dumps
+
+    print("=" * 60)
+    print(f"BENCHMARK: Serialisation of dashboard payloads ({SERIALISATION_CLASS_SIZE} students)")
+    print("=" * 60)
+
+    def timed(fn):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            out = fn()
+        return (time.perf_counter() - started) / rounds * 1000, out
+
+    for name, models in _dashboard_payloads().items():
+        adapter = TypeAdapter(List[type(models[0])])
+        # Loop values bound as defaults so each closure keeps its own payload
+        encoders = {
+            "jsonable_encoder + json.dumps": lambda models=models: json.dumps(
+                jsonable_encoder(models)
+            ).encode(),
+            "pydantic dump_json": lambda models=models, adapter=adapter: adapter.dump_json(models),
+            "orjson (model_dump)": lambda models=models: dumps([m.model_dump() for m in models]),
+        }
+        print(f"{name}:")
+        body = b""
+        for label, encode in encoders.items():
+            ms, body = timed(encode)
+            print(f"  {label:<32} {ms:8.2f} ms")
+
+        codecs = {
+            f"gzip level {COMPRESSION_GZIP_LEVEL}": lambda body=body: gzip.compress(body, COMPRESSION_GZIP_LEVEL)
+        }
+        if brotli is not None:
+            codecs[f"brotli quality {COMPRESSION_BROTLI_QUALITY}"] = lambda body=body: brotli.compress(
+                body, quality=COMPRESSION_BROTLI_QUALITY
+            )
+        print(f"  {'identity':<32} {len(body):8d} bytes")
+        for label, compress in codecs.items():
+            ms, compressed = timed(compress)
+            ratio = len(compressed) / len(body) * 100
+            print(f"  {label:<32} {len(compressed):8d} bytes ({ratio:.1f}%) in {ms:.2f} ms")
+        print()
+    print("=" * 60)
+    print()
+
+
+def benchmark_uuid_storage(rows: int = UUID_BENCH_SUBMISSIONS, lookups: int = UUID_BENCH_LOOKUPS):
+    """
+    UUID storage: size and lookup time of the submissions table and its indexes.
+
+    Builds the same table three ways in throwaway SQLite files - 32-char hex
+    uuid4 keys (the old generic Uuid type), 16-byte uuid4 blobs, and 16-byte
+    uuid7 blobs (BinaryUUID with the current default) - then times inserts,
+    primary key lookups and per-student lookups. Runs offline.
+    """
+    import os
+    import random
+    import sqlite3
+    import tempfile
+
+    from src.models.types import uuid7
+
+    print("=" * 60)
+    print(f"BENCHMARK: UUID key storage ({rows} submissions)")
+    print("=" * 60)
+
+    variants = {
+        "hex uuid4 (CHAR(32))": ("CHAR(32)", uuid.uuid4, lambda u: u.hex),
+        "blob uuid4 (16 bytes)": ("BLOB", uuid.uuid4, lambda u: u.bytes),
+        "blob uuid7 (16 bytes)": ("BLOB", uuid7, lambda u: u.bytes),
+    }
+    students = 30 * max(1, rows // 1000)
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, (column_type, generate, encode) in variants.items():
+            path = os.path.join(tmp, f"{column_type}-{generate.__name__}.db")
+            conn = sqlite3.connect(path)
+            conn.executescript(f"""
+                CREATE TABLE submissions (
+                    id {column_type} PRIMARY KEY NOT NULL,
+                    student_id {column_type} NOT NULL,
+                    project_id {column_type} NOT NULL,
+                    status VARCHAR NOT NULL,
+                    last_updated_at DATETIME NOT NULL
+                );
+                CREATE INDEX ix_submissions_last_updated_at_id ON submissions (last_updated_at, id);
+                CREATE INDEX ix_submissions_project_id_status ON submissions (project_id, status);
+                CREATE INDEX ix_submissions_student_id_project_id ON submissions (student_id, project_id);
+            """)
+            student_ids = [encode(generate()) for _ in range(students)]
+            project_ids = [encode(generate()) for _ in range(10)]
+            ids = []
+            started = time.perf_counter()
+            for start in range(0, rows, 1000):
+                batch = []
+                for _ in range(min(1000, rows - start)):
+                    key = encode(generate())
+                    ids.append(key)
+                    batch.append((key, random.choice(student_ids), random.choice(project_ids),
+                                  "DRAFT", datetime.now(timezone.utc).isoformat()))
+                with conn:
+                    conn.executemany("INSERT INTO submissions VALUES (?, ?, ?, ?, ?)", batch)
+            insert_s = time.perf_counter() - started
+
+            try:
+                sizes = dict(conn.execute(
+                    "SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"
+                ).fetchall())
+            except sqlite3.OperationalError:
+                sizes = {}  # SQLite built without dbstat
+            probe_ids = random.sample(ids, min(lookups, len(ids)))
+            started = time.perf_counter()
+            for key in probe_ids:
+                conn.execute("SELECT status FROM submissions WHERE id = ?", (key,)).fetchone()
+            pk_us = (time.perf_counter() - started) / len(probe_ids) * 1e6
+            started = time.perf_counter()
+            for key in random.sample(student_ids, min(lookups, len(student_ids))):
+                conn.execute("SELECT id FROM submissions WHERE student_id = ?", (key,)).fetchall()
+            student_us = (time.perf_counter() - started) / min(lookups, len(student_ids)) * 1e6
+            conn.close()
+
+            print(f"{label}:")
+            print(f"  file size            {os.path.getsize(path) / 1024 / 1024:8.2f} MB")
+            # The table itself is keyed by rowid; the primary key is an autoindex
+            index_bytes = sum(size for name, size in sizes.items() if name != "submissions")
+            if sizes:
+                print(f"  table                {sizes.get('submissions', 0) / 1024 / 1024:8.2f} MB")
+                print(f"  indexes (incl. pk)   {index_bytes / 1024 / 1024:8.2f} MB")
+            print(f"  insert               {insert_s:8.2f} s")
+            print(f"  lookup by id         {pk_us:8.1f} us")
+            print(f"  lookup by student    {student_us:8.1f} us")
+            print()
+    print("=" * 60)
+    print()
+
+
 def run_all_benchmarks():
     """Run all performance benchmarks"""
     print("\n")
@@ -201,6 +596,10 @@ def run_all_benchmarks():
     benchmark_csv_upload_time()
     time.sleep(1)  # Brief pause between tests
     benchmark_student_login_time()
+    benchmark_login_storm()
+    benchmark_autosave_load()
+    benchmark_serialisation()
+    benchmark_uuid_storage()
     
     print("\n" + "=" * 60)
     print("All benchmarks completed!")
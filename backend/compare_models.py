@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Re-mark stored submissions with several model/prompt configurations and
+compare them (A/B marking). Trials are stored in marking_trials; production
+assessment results are left untouched.
+
+    python compare_models.py --config mistral --config small=qwen2.5:3b-instruct-q4_K_M \\
+        [--project <id>] [--limit 30] [--concurrency 2] [--reference production]
+    python compare_models.py --configs arms.json --limit 30
+    python compare_models.py --report <run_id> [--reference <config>|production]
+
+arms.json is a list of {"name", "model", "system_prompt", "options", "base_url"}.
+"""
+
+import argparse
+import sys
+import uuid
+
+from src.database import ReadSessionLocal, init_db
+from src.services.marking_comparison import PRODUCTION_REFERENCE, MarkingComparison, MarkingConfig
+
+
+def _pct(value):
+    return "-" if value is None else f"{value:.0%}"
+
+
+def print_report(report) -> None:
+    print(f"\nRun {report['run_id']} (agreement against {report['reference']})\n")
+    print(
+        f"{'Config':<20} {'Model':<32} {'ok/n':>7} {'p50 s':>8} {'p95 s':>8} "
+        f"{'per min':>8} {'tok/s':>7} {'exact':>6} {'±1':>5} {'MAD':>6}"
+    )
+    for c in report["configs"]:
+        total = c["agreement"]["total"]
+        p50, p95 = c["latency_ms"]["p50"], c["latency_ms"]["p95"]
+        print(
+            f"{c['config'][:20]:<20} {(c['model'] or '')[:32]:<32} "
+            f"{c['trials'] - c['errors']:>3}/{c['trials']:<3} "
+            f"{'-' if p50 is None else round(p50 / 1000, 1):>8} {'-' if p95 is None else round(p95 / 1000, 1):>8} "
+            f"{c['throughput_per_min'] or '-':>8} {c['tokens_per_s'] or '-':>7} "
+            f"{_pct(total['exact']):>6} {_pct(total['within_1']):>5} {total['mean_abs_diff'] if total['mean_abs_diff'] is not None else '-':>6}"
+        )
+
+    criteria = sorted({name for c in report["configs"] for name in c["agreement"]["criteria"]})
+    if criteria:
+        print("\nPer-criterion agreement (exact / within one mark)\n")
+        names = [c["config"] for c in report["configs"]]
+        print(f"{'Criterion':<20} " + " ".join(f"{name[:16]:>16}" for name in names))
+        for criterion in criteria:
+            cells = []
+            for c in report["configs"]:
+                stats = c["agreement"]["criteria"].get(criterion)
+                cells.append(
+                    f"{_pct(stats['exact']) + ' / ' + _pct(stats['within_1']):>16}" if stats else f"{'-':>16}"
+                )
+            print(f"{criterion[:20]:<20} " + " ".join(cells))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="A/B marking harness")
+    parser.add_argument("--config", action="append", default=[], help="name=model, repeatable")
+    parser.add_argument("--configs", help="JSON file of configurations")
+    parser.add_argument("--project", type=uuid.UUID, help="only submissions of this project")
+    parser.add_argument("--submission", type=uuid.UUID, action="append", help="specific submissions")
+    parser.add_argument("--limit", type=int, help="at most this many submissions")
+    parser.add_argument("--concurrency", type=int, default=2, help="submissions marked at once per configuration")
+    parser.add_argument("--run-id", help="label for the run (default: a timestamp)")
+    parser.add_argument("--reference", help=f"configuration name or '{PRODUCTION_REFERENCE}'")
+    parser.add_argument("--report", metavar="RUN_ID", help="print the report of a stored run and exit")
+    args = parser.parse_args(argv)
+
+    init_db()
+    if args.report:
+        with ReadSessionLocal() as db:
+            print_report(MarkingComparison.report(db, args.report, args.reference))
+        return 0
+
+    configs = [MarkingConfig.parse(spec) for spec in args.config]
+    if args.configs:
+        configs.extend(MarkingConfig.load_file(args.configs))
+    if not configs:
+        parser.error("give at least one --config or --configs")
+
+    with ReadSessionLocal() as db:
+        submissions = MarkingComparison.load_submissions(db, args.project, args.submission, args.limit)
+    if not submissions:
+        print("No submitted work matches")
+        return 1
+    print(f"Marking {len(submissions)} submissions with {len(configs)} configurations")
+
+    def progress(trial):
+        status = "error: " + trial.error if trial.error else f"{trial.total_score}/{trial.max_score}"
+        print(f"  [{trial.config_name}] {trial.submission_id}  {trial.duration_ms / 1000:.1f}s  {status}")
+
+    try:
+        run_id = MarkingComparison.run(
+            configs, submissions, concurrency=args.concurrency, run_id=args.run_id, on_trial=progress
+        )
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    with ReadSessionLocal() as db:
+        print_report(MarkingComparison.report(db, run_id, args.reference))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,72 @@
+"""
+Write .br and .gz siblings next to the built frontend files in static/.
+
+Run after copying the Vite build into backend/static:
+    python precompress_static.py [static_dir]
+
+The server sends a sibling instead of the original when the browser accepts
+that encoding, so compression happens once per build rather than per request.
+Brotli siblings need the optional ``brotli`` package; gzip always works.
+"""
+
+import gzip
+import os
+import sys
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".html", ".js", ".mjs", ".css", ".svg", ".json", ".map", ".txt", ".xml", ".ico", ".webmanifest",
+}
+MIN_SIZE_BYTES = 1024
+# Uploaded images are already compressed and change at runtime
+SKIP_DIRS = {"stimulus_assets"}
+
+
+def _write_if_smaller(path, data, original_size):
+    if len(data) >= original_size:
+        if os.path.exists(path):
+            os.remove(path)
+        return 0
+    with open(path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def precompress(static_dir="static"):
+    totals = {"files": 0, "original": 0, "gzip": 0, "br": 0}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in files:
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            if len(data) < MIN_SIZE_BYTES:
+                continue
+            totals["files"] += 1
+            totals["original"] += len(data)
+            # mtime=0 keeps the output identical across builds of the same file
+            totals["gzip"] += _write_if_smaller(
+                path + ".gz", gzip.compress(data, compresslevel=9, mtime=0), len(data)
+            )
+            if brotli is not None:
+                totals["br"] += _write_if_smaller(
+                    path + ".br", brotli.compress(data, quality=11), len(data)
+                )
+    return totals
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "static"
+    totals = precompress(target)
+    print(f"Precompressed {totals['files']} files ({totals['original']} bytes)")
+    print(f"  gzip:   {totals['gzip']} bytes")
+    if brotli is None:
+        print("  brotli: skipped (pip install brotli)")
+    else:
+        print(f"  brotli: {totals['br']} bytes")
@@ -1,16 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from src.database import get_db
+from src.database import get_read_db
 from src.models.base import Teacher
 from src.schemas.teacher import TeacherLoginRequest, TokenResponse, TeacherResponse
 from src.services.auth import verify_password, create_access_token, get_current_teacher
+from src.services.identity_cache import TeacherIdentity
 
 router = APIRouter()
 
 
 @router.post("/login", response_model=TokenResponse)
-async def teacher_login(login_data: TeacherLoginRequest, db: Session = Depends(get_db)):
+def teacher_login(login_data: TeacherLoginRequest, db: Session = Depends(get_read_db)):
     teacher = db.query(Teacher).filter(Teacher.username == login_data.username).first()
     if not teacher or not verify_password(login_data.password, teacher.password_hash):
         raise HTTPException(
@@ -24,5 +25,5 @@ async def teacher_login(login_data: TeacherLoginRequest, db: Session = Depends(g
 
 
 @router.get("/me", response_model=TeacherResponse)
-async def get_me(current_teacher: Teacher = Depends(get_current_teacher)):
+def get_me(current_teacher: TeacherIdentity = Depends(get_current_teacher)):
     return current_teacher
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from src.database import IS_SQLITE, THREADPOOL_SIZE, engine, read_engine
+from src.services.auth import get_current_teacher
+from src.services.export_jobs import export_artifacts
+from src.services.grading_jobs import grading_jobs
+from src.services.http_cache import response_cache
+from src.services.identity_cache import TeacherIdentity, identity_cache
+from src.services.query_stats import query_stats
+from src.services.sqlite_maintenance import CHECKPOINT_MODES, sqlite_maintenance
+
+router = APIRouter()
+
+
+@router.get("")
+def get_diagnostics(teacher: TeacherIdentity = Depends(get_current_teacher)):
+    """Database profile, pool and query timings, and cache statistics."""
+    return {
+        "database": {
+            "dialect": engine.dialect.name,
+            "sqlite": sqlite_maintenance.stats() if IS_SQLITE else None,
+            "pools": {
+                "write": engine.pool.status(),
+                "read": read_engine.pool.status(),
+            },
+            "queries": query_stats.stats(),
+        },
+        "threadpool_size": THREADPOOL_SIZE,
+        "grading": grading_jobs.stats(),
+        "caches": {
+            "identity": identity_cache.stats(),
+            "responses": response_cache.stats(),
+            "exports": export_artifacts.stats(),
+        },
+    }
+
+
+@router.get("/queries")
+def get_query_diagnostics(
+    limit: int = Query(20, ge=1, le=200),
+    teacher: TeacherIdentity = Depends(get_current_teacher),
+):
+    """Statements with the most total time, per route, and the recent slow-query log."""
+    return {
+        "slow_query_ms": query_stats.slow_query_ms,
+        "roles": query_stats.stats(),
+        "statements": query_stats.statements(limit),
+        "slow": query_stats.slow_queries(),
+    }
+
+
+@router.delete("/queries", status_code=204)
+def reset_query_diagnostics(teacher: TeacherIdentity = Depends(get_current_teacher)):
+    """Start a fresh measurement window, e.g. before a benchmark run."""
+    query_stats.reset()
+
+
+@router.post("/checkpoint")
+def run_checkpoint(
+    mode: str = Query("PASSIVE"),
+    teacher: TeacherIdentity = Depends(get_current_teacher),
+):
+    """Checkpoint the WAL now, e.g. TRUNCATE before copying the database file."""
+    if not IS_SQLITE:
+        raise HTTPException(status_code=400, detail="Checkpoints only apply to SQLite")
+    if mode.upper() not in CHECKPOINT_MODES:
+        raise HTTPException(
+            status_code=400, detail=f"mode must be one of {', '.join(CHECKPOINT_MODES)}"
+        )
+    return sqlite_maintenance.checkpoint(mode)
@@ -1,25 +1,34 @@
 """API for AI-powered NAPLAN marking."""
 
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
-from src.database import get_db
-from src.models.base import AssessmentResult, Teacher
-from src.schemas.assessment import AssessmentResultResponse
+from src.database import get_db, get_read_db
+from src.models.base import AssessmentResult, Submission
+from src.schemas.assessment import (
+    AssessmentResultResponse,
+    GradeResponse,
+    GradingJobList,
+    GradingJobResponse,
+)
 from src.services.auth import get_current_teacher
-from src.services.naplan_marking_service import NAPLANMarkingService
+from src.services.grading_jobs import JOB_STATUSES, AlreadyQueuedError, grading_jobs
+from src.services.identity_cache import TeacherIdentity
 from src.services.ollama_client import OllamaClient
 from sqlalchemy.orm import Session
 
 router = APIRouter()
 
 
-@router.post("/grade/{submission_id}")
-async def grade_submission(
+@router.post(
+    "/grade/{submission_id}", response_model=GradeResponse, response_model_exclude_none=True
+)
+def grade_submission(
     submission_id: UUID,
     db: Session = Depends(get_db),
-    current_teacher: Teacher = Depends(get_current_teacher),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
 ):
     """
     Trigger AI grading for a submission.
@@ -30,6 +39,8 @@ async def grade_submission(
         .filter(AssessmentResult.submission_id == submission_id)
         .first()
     )
+    # End the read so the writer connection is free during the health check
+    db.commit()
     if existing:
         return {
             "message": "Already graded",
@@ -49,9 +60,9 @@ async def grade_submission(
             detail="Ollama service not available. Please start Ollama (ollama serve) and ensure the model is pulled (e.g. ollama pull mistral).",
         )
 
-    marking_service = NAPLANMarkingService(db, ollama)
     try:
-        result = marking_service.grade_submission(submission_id)
+        # Graded now, but under a job row so a restart mid-grade is recovered
+        _, result = grading_jobs.run_inline(db, submission_id, ollama)
         return {
             "assessment_id": str(result.id),
             "total_score": result.total_score,
@@ -61,17 +72,19 @@ async def grade_submission(
                 "weaknesses": (result.overall_weaknesses or [])[:2],
             },
         }
+    except AlreadyQueuedError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Grading failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Grading failed: {str(e)}") from e
 
 
 @router.get("/results/{assessment_id}", response_model=AssessmentResultResponse)
-async def get_assessment_result(
+def get_assessment_result(
     assessment_id: UUID,
-    db: Session = Depends(get_db),
-    current_teacher: Teacher = Depends(get_current_teacher),
+    db: Session = Depends(get_read_db),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
 ):
     """Fetch detailed assessment result by id."""
     result = (
@@ -82,3 +95,60 @@ async def get_assessment_result(
     if not result:
         raise HTTPException(status_code=404, detail="Assessment not found")
     return result
+
+
+@router.post(
+    "/grade/{submission_id}/jobs",
+    response_model=GradingJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def queue_grading_job(
+    submission_id: UUID,
+    db: Session = Depends(get_db),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
+):
+    """Queue a submission for background grading (returns its existing job if already queued)."""
+    if db.get(Submission, submission_id) is None:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    return grading_jobs.enqueue(db, submission_id)
+
+
+@router.post(
+    "/projects/{project_id}/jobs",
+    response_model=List[GradingJobResponse],
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def queue_project_grading(
+    project_id: UUID,
+    db: Session = Depends(get_db),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
+):
+    """Queue every submitted, ungraded submission of a project, e.g. for an overnight batch."""
+    return grading_jobs.enqueue_project(db, project_id)
+
+
+@router.get("/jobs", response_model=GradingJobList)
+def list_grading_jobs(
+    status_filter: Optional[str] = Query(None, alias="status", pattern=f"^({'|'.join(JOB_STATUSES)})$"),
+    project_id: Optional[UUID] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
+):
+    """Job counts by status and the most recent jobs."""
+    return {
+        "counts": grading_jobs.counts(db),
+        "jobs": grading_jobs.list_jobs(db, status_filter, project_id, limit),
+    }
+
+
+@router.get("/jobs/{job_id}", response_model=GradingJobResponse)
+def get_grading_job(
+    job_id: UUID,
+    db: Session = Depends(get_read_db),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
+):
+    job = grading_jobs.get(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Grading job not found")
+    return job
@@ -0,0 +1,68 @@
+import hmac
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Response, status
+
+from src.database import IS_SQLITE, THREADPOOL_SIZE, ReadSessionLocal
+from src.services.grading_jobs import grading_jobs
+from src.services.metrics import CONTENT_TYPE, metrics
+from src.services.query_stats import query_stats
+from src.services.sqlite_maintenance import sqlite_maintenance
+
+# Shared secret for the scraper; the endpoint is open when unset
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+router = APIRouter()
+
+
+def _collect_database():
+    roles = query_stats.stats()
+    yield (
+        "abigail_db_queries_total", "counter", "Statements executed by engine role.",
+        [({"role": role}, totals["queries"]) for role, totals in roles.items()],
+    )
+    yield (
+        "abigail_db_query_seconds_total", "counter", "Total statement execution time by engine role.",
+        [({"role": role}, totals["total_ms"] / 1000) for role, totals in roles.items()],
+    )
+    if IS_SQLITE:
+        yield (
+            "abigail_sqlite_wal_bytes", "gauge", "Current size of the SQLite -wal file.",
+            [({}, sqlite_maintenance.wal_bytes())],
+        )
+    yield (
+        "abigail_threadpool_size", "gauge", "Worker threads available to sync routes.",
+        [({}, THREADPOOL_SIZE)],
+    )
+
+
+def _collect_grading_jobs():
+    with ReadSessionLocal() as db:
+        counts = grading_jobs.counts(db)
+    yield (
+        "abigail_grading_jobs", "gauge", "Grading jobs by status.",
+        [({"status": status}, count) for status, count in counts.items()],
+    )
+    yield (
+        "abigail_grading_jobs_active", "gauge", "Grading jobs this process holds a lease on.",
+        [({}, grading_jobs.stats()["active"])],
+    )
+
+
+metrics.collector(_collect_database)
+metrics.collector(_collect_grading_jobs)
+
+
+@router.get("")
+def get_metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus text exposition of request, grading, database and roster metrics."""
+    if METRICS_TOKEN:
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token, METRICS_TOKEN):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid metrics token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
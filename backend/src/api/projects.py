@@ -2,46 +2,40 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
-import os
-import shutil
 
-from src.database import get_db
-from src.models.base import Teacher
+from src.database import get_db, get_read_db
 from src.schemas.project import ProjectResponse, ProjectCreate
+from src.services.asset_service import AssetService, AssetTooLargeError
 from src.services.project_service import ProjectService
 from src.services.auth import get_current_teacher
+from src.services.identity_cache import TeacherIdentity
 
 router = APIRouter()
 
-# Directory to store uploaded stimulus assets
-UPLOAD_DIR = "static/stimulus_assets"
-if not os.path.exists(UPLOAD_DIR):
-    os.makedirs(UPLOAD_DIR)
-
 @router.get("", response_model=List[ProjectResponse])
-async def list_projects(
-    db: Session = Depends(get_db),
-    current_teacher: Teacher = Depends(get_current_teacher),
+def list_projects(
+    db: Session = Depends(get_read_db),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
 ):
     """List all projects for the teacher."""
     return ProjectService.list_projects(db)
 
 
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
-async def create_project(
+def create_project(
     project_data: ProjectCreate,
     db: Session = Depends(get_db),
-    current_teacher: Teacher = Depends(get_current_teacher),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
 ):
     """Create a new assessment project."""
     return ProjectService.create_project(db, project_data)
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(
+def get_project(
     project_id: UUID,
-    db: Session = Depends(get_db),
-    current_teacher: Teacher = Depends(get_current_teacher),
+    db: Session = Depends(get_read_db),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
 ):
     project = ProjectService.get_project(db, project_id)
     if not project:
@@ -50,11 +44,11 @@ async def get_project(
 
 
 @router.put("/{project_id}", response_model=ProjectResponse)
-async def update_project(
+def update_project(
     project_id: UUID,
     project_data: ProjectCreate,
     db: Session = Depends(get_db),
-    current_teacher: Teacher = Depends(get_current_teacher),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
 ):
     """Update an existing assessment project."""
     project = ProjectService.update_project(db, project_id, project_data)
@@ -64,10 +58,10 @@ async def update_project(
 
 
 @router.post("/{project_id}/toggle-status", response_model=ProjectResponse)
-async def toggle_project_status(
+def toggle_project_status(
     project_id: UUID,
     db: Session = Depends(get_db),
-    current_teacher: Teacher = Depends(get_current_teacher),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
 ):
     project = ProjectService.toggle_project_status(db, project_id)
     if not project:
@@ -76,19 +70,18 @@ async def toggle_project_status(
 
 
 @router.post("/upload-asset")
-async def upload_asset(
+def upload_asset(
     file: UploadFile = File(...),
-    current_teacher: Teacher = Depends(get_current_teacher),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
 ):
-    """Upload a stimulus image/asset."""
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    
-    # Simple check to avoid overwriting or path traversal
-    if ".." in file.filename or file.filename.startswith("/"):
-        raise HTTPException(status_code=400, detail="Invalid filename")
+    """
+    Upload a stimulus image/asset.
 
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    # Return the relative path for the frontend to use
-    return {"path": f"/stimulus_assets/{file.filename}"}
+    The file is stored under its content hash and images get downscaled
+    WebP/JPEG variants. ``path`` is the URL to embed in the stimulus: the
+    largest WebP variant for images, otherwise the original.
+    """
+    try:
+        return AssetService.ingest(file.file, file.filename)
+    except AssetTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
@@ -1,41 +1,68 @@
+import uuid
+from typing import Any, Dict, List
+
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
-from src.database import get_db
-from src.models.base import Teacher
+
+from src.api.ws import manager
+from src.database import get_db, get_read_db
 from src.services.roster_service import RosterService
 from src.services.auth import get_current_teacher
+from src.services.identity_cache import TeacherIdentity
 
 router = APIRouter()
 
 
 @router.get("/class-groups", response_model=List[str])
-async def get_class_groups(
-    db: Session = Depends(get_db),
-    current_teacher: Teacher = Depends(get_current_teacher),
+def get_class_groups(
+    db: Session = Depends(get_read_db),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
 ):
     """Get unique class groups from the roster."""
     return RosterService.get_class_groups(db)
 
 
 @router.post("/upload")
-async def upload_roster(
+def upload_roster(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_teacher: Teacher = Depends(get_current_teacher),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
 ):
-    """Upload student roster CSV."""
+    """
+    Upload student roster CSV.
+
+    The upload is decoded and imported chunk by chunk, with
+    ROSTER_IMPORT_PROGRESS messages pushed to dashboards after each chunk.
+    """
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Only CSV files are allowed")
-    
+
+    import_id = uuid.uuid4().hex
+
+    def publish_progress(progress: Dict[str, Any]) -> None:
+        manager.broadcast_from_thread({
+            "type": "ROSTER_IMPORT_PROGRESS",
+            "data": {"import_id": import_id, "filename": file.filename, **progress},
+        })
+
     try:
-        # Read content and handle utf-8-sig
-        content = await file.read()
-        decoded_content = content.decode('utf-8-sig')
-        
-        results = RosterService.process_csv(db, decoded_content)
-        return results
-    except UnicodeDecodeError:
-        raise HTTPException(status_code=400, detail="Could not decode CSV file. Please ensure it is UTF-8 encoded.")
+        results = RosterService.import_stream(db, file.file, publish_progress)
+    except UnicodeDecodeError as e:
+        raise HTTPException(
+            status_code=400, detail="Could not decode CSV file. Please ensure it is UTF-8 encoded."
+        ) from e
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing roster: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing roster: {str(e)}") from e
+
+    manager.broadcast_from_thread({
+        "type": "ROSTER_IMPORT_COMPLETE",
+        "data": {
+            "import_id": import_id,
+            "filename": file.filename,
+            "total": results["total"],
+            "created": results["created"],
+            "updated": results["updated"],
+            "errors": len(results["errors"]),
+        },
+    })
+    return results
@@ -1,27 +1,67 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from typing import List, Optional
 from uuid import UUID
 
-from src.database import get_db
+from src.database import get_db, get_read_db
 from src.models.base import Student, Project, Submission
 from src.schemas.student import StudentResponse, LoginRequest, TokenResponse
 from src.schemas.project import ProjectResponse
 from src.schemas.submission import SubmissionResponse, SubmissionUpdate
 from src.services.auth import verify_password, create_access_token, get_current_student
+from src.services.http_cache import ConditionalGet, make_etag
+from src.services.identity_cache import StudentIdentity
+from src.services.metrics import AUTOSAVES, AUTOSAVE_SECONDS
+from src.services.tracing import span
+from src.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from src.services.project_service import ProjectService
+from src.services.roster_service import RosterService
 from src.services.submission import SubmissionService
 
 router = APIRouter()
 
+_students_adapter = TypeAdapter(List[StudentResponse])
+_projects_adapter = TypeAdapter(List[ProjectResponse])
+_project_adapter = TypeAdapter(ProjectResponse)
+
+@router.get("/class-groups", response_model=List[str])
+def list_class_groups(db: Session = Depends(get_read_db)):
+    """Class groups the login page offers before loading a class's avatars."""
+    return RosterService.get_class_groups(db)
+
 @router.get("/list", response_model=List[StudentResponse])
-async def list_students(db: Session = Depends(get_db)):
-    """List all students for the avatar grid login."""
-    students = db.query(Student).all()
-    return students
+def list_students(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    class_group: Optional[str] = None,
+    conditional: ConditionalGet = Depends(),
+    db: Session = Depends(get_read_db),
+):
+    """
+    List students for the avatar grid login, one keyset page at a time.
+
+    Filter by class_group to show a single class; pass the X-Next-Cursor
+    response header back as ``cursor`` to fetch the next page. Supports
+    If-None-Match / If-Modified-Since.
+    """
+    count, last_modified = RosterService.get_roster_version(db, class_group)
+    etag = make_etag("students", count, last_modified, class_group, limit, cursor)
+
+    def build():
+        students, next_cursor = RosterService.list_students(
+            db, limit, cursor=cursor, class_group=class_group
+        )
+        return students, ({NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {})
+
+    try:
+        return conditional.respond("students", etag, last_modified, build, _students_adapter)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
 
 @router.post("/auth/login", response_model=TokenResponse)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+def login(login_data: LoginRequest, db: Session = Depends(get_read_db)):
     student = db.query(Student).filter(Student.id == login_data.student_id).first()
     if not student or not verify_password(login_data.password, student.password_hash):
         raise HTTPException(
@@ -33,85 +73,107 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=StudentResponse)
-async def get_me(current_student: Student = Depends(get_current_student)):
+def get_me(current_student: StudentIdentity = Depends(get_current_student)):
     return current_student
 
 @router.get("/projects", response_model=List[ProjectResponse])
-async def list_assigned_projects(
-    current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+def list_assigned_projects(
+    current_student: StudentIdentity = Depends(get_current_student),
+    conditional: ConditionalGet = Depends(),
+    db: Session = Depends(get_read_db)
 ):
     """List projects assigned to the student's class group."""
-    # SQLite JSON filtering
-    projects = db.query(Project).filter(
-        Project.is_active == True,
-        Project.assigned_class_groups.contains(current_student.class_group)
-    ).all()
-    return projects
+    count, last_modified = ProjectService.get_projects_version(db)
+    etag = make_etag("projects", count, last_modified, current_student.class_group)
+
+    def build():
+        projects = ProjectService.get_projects_by_class_group(db, current_student.class_group)
+        return projects, {}
+
+    return conditional.respond(
+        "projects", etag, last_modified, build, _projects_adapter,
+        vary=current_student.class_group,
+    )
 
 @router.get("/projects/{project_id}", response_model=ProjectResponse)
-async def get_project_details(
+def get_project_details(
     project_id: UUID,
-    current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    current_student: StudentIdentity = Depends(get_current_student),
+    conditional: ConditionalGet = Depends(),
+    db: Session = Depends(get_read_db)
 ):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+    # Only the row version and assignment are loaded until a body is needed
+    version = db.execute(
+        select(Project.updated_at, Project.assigned_class_groups).where(Project.id == project_id)
+    ).first()
+    if not version:
         raise HTTPException(status_code=404, detail="Project not found")
     
     # Check if student is assigned to this project's class group
-    if current_student.class_group not in project.assigned_class_groups:
+    if current_student.class_group not in version.assigned_class_groups:
         raise HTTPException(status_code=403, detail="Not assigned to this project")
-        
-    return project
+
+    etag = make_etag("project", project_id, version.updated_at)
+    return conditional.respond(
+        "projects",
+        etag,
+        version.updated_at,
+        lambda: (db.query(Project).filter(Project.id == project_id).first(), {}),
+        _project_adapter,
+    )
 
 @router.get("/submissions/{project_id}", response_model=Optional[SubmissionResponse])
-async def get_submission(
+def get_submission(
     project_id: UUID,
-    current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    current_student: StudentIdentity = Depends(get_current_student),
+    db: Session = Depends(get_read_db)
 ):
     submission = SubmissionService.get_submission(db, current_student.id, project_id)
     return submission
 
 @router.post("/submissions/{project_id}", response_model=SubmissionResponse)
-async def update_draft(
+def update_draft(
     project_id: UUID,
     submission_data: SubmissionUpdate,
-    current_student: Student = Depends(get_current_student),
+    current_student: StudentIdentity = Depends(get_current_student),
     db: Session = Depends(get_db)
 ):
     if submission_data.content_raw is None:
          raise HTTPException(status_code=400, detail="content_raw is required")
-         
-    submission = SubmissionService.create_or_update_draft(
-        db, 
-        current_student.id, 
-        project_id, 
-        submission_data.content_raw,
-        submission_data.content_html or "",
-        submission_data.content_json or {}
-    )
 
-    # Broadcast update via WebSocket
-    from src.api.ws import manager
-    await manager.broadcast({
-        "type": "SUBMISSION_UPDATED",
-        "data": {
-            "id": str(submission.id),
-            "status": submission.status,
-            "student_id": str(submission.student_id),
-            "project_id": str(submission.project_id),
-            "last_updated_at": submission.last_updated_at.isoformat()
-        }
-    })
+    with AUTOSAVE_SECONDS.time():
+        with span("autosave.save", chars=len(submission_data.content_raw)):
+            submission = SubmissionService.create_or_update_draft(
+                db, 
+                current_student.id, 
+                project_id, 
+                submission_data.content_raw,
+                submission_data.content_html or "",
+                submission_data.content_json or {}
+            )
+
+        # Broadcast update via WebSocket
+        from src.api.ws import manager
+        with span("autosave.broadcast"):
+            manager.broadcast_from_thread({
+                "type": "SUBMISSION_UPDATED",
+                "data": {
+                    "id": str(submission.id),
+                    "status": submission.status,
+                    "student_id": str(submission.student_id),
+                    "project_id": str(submission.project_id),
+                    "last_updated_at": submission.last_updated_at.isoformat()
+                }
+            })
+    # Submitted work is locked; the save was a no-op
+    AUTOSAVES.inc(outcome="locked" if submission.status == "SUBMITTED" else "saved")
 
     return submission
 
 @router.put("/submissions/{project_id}/submit", response_model=SubmissionResponse)
-async def finalize_submission(
+def finalize_submission(
     project_id: UUID,
-    current_student: Student = Depends(get_current_student),
+    current_student: StudentIdentity = Depends(get_current_student),
     db: Session = Depends(get_db)
 ):
     submission = SubmissionService.finalize_submission(db, current_student.id, project_id)
@@ -120,7 +182,7 @@ async def finalize_submission(
 
     # Broadcast update via WebSocket
     from src.api.ws import manager
-    await manager.broadcast({
+    manager.broadcast_from_thread({
         "type": "SUBMISSION_UPDATED",
         "data": {
             "id": str(submission.id),
@@ -1,62 +1,195 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime
+from functools import partial
+from typing import List, Optional
 from uuid import UUID
 
-from src.database import get_db
-from src.models.base import Teacher
+from src.database import get_db, get_read_db
 from src.schemas.submission import SubmissionResponse
 from src.services.submission import SubmissionService
 from src.services.export_service import ExportService
+from src.services.export_jobs import artifact_id, export_artifacts, export_jobs
+from src.services.http_cache import ConditionalGet
+from src.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+from src.services.project_service import ProjectService
 from src.services.auth import get_current_teacher
+from src.services.identity_cache import TeacherIdentity
 from src.api.ws import manager
-from fastapi.responses import StreamingResponse
-import io
+from fastapi.responses import FileResponse, StreamingResponse
 
 router = APIRouter()
 
 
+def _artifact_response(request: Request, artifact: str, path, filename: str) -> Response:
+    """Serve a cached export with an ETag; FileResponse handles Range requests."""
+    etag = f'"{artifact}"'
+    if ConditionalGet(request).is_not_modified(etag, None):
+        return Response(status_code=304, headers={"ETag": etag})
+    return FileResponse(
+        path,
+        media_type="application/x-zip-compressed",
+        filename=filename,
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
+
+
+def _get_export_target(db: Session, project_id: UUID, mode: str):
+    project = ProjectService.get_project(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    artifact = artifact_id(project_id, mode, ExportService.get_watermark(db, project_id))
+    return project, artifact, ExportService.get_export_filename(project, mode)
+
+
+def _get_export_job(db: Session, job_id: str):
+    job = export_jobs.get(job_id)
+    if job is not None and not job.filename:
+        # Built by another worker: name the download after its project
+        project = ProjectService.get_project(db, job.project_id)
+        if not project:
+            return None
+        job.filename = ExportService.get_export_filename(project, job.mode)
+    return job
+
+
 @router.get("/export/{project_id}")
-async def export_submissions(
+def export_submissions(
     project_id: UUID,
-    db: Session = Depends(get_db),
-    current_teacher: Teacher = Depends(get_current_teacher),
+    request: Request,
+    mode: str = Query("text", pattern="^(text|bundle)$"),
+    db: Session = Depends(get_read_db),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
 ):
-    """Export all submitted assessments for a project as a ZIP of text files."""
-    zip_buffer, filename = ExportService.export_project_submissions_to_zip(db, project_id)
-    if not zip_buffer:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
+    """
+    Export all submitted assessments for a project as a ZIP.
+
+    mode=text: one text file per submission.
+    mode=bundle: essays, marking reports and a cohort score spreadsheet.
+
+    Unchanged exports are served from the artifact cache (with ETag and Range
+    support); otherwise the archive is streamed and cached as it is built.
+    """
+    project, artifact, filename = _get_export_target(db, project_id, mode)
+    path = export_artifacts.get(artifact)
+    if path is not None:
+        return _artifact_response(request, artifact, path, filename)
+
+    etag = f'"{artifact}"'
+    if ConditionalGet(request).is_not_modified(etag, None):
+        return Response(status_code=304, headers={"ETag": etag})
     return StreamingResponse(
-        iter([zip_buffer.getvalue()]),
+        export_artifacts.stream_and_store(artifact, ExportService.iter_export(project, mode)),
         media_type="application/x-zip-compressed",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        headers={"Content-Disposition": f"attachment; filename={filename}", "ETag": etag}
     )
 
+
+@router.post("/export/{project_id}/jobs", status_code=status.HTTP_202_ACCEPTED)
+def create_export_job(
+    project_id: UUID,
+    mode: str = Query("text", pattern="^(text|bundle)$"),
+    db: Session = Depends(get_read_db),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
+):
+    """Build an export in the background; poll the job, then download it."""
+    project, artifact, filename = _get_export_target(db, project_id, mode)
+    job = export_jobs.submit(
+        artifact, project_id, mode, filename, partial(ExportService.iter_export, project, mode)
+    )
+    return _job_payload(job)
+
+
+@router.get("/export-jobs/{job_id}")
+def get_export_job(
+    job_id: str,
+    db: Session = Depends(get_read_db),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
+):
+    job = _get_export_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return _job_payload(job)
+
+
+@router.get("/export-jobs/{job_id}/download")
+def download_export_job(
+    job_id: str,
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
+):
+    """Download a finished export; supports If-None-Match and Range."""
+    job = _get_export_job(db, job_id)
+    path = export_artifacts.get(job_id)
+    if job is None or path is None:
+        raise HTTPException(status_code=404, detail="Export not ready")
+    return _artifact_response(request, job_id, path, job.filename)
+
+
+def _job_payload(job) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "mode": job.mode,
+        "filename": job.filename,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "download_url": f"/api/submissions/export-jobs/{job.id}/download"
+        if job.status == "succeeded" else None,
+    }
+
 @router.get("", response_model=List[SubmissionResponse])
-async def list_submissions(
-    db: Session = Depends(get_db),
-    current_teacher: Teacher = Depends(get_current_teacher),
+def list_submissions(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    class_group: Optional[str] = None,
+    project_id: Optional[UUID] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    updated_since: Optional[datetime] = None,
+    db: Session = Depends(get_read_db),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
 ):
-    """List all submissions for the teacher dashboard."""
-    return SubmissionService.get_all_submissions(db)
+    """
+    List submissions for the teacher dashboard, one keyset page at a time.
+
+    Pages are ordered by last update; pass the X-Next-Cursor response header
+    back as ``cursor`` to fetch the next page.
+    """
+    try:
+        submissions, next_cursor = SubmissionService.list_submissions(
+            db,
+            limit,
+            cursor=cursor,
+            class_group=class_group,
+            project_id=project_id,
+            status=status_filter,
+            updated_since=updated_since,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return submissions
 
 
 @router.get("/project/{project_id}", response_model=List[SubmissionResponse])
-async def list_project_submissions(
+def list_project_submissions(
     project_id: UUID,
-    db: Session = Depends(get_db),
-    current_teacher: Teacher = Depends(get_current_teacher),
+    db: Session = Depends(get_read_db),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
 ):
     """List all submissions for a specific project."""
     return SubmissionService.get_project_submissions(db, project_id)
 
 
 @router.post("/{submission_id}/unlock", response_model=SubmissionResponse)
-async def unlock_submission(
+def unlock_submission(
     submission_id: UUID,
     db: Session = Depends(get_db),
-    current_teacher: Teacher = Depends(get_current_teacher),
+    current_teacher: TeacherIdentity = Depends(get_current_teacher),
 ):
     """Unlock a submission, returning it to draft mode."""
     submission = SubmissionService.unlock_submission(db, submission_id)
@@ -64,7 +197,7 @@ async def unlock_submission(
         raise HTTPException(status_code=404, detail="Submission not found")
     
     # Broadcast update via WebSocket
-    await manager.broadcast({
+    manager.broadcast_from_thread({
         "type": "SUBMISSION_UPDATED",
         "data": {
             "id": str(submission.id),
@@ -1,25 +1,89 @@
-from typing import List, Dict
+import asyncio
+import uuid
+from typing import Callable, List, Dict, Optional
+from anyio import from_thread
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from src.services.broadcast import BroadcastBackend, get_broadcast_backend
+from src.services.json_codec import dumps
+from src.services.metrics import BROADCASTS, BROADCAST_SECONDS, WEBSOCKET_CONNECTIONS
+
 router = APIRouter()
 
+# Marks messages meant for the workers themselves (e.g. cache invalidations)
+INTERNAL_KEY = "_internal"
+
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, backend: Optional[BroadcastBackend] = None):
         self.active_connections: List[WebSocket] = []
+        # The backend relays broadcasts to the other workers' connections
+        self.backend = backend or get_broadcast_backend()
+        self.backend.bind(self._send_local)
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, Callable[[Dict], None]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        await self.backend.start()
+
+    async def stop(self):
+        self._loop = None
+        await self.backend.stop()
+
+    def subscribe(self, kind: str, handler: Callable[[Dict], None]):
+        """Call ``handler`` with internal ``kind`` messages published by other workers."""
+        self._handlers[kind] = handler
+
+    def publish_internal(self, kind: str, payload: Dict):
+        """Relay ``payload`` to the other workers' ``kind`` handler; safe from any thread.
+
+        A no-op until start(), when this process has no peers to tell.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        message = {INTERNAL_KEY: kind, "origin": self.origin, **payload}
+        asyncio.run_coroutine_threadsafe(self.backend.publish(message), loop)
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
+        WEBSOCKET_CONNECTIONS.inc()
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
+            WEBSOCKET_CONNECTIONS.dec()
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
 
     async def broadcast(self, message: Dict):
-        for connection in self.active_connections:
-            await connection.send_json(message)
+        with BROADCAST_SECONDS.time():
+            await self.backend.publish(message)
+        BROADCASTS.inc()
+
+    def broadcast_from_thread(self, message: Dict):
+        """broadcast() for sync routes, which run on the threadpool."""
+        from_thread.run(self.broadcast, message)
+
+    async def _send_local(self, message: Dict):
+        kind = message.get(INTERNAL_KEY)
+        if kind is not None:
+            # Never shown to dashboards; this worker already applied its own
+            handler = self._handlers.get(kind)
+            if handler is not None and message.get("origin") != self.origin:
+                handler(message)
+            return
+        # Encode once for every dashboard instead of once per connection
+        text = dumps(message).decode("utf-8")
+        for connection in list(self.active_connections):
+            try:
+                await connection.send_text(text)
+            except Exception:
+                # A dead socket must not stop the message reaching everyone else
+                self.disconnect(connection)
 
 manager = ConnectionManager()
 
@@ -1,39 +1,135 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from .models.base import Base
+from .services.metrics import instrument_sessions
+from .services.query_stats import RowCountingConnection, instrument_engine
+from .services.sqlite_profile import SQLITE_PROFILE, apply_sqlite_pragmas
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./local_assessment.db")
+# Reads may go to a replica; on SQLite they use separate read-only
+# connections to the same file
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", DATABASE_URL)
+# Routes are plain `def`, so each request (and its session) runs on one of
+# AnyIO's worker threads; this caps how many run at once.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+# Seconds a write waits for the writer connection before failing
+DB_WRITE_TIMEOUT = float(os.getenv("DB_WRITE_TIMEOUT", "30"))
 
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={
-        "check_same_thread": False,
-        "timeout": 30
-    }
-)
+# Server databases (PostgreSQL): pooled connections per engine, kept at
+# THREADPOOL_SIZE or more for the same reason as the SQLite reader pool below;
+# extra connections allowed under burst; seconds before a connection is replaced
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(THREADPOOL_SIZE)))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+DB_DIALECT = make_url(DATABASE_URL).get_backend_name()
+IS_SQLITE = DB_DIALECT == "sqlite"
+
+_sqlite_connect_args = {
+    "check_same_thread": False,
+    "timeout": SQLITE_PROFILE["busy_timeout"] / 1000,
+    # Lets query_stats record rows returned by SELECTs
+    "factory": RowCountingConnection,
+}
+
+if IS_SQLITE:
+    # SQLite allows one writer at a time. A single writer connection makes
+    # writes queue in the pool instead of busy-waiting on each other, and
+    # WAL readers on their own connections never wait for a commit.
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args=_sqlite_connect_args,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=DB_WRITE_TIMEOUT,
+    )
+    read_engine = create_engine(
+        DATABASE_READ_URL,
+        connect_args=_sqlite_connect_args,
+        # One connection per worker thread: get_db's cleanup also needs a
+        # worker thread, so requests waiting on a smaller pool could starve
+        # the very threads that would return connections to it.
+        pool_size=THREADPOOL_SIZE,
+        max_overflow=10,
+    )
+else:
+    def _server_engine(url):
+        # pre_ping replaces connections the server or a proxy has dropped
+        # (e.g. PgBouncer or a restart) instead of failing the request
+        return create_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_WRITE_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
 
-# Enable WAL mode for better concurrency and performance
-if "sqlite" in DATABASE_URL:
-    from sqlalchemy import event
-    
+    engine = _server_engine(DATABASE_URL)
+    read_engine = (
+        engine if DATABASE_READ_URL == DATABASE_URL else _server_engine(DATABASE_READ_URL)
+    )
+
+# WAL mode plus the tunable SQLITE_PROFILE pragmas (see sqlite_profile.py)
+if IS_SQLITE:
     @event.listens_for(engine, "connect")
     def set_sqlite_pragma(dbapi_conn, connection_record):
-        cursor = dbapi_conn.cursor()
-        cursor.execute("PRAGMA journal_mode=WAL")
-        cursor.execute("PRAGMA synchronous=NORMAL")
-        cursor.execute("PRAGMA cache_size=-64000")  # 64MB cache
-        cursor.execute("PRAGMA temp_store=MEMORY")
-        cursor.close()
+        apply_sqlite_pragmas(dbapi_conn)
+
+    @event.listens_for(read_engine, "connect")
+    def set_sqlite_read_pragma(dbapi_conn, connection_record):
+        apply_sqlite_pragmas(dbapi_conn, query_only=True)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+instrument_engine(engine, "write")
+if read_engine is not engine:
+    instrument_engine(read_engine, "read")
+
+# expire_on_commit=False: services flush and refresh what they return before
+# committing, so using those objects afterwards never takes the writer
+# connection again for the rest of the request.
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine, expire_on_commit=False
+)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+instrument_sessions(SessionLocal, "write")
+instrument_sessions(ReadSessionLocal, "read")
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    if IS_SQLITE:
+        _check_uuid_storage()
+
+def _check_uuid_storage():
+    """Refuse to start on a database whose keys are still hex text.
+
+    Keys are bound as 16-byte blobs, so lookups against an unmigrated file
+    would silently match nothing.
+    """
+    with engine.connect() as conn:
+        for table in ("teachers", "students"):
+            legacy = conn.exec_driver_sql(
+                f"SELECT 1 FROM {table} WHERE typeof(id) = 'text' LIMIT 1"
+            ).first()
+            if legacy:
+                raise RuntimeError(
+                    "Database keys use the old text UUID format; "
+                    "run `alembic upgrade head` in backend/ before starting"
+                )
 
 def get_db():
+    """Session on the writer connection, for requests that modify data."""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    """Session on the read-only pool, for requests that only query."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
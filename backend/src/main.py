@@ -1,14 +1,27 @@
-from fastapi import FastAPI
+from anyio import to_thread
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 import os
 
-from src.api import student, auth, projects, roster, submissions, marking, ws
-from src.database import init_db, SessionLocal
+from src.api import student, auth, projects, roster, submissions, marking, ws, diagnostics, metrics
+from src.api.ws import manager
+from src.database import THREADPOOL_SIZE, init_db, SessionLocal
+from src.services.asset_service import HASHED_ASSET_NAME, STIMULUS_ASSET_DIR, STIMULUS_ASSET_URL
+from src.services.compression import CompressionMiddleware
+from src.services.export_jobs import export_jobs
+from src.services.grading_jobs import grading_jobs
+from src.services.identity_cache import identity_cache
+from src.services.metrics import MetricsMiddleware
+from src.services.tracing import TracingMiddleware, trace_writer
+from src.services.pagination import NEXT_CURSOR_HEADER
+from src.services.query_stats import tag_route
+from src.services.sqlite_maintenance import sqlite_maintenance
 from src.models.base import Teacher
 from src.services.auth import get_password_hash
+from src.services.static_files import VITE_HASHED_ASSET, CachedStaticFiles
 
-app = FastAPI(title="Abigail Spelling Assessment API")
+# tag_route labels each request's SQL with its route for /api/diagnostics/queries
+app = FastAPI(title="Abigail Spelling Assessment API", dependencies=[Depends(tag_route)])
 
 DEFAULT_TEACHER_USERNAME = "admin"
 DEFAULT_TEACHER_PASSWORD = "abigail2026"
@@ -21,11 +34,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "X-Request-ID"],
 )
+app.add_middleware(CompressionMiddleware)
+# Traces include compression and carry the request ID out to the client
+app.add_middleware(TracingMiddleware)
+# Outermost, so request timings include compression
+app.add_middleware(MetricsMiddleware)
 
 # Initialize database and seed default teacher if none exist
 @app.on_event("startup")
 async def startup_event():
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
     # In a production scenario with Alembic, we might skip init_db()
     # but for local first simplicity we can ensure tables exist
     init_db()
@@ -41,6 +61,25 @@ async def startup_event():
             db.commit()
     finally:
         db.close()
+    await manager.start()
+    # Roster changes made on this worker evict identities cached by the others
+    manager.subscribe("identity_cache", identity_cache.apply_invalidation)
+    identity_cache.set_relay(lambda message: manager.publish_internal("identity_cache", message))
+    await sqlite_maintenance.start()
+    # Requeues grades a previous process left running, then starts the workers
+    await grading_jobs.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # First, while the database is still maintained: drain or requeue grades
+    await grading_jobs.stop()
+    identity_cache.set_relay(None)
+    await manager.stop()
+    export_jobs.shutdown()
+    await sqlite_maintenance.stop()
+    # The writer is a daemon thread; write out what it still has queued
+    await to_thread.run_sync(trace_writer.flush)
 
 # Include routers
 app.include_router(student.router, prefix="/api/student", tags=["Student"])
@@ -50,6 +89,8 @@ app.include_router(roster.router, prefix="/api/roster", tags=["Roster"])
 app.include_router(submissions.router, prefix="/api/submissions", tags=["Submissions"])
 app.include_router(marking.router, prefix="/api/marking", tags=["Marking"])
 app.include_router(ws.router, prefix="/api/ws", tags=["WebSocket"])
+app.include_router(diagnostics.router, prefix="/api/diagnostics", tags=["Diagnostics"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["Metrics"])
 
 @app.get("/api/health")
 async def health_check():
@@ -57,5 +98,15 @@ async def health_check():
 
 # Serve static files (built React app and local assets)
 # Note: Ensure these directories exist or handle gracefully
+os.makedirs(STIMULUS_ASSET_DIR, exist_ok=True)
+app.mount(
+    STIMULUS_ASSET_URL,
+    CachedStaticFiles(directory=STIMULUS_ASSET_DIR, immutable_pattern=HASHED_ASSET_NAME),
+    name="stimulus_assets",
+)
 if os.path.exists("static"):
-    app.mount("/", StaticFiles(directory="static", html=True), name="static")
+    app.mount(
+        "/",
+        CachedStaticFiles(directory="static", html=True, immutable_pattern=VITE_HASHED_ASSET),
+        name="static",
+    )
@@ -2,19 +2,25 @@ import uuid
 from datetime import datetime, timezone
 from typing import List, Optional
 
-from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, String, Text, JSON
+from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Index, String, Text, JSON, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
+from src.models.types import BinaryUUID, JSONDocument, uuid7
+
 
 class Base(DeclarativeBase):
-    pass
+    type_annotation_map = {uuid.UUID: BinaryUUID}
 
 
 class Student(Base):
     __tablename__ = "students"
+    __table_args__ = (
+        # Keyset order of the avatar login grid
+        Index("ix_students_class_group_name_id", "class_group", "name", "id"),
+    )
 
-    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid7)
     name: Mapped[str] = mapped_column(String, nullable=False)
     year_level: Mapped[int] = mapped_column(nullable=False)
     id_code: Mapped[str] = mapped_column(String, unique=True, nullable=False)
@@ -24,6 +30,12 @@ class Student(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(timezone.utc)
     )
+    # Row version for conditional GETs of the login grid
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
 
     submissions: Mapped[List["Submission"]] = relationship(
         back_populates="student", cascade="all, delete-orphan"
@@ -33,7 +45,7 @@ class Student(Base):
 class Teacher(Base):
     __tablename__ = "teachers"
 
-    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid7)
     username: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     password_hash: Mapped[str] = mapped_column(String, nullable=False)
     full_name: Mapped[str] = mapped_column(String, nullable=False)
@@ -44,18 +56,31 @@ class Teacher(Base):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # Class-group filter of the student project list (PostgreSQL only)
+        Index(
+            "ix_projects_assigned_class_groups_gin", "assigned_class_groups",
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
 
-    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid7)
     title: Mapped[str] = mapped_column(String, nullable=False)
     genre: Mapped[str] = mapped_column(String, nullable=False)  # NARRATIVE, PERSUASIVE
     instructions: Mapped[str] = mapped_column(Text, nullable=False)
     stimulus_html: Mapped[str] = mapped_column(Text, nullable=False)
     asset_paths: Mapped[Optional[list]] = mapped_column(JSON, default=list)
-    assigned_class_groups: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    assigned_class_groups: Mapped[list] = mapped_column(JSONDocument, nullable=False, default=list)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(timezone.utc)
     )
+    # Row version for conditional GETs of project listings and stimulus
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
 
     submissions: Mapped[List["Submission"]] = relationship(
         back_populates="project", cascade="all, delete-orphan"
@@ -64,8 +89,15 @@ class Project(Base):
 
 class Submission(Base):
     __tablename__ = "submissions"
+    __table_args__ = (
+        # Keyset order of the dashboard listing
+        Index("ix_submissions_last_updated_at_id", "last_updated_at", "id"),
+        Index("ix_submissions_project_id_status", "project_id", "status"),
+        # Per-student draft lookup on every autosave
+        Index("ix_submissions_student_id_project_id", "student_id", "project_id"),
+    )
 
-    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid7)
     student_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("students.id"), nullable=False)
     project_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("projects.id"), nullable=False)
     content_raw: Mapped[str] = mapped_column(Text, default="")
@@ -88,8 +120,17 @@ class Submission(Base):
 
 class AssessmentResult(Base):
     __tablename__ = "assessment_results"
+    __table_args__ = (
+        Index("ix_assessment_results_submission_id", "submission_id"),
+        # Comparing models over time
+        Index("ix_assessment_results_model_name", "model_name", "generated_at"),
+        Index(
+            "ix_assessment_results_criteria_scores_gin", "criteria_scores",
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
 
-    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid7)
     submission_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("submissions.id", ondelete="CASCADE"), nullable=False
     )
@@ -101,7 +142,91 @@ class AssessmentResult(Base):
     )
     overall_strengths: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
     overall_weaknesses: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
-    criteria_scores: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    criteria_scores: Mapped[dict] = mapped_column(JSONDocument, nullable=False, default=dict)
     full_report_md: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    # How the result was produced; NULL for results graded before these were recorded
+    model_name: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    model_digest: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    prompt_hash: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Token counts and Ollama-reported times, summed over all attempts
+    prompt_eval_count: Mapped[Optional[int]] = mapped_column(nullable=True)
+    eval_count: Mapped[Optional[int]] = mapped_column(nullable=True)
+    prompt_eval_ms: Mapped[Optional[float]] = mapped_column(nullable=True)
+    eval_ms: Mapped[Optional[float]] = mapped_column(nullable=True)
+    attempts: Mapped[Optional[int]] = mapped_column(nullable=True)
+
+    submission: Mapped["Submission"] = relationship(back_populates="assessment_results")
+
+
+class MarkingTrial(Base):
+    """One submission re-marked by one model/prompt configuration in a comparison run.
+
+    Kept apart from AssessmentResult so trial marks never replace the ones
+    teachers see.
+    """
+
+    __tablename__ = "marking_trials"
+    __table_args__ = (Index("ix_marking_trials_run_id", "run_id", "config_name"),)
 
-    submission: Mapped["Submission"] = relationship(back_populates="assessment_results")
\ No newline at end of file
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid7)
+    run_id: Mapped[str] = mapped_column(String, nullable=False)
+    config_name: Mapped[str] = mapped_column(String, nullable=False)
+    submission_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("submissions.id", ondelete="CASCADE"), nullable=False
+    )
+    genre: Mapped[str] = mapped_column(String, nullable=False)
+    # NULL when the trial failed; see error
+    total_score: Mapped[Optional[int]] = mapped_column(nullable=True)
+    max_score: Mapped[Optional[int]] = mapped_column(nullable=True)
+    criteria_scores: Mapped[dict] = mapped_column(JSONDocument, nullable=False, default=dict)
+    model_name: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    model_digest: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    prompt_hash: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    prompt_eval_count: Mapped[Optional[int]] = mapped_column(nullable=True)
+    eval_count: Mapped[Optional[int]] = mapped_column(nullable=True)
+    prompt_eval_ms: Mapped[Optional[float]] = mapped_column(nullable=True)
+    eval_ms: Mapped[Optional[float]] = mapped_column(nullable=True)
+    attempts: Mapped[Optional[int]] = mapped_column(nullable=True)
+    # Wall-clock time for this submission, including queueing at Ollama
+    duration_ms: Mapped[float] = mapped_column(nullable=False)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+
+
+class GradingJob(Base):
+    """A request to AI-grade one submission, persisted so no grade is lost on restart.
+
+    A worker holds a lease on a running job and extends it with heartbeats;
+    a running job whose lease has expired belonged to a process that died
+    and is requeued.
+    """
+
+    __tablename__ = "grading_jobs"
+    __table_args__ = (
+        Index("ix_grading_jobs_status_created_at", "status", "created_at"),
+        # At most one queued or running job per submission
+        Index(
+            "uq_grading_jobs_active_submission", "submission_id", unique=True,
+            sqlite_where=text("status IN ('queued', 'running')"),
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid7)
+    submission_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("submissions.id", ondelete="CASCADE"), nullable=False
+    )
+    status: Mapped[str] = mapped_column(String, nullable=False, default="queued")  # queued, running, succeeded, failed
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    lease_owner: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    assessment_id: Mapped[Optional[uuid.UUID]] = mapped_column(nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
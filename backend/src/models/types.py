@@ -0,0 +1,89 @@
+"""Column types and JSON operators that work on both SQLite and PostgreSQL."""
+
+import os
+import time
+import uuid
+
+from sqlalchemy import JSON, Boolean, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import TypeDecorator
+
+
+def uuid7() -> uuid.UUID:
+    """A version 7 UUID: 48-bit Unix milliseconds followed by random bits.
+
+    Keys generated in insert order land at the right-hand edge of the primary
+    key B-tree, instead of splitting pages all over it as random uuid4 keys do.
+    """
+    value = (time.time_ns() // 1_000_000) << 80
+    value |= int.from_bytes(os.urandom(10), "big")
+    value &= ~(0xF << 76)
+    value |= 0x7 << 76  # version
+    value &= ~(0x3 << 62)
+    value |= 0x2 << 62  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
+class BinaryUUID(TypeDecorator):
+    """UUIDs as 16-byte BLOBs on SQLite and native ``uuid`` on PostgreSQL.
+
+    SQLAlchemy's generic ``Uuid`` stores 32-character hex strings on SQLite,
+    which doubles the size of every primary key, foreign key and index entry.
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(PG_UUID(as_uuid=True))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value if dialect.name == "postgresql" else value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        return uuid.UUID(bytes=bytes(value))
+
+
+# JSON text on SQLite; binary JSONB on PostgreSQL, which GIN indexes can cover
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
+
+class JsonArrayContains(FunctionElement):
+    """True when a JSON array column has ``value`` as one of its elements.
+
+    Compiles to ``@>`` on PostgreSQL (served by a GIN index) and to a
+    ``json_each`` scan on SQLite. Unlike a LIKE on the JSON text, "7A" does
+    not match an array holding "7AB".
+    """
+
+    type = Boolean()
+    name = "json_array_contains"
+    inherit_cache = True
+
+
+@compiles(JsonArrayContains)
+def _json_array_contains_sqlite(element, compiler, **kw):
+    column, value = list(element.clauses)
+    return (
+        f"EXISTS (SELECT 1 FROM json_each({compiler.process(column, **kw)}) "
+        f"WHERE json_each.value = {compiler.process(value, **kw)})"
+    )
+
+
+@compiles(JsonArrayContains, "postgresql")
+def _json_array_contains_postgresql(element, compiler, **kw):
+    column, value = list(element.clauses)
+    return (
+        f"{compiler.process(column, **kw)} @> "
+        f"jsonb_build_array(CAST({compiler.process(value, **kw)} AS TEXT))"
+    )
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, ConfigDict
 from uuid import UUID
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 
 class CriterionAssessment(BaseModel):
@@ -23,5 +23,47 @@ class AssessmentResultResponse(BaseModel):
     overall_weaknesses: List[str]
     criteria_scores: Dict[str, Any]  # criterion name -> CriterionAssessment-like dict
     full_report_md: str
+    model_name: Optional[str] = None
+    model_digest: Optional[str] = None
+    prompt_hash: Optional[str] = None
+    prompt_eval_count: Optional[int] = None
+    eval_count: Optional[int] = None
+    prompt_eval_ms: Optional[float] = None
+    eval_ms: Optional[float] = None
+    attempts: Optional[int] = None
+
+    # model_name would otherwise trip pydantic's "model_" namespace warning
+    model_config = ConfigDict(from_attributes=True, protected_namespaces=())
+
+
+class GradingJobResponse(BaseModel):
+    id: UUID
+    submission_id: UUID
+    status: str  # queued, running, succeeded, failed
+    attempts: int
+    assessment_id: Optional[UUID] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class GradingJobList(BaseModel):
+    counts: Dict[str, int]
+    jobs: List[GradingJobResponse]
+
+
+class GradeSummary(BaseModel):
+    strengths: List[str]
+    weaknesses: List[str]
+
+
+class GradeResponse(BaseModel):
+    message: Optional[str] = None
+    assessment_id: str
+    total_score: int
+    max_score: int
+    summary: GradeSummary
@@ -0,0 +1,130 @@
+"""Ingestion of stimulus assets uploaded by teachers.
+
+Uploads are stored under a content-hashed name, so identical files are kept
+once and every URL can be cached by browsers forever. Images also get
+downscaled WebP and JPEG variants; the upload response points at the
+largest WebP so students never download the full-size phone photo.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+STIMULUS_ASSET_DIR = os.getenv("STIMULUS_ASSET_DIR", "static/stimulus_assets")
+STIMULUS_ASSET_URL = "/stimulus_assets"
+ASSET_VARIANT_WIDTHS = [
+    int(w) for w in os.getenv("ASSET_VARIANT_WIDTHS", "480,960,1600").split(",") if w.strip()
+]
+ASSET_MAX_BYTES = int(os.getenv("ASSET_MAX_BYTES", str(25 * 1024 * 1024)))
+
+# Content-hashed names: 20 hex chars, optional "-<width>" variant suffix. The
+# "<hash>.json" manifest is rewritten in place, so it is not immutable.
+HASHED_ASSET_NAME = re.compile(r"[0-9a-f]{20}(-\d+)?\.(?!json$)[a-z0-9]{1,8}")
+
+_VARIANT_FORMATS = (
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpg", "JPEG", {"quality": 82, "optimize": True}),
+)
+_COPY_CHUNK_BYTES = 1024 * 1024
+
+
+class AssetTooLargeError(ValueError):
+    pass
+
+
+def _extension(filename: Optional[str]) -> str:
+    suffix = Path(filename or "").suffix.lower().lstrip(".")
+    if suffix == "jpeg":
+        suffix = "jpg"
+    return suffix if re.fullmatch(r"[a-z0-9]{1,8}", suffix) else "bin"
+
+
+class AssetService:
+    @staticmethod
+    def ingest(file: BinaryIO, filename: Optional[str], directory: str = STIMULUS_ASSET_DIR) -> Dict:
+        """
+        Store an upload under its content hash and build its image variants.
+
+        Returns the URL to embed (``path``), the original's URL and the list
+        of variants. Re-uploading an identical file reuses the stored copy.
+        """
+        target_dir = Path(directory)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target_dir, suffix=".part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while chunk := file.read(_COPY_CHUNK_BYTES):
+                    size += len(chunk)
+                    if size > ASSET_MAX_BYTES:
+                        raise AssetTooLargeError(f"Asset exceeds {ASSET_MAX_BYTES} bytes")
+                    digest.update(chunk)
+                    tmp.write(chunk)
+
+            key = digest.hexdigest()[:20]
+            manifest_path = target_dir / f"{key}.json"
+            if manifest_path.exists():
+                manifest = json.loads(manifest_path.read_text())
+                manifest["deduplicated"] = True
+                return manifest
+
+            original = target_dir / f"{key}.{_extension(filename)}"
+            os.replace(tmp_name, original)
+        finally:
+            Path(tmp_name).unlink(missing_ok=True)
+
+        variants = AssetService._build_variants(original, key)
+        webp = [v for v in variants if v["format"] == "webp"]
+        manifest = {
+            "path": webp[-1]["path"] if webp else f"{STIMULUS_ASSET_URL}/{original.name}",
+            "original": f"{STIMULUS_ASSET_URL}/{original.name}",
+            "hash": key,
+            "bytes": size,
+            "variants": variants,
+        }
+        # Written last: its presence marks the asset as fully processed
+        manifest_path.write_text(json.dumps(manifest))
+        return {**manifest, "deduplicated": False}
+
+    @staticmethod
+    def _build_variants(original: Path, key: str) -> List[Dict]:
+        try:
+            with Image.open(original) as opened:
+                if getattr(opened, "is_animated", False):
+                    # Re-encoding would keep only the first frame
+                    return []
+                image = ImageOps.exif_transpose(opened)
+                if image.mode not in ("RGB", "RGBA"):
+                    image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+                widths = [w for w in ASSET_VARIANT_WIDTHS if w < image.width]
+                if image.width <= max(ASSET_VARIANT_WIDTHS, default=0):
+                    # Small images still get a re-encoded, metadata-free copy
+                    widths.append(image.width)
+                variants = []
+                for width in sorted(set(widths)):
+                    height = max(1, round(image.height * width / image.width))
+                    resized = image if width == image.width else image.resize(
+                        (width, height), Image.Resampling.LANCZOS
+                    )
+                    for ext, fmt, options in _VARIANT_FORMATS:
+                        frame = resized.convert("RGB") if fmt == "JPEG" else resized
+                        path = original.with_name(f"{key}-{width}.{ext}")
+                        frame.save(path, fmt, **options)
+                        variants.append({
+                            "width": width,
+                            "height": height,
+                            "format": ext,
+                            "bytes": path.stat().st_size,
+                            "path": f"{STIMULUS_ASSET_URL}/{path.name}",
+                        })
+                return variants
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+            # Not an image Pillow understands (e.g. a PDF); serve the original only
+            return []
@@ -1,4 +1,5 @@
 import os
+import threading
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Union
 
@@ -9,18 +10,29 @@ import bcrypt
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-for-local-use")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day for local use
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+
+# Routes run on the threadpool and bcrypt releases the GIL, so logins hash in
+# parallel without touching the event loop. The semaphore caps CPU spent on
+# hashing within this process.
+_password_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(
-        plain_password.encode("utf-8"), 
-        hashed_password.encode("utf-8")
-    )
+    with _password_slots:
+        return bcrypt.checkpw(
+            plain_password.encode("utf-8"), 
+            hashed_password.encode("utf-8")
+        )
 
 
 def get_password_hash(password: str) -> str:
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    with _password_slots:
+        return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -46,16 +58,29 @@ def decode_token(token: str) -> Optional[dict]:
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from src.database import get_db
+from src.database import get_read_db
 from src.models.base import Student, Teacher
+from src.services.identity_cache import StudentIdentity, TeacherIdentity, identity_cache
 import uuid
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/student/auth/login")
 teacher_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 
-def get_current_student(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Student:
-    payload = decode_token(token)
+def decode_token_cached(token: str) -> Optional[dict]:
+    """decode_token() with verified claims remembered for the identity cache TTL."""
+    payload = identity_cache.get_claims(token)
+    if payload is None:
+        payload = decode_token(token)
+        if payload is not None:
+            identity_cache.put_claims(token, payload)
+    return payload
+
+
+def get_current_student(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)
+) -> StudentIdentity:
+    payload = decode_token_cached(token)
     if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -70,19 +95,25 @@ def get_current_student(token: str = Depends(oauth2_scheme), db: Session = Depen
             detail="Could not validate credentials",
         )
 
+    identity = identity_cache.get_identity("student", student_id)
+    if identity is not None:
+        return identity
+
     student = db.query(Student).filter(Student.id == uuid.UUID(student_id)).first()
     if student is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Student not found",
         )
-    return student
+    identity = StudentIdentity.from_model(student)
+    identity_cache.put_identity("student", student_id, identity)
+    return identity
 
 
 def get_current_teacher(
-    token: str = Depends(teacher_oauth2_scheme), db: Session = Depends(get_db)
-) -> Teacher:
-    payload = decode_token(token)
+    token: str = Depends(teacher_oauth2_scheme), db: Session = Depends(get_read_db)
+) -> TeacherIdentity:
+    payload = decode_token_cached(token)
     if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -103,10 +134,16 @@ def get_current_teacher(
             detail="Could not validate credentials",
         )
 
+    identity = identity_cache.get_identity("teacher", teacher_id)
+    if identity is not None:
+        return identity
+
     teacher = db.query(Teacher).filter(Teacher.id == uuid.UUID(teacher_id)).first()
     if teacher is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Teacher not found",
         )
-    return teacher
+    identity = TeacherIdentity.from_model(teacher)
+    identity_cache.put_identity("teacher", teacher_id, identity)
+    return identity
@@ -0,0 +1,163 @@
+"""Broadcast backends that fan dashboard messages out across server workers.
+
+Each uvicorn worker keeps its own WebSocket connections, so a message published
+on one worker has to be relayed to every other worker before it reaches all
+dashboards. The backend is chosen with ``BROADCAST_BACKEND``:
+
+- ``memory`` (default): in-process only, for single-worker deployments.
+- ``unix``: peer-to-peer Unix datagram sockets in ``BROADCAST_SOCKET_DIR``.
+  Every worker binds one socket in the shared directory and publishes by
+  sending to all of its peers, so no broker process is needed. The default
+  directory is derived from the database URL, so workers of one deployment
+  find each other while other deployments on the same host stay separate.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import socket
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from sqlalchemy.engine import make_url
+
+from src.database import DATABASE_URL
+from src.services.json_codec import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[Dict], Awaitable[None]]
+
+BROADCAST_BACKEND = os.getenv("BROADCAST_BACKEND", "memory").lower()
+
+
+def default_socket_dir(database_url: str = DATABASE_URL) -> str:
+    """Per-deployment socket directory: workers sharing a database share it."""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        # ./local_assessment.db names a different database in each checkout
+        url = url.set(database=os.path.abspath(url.database))
+    key = hashlib.sha256(url.render_as_string(hide_password=False).encode("utf-8"))
+    return os.path.join(tempfile.gettempdir(), f"abigail-broadcast-{key.hexdigest()[:12]}")
+
+
+BROADCAST_SOCKET_DIR = os.getenv("BROADCAST_SOCKET_DIR") or default_socket_dir()
+
+# Linux allows datagrams of roughly 200KB on Unix sockets; dashboard messages
+# are a few hundred bytes, so this only guards against runaway payloads.
+MAX_DATAGRAM_BYTES = 64 * 1024
+
+
+class BroadcastBackend:
+    """Delivers published messages to the local connections of every worker."""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    def bind(self, deliver: Deliver) -> None:
+        """Register the coroutine that sends a message to this worker's sockets."""
+        self._deliver = deliver
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, message: Dict) -> None:
+        await self._deliver_local(message)
+
+    async def _deliver_local(self, message: Dict) -> None:
+        if self._deliver is not None:
+            await self._deliver(message)
+
+
+class InProcessBackend(BroadcastBackend):
+    """Single-worker backend: published messages only reach this process."""
+
+
+class UnixSocketBackend(BroadcastBackend):
+    """Fan-out over Unix datagram sockets shared by all workers on one host."""
+
+    def __init__(self, socket_dir: str = BROADCAST_SOCKET_DIR):
+        super().__init__()
+        self.socket_dir = Path(socket_dir)
+        self.socket_path: Optional[Path] = None
+        self.dropped = 0
+        self._sock: Optional[socket.socket] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        if not hasattr(socket, "AF_UNIX"):
+            raise RuntimeError("BROADCAST_BACKEND=unix requires Unix domain sockets")
+        self.socket_dir.mkdir(parents=True, exist_ok=True)
+        self.socket_path = self.socket_dir / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock"
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        sock.bind(str(self.socket_path))
+        self._sock = sock
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(sock.fileno(), self._on_readable)
+
+    async def stop(self) -> None:
+        if self._sock is None:
+            return
+        self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        if self.socket_path is not None:
+            self.socket_path.unlink(missing_ok=True)
+
+    async def publish(self, message: Dict) -> None:
+        await self._deliver_local(message)
+        if self._sock is None:
+            return
+        payload = dumps(message)
+        if len(payload) > MAX_DATAGRAM_BYTES:
+            # Already delivered locally; failing here would fail the caller's
+            # save, so other workers' dashboards miss this one update instead
+            self.dropped += 1
+            logger.warning(
+                "Broadcast message of %d bytes exceeds %d; not sent to other workers",
+                len(payload), MAX_DATAGRAM_BYTES,
+            )
+            return
+        for peer in self.socket_dir.glob("*.sock"):
+            if peer == self.socket_path:
+                continue
+            try:
+                self._sock.sendto(payload, str(peer))
+            except (ConnectionRefusedError, FileNotFoundError):
+                # The worker that owned this socket has exited without cleaning up.
+                peer.unlink(missing_ok=True)
+            except BlockingIOError:
+                # Peer's receive buffer is full; drop rather than stall this worker.
+                self.dropped += 1
+
+    def _on_readable(self) -> None:
+        while self._sock is not None:
+            try:
+                payload = self._sock.recv(MAX_DATAGRAM_BYTES)
+            except BlockingIOError:
+                return
+            try:
+                message = loads(payload)
+            except ValueError:
+                continue
+            task = self._loop.create_task(self._deliver_local(message))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+
+def get_broadcast_backend(name: Optional[str] = None) -> BroadcastBackend:
+    """Build the backend selected by ``name`` or the ``BROADCAST_BACKEND`` env var."""
+    name = (name or BROADCAST_BACKEND).lower()
+    if name == "memory":
+        return InProcessBackend()
+    if name == "unix":
+        return UnixSocketBackend()
+    raise ValueError(f"Unknown broadcast backend: {name}")
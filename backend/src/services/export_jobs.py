@@ -0,0 +1,222 @@
+"""Background export jobs and the on-disk cache of finished export archives.
+
+Artifacts are named after ``(project, export mode, data watermark)``, so an
+unchanged project is never exported twice and any worker process can serve
+an artifact another worker produced. The cache directory is capped at
+``EXPORT_CACHE_MAX_BYTES`` with least-recently-used eviction.
+"""
+
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", "export_cache")
+EXPORT_CACHE_MAX_BYTES = int(os.getenv("EXPORT_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", "2"))
+# Finished jobs are forgotten after this; their archives stay in the artifact cache
+EXPORT_JOB_TTL_SECONDS = float(os.getenv("EXPORT_JOB_TTL_SECONDS", "3600"))
+
+_ARTIFACT_ID = re.compile(r"[\w-]+")
+
+
+def artifact_id(project_id: uuid.UUID, mode: str, watermark: str) -> str:
+    return f"{project_id}-{mode}-{watermark}"
+
+
+def parse_artifact_id(artifact: str) -> Tuple[uuid.UUID, str]:
+    """Recover ``(project_id, mode)`` from an artifact id; ValueError if malformed."""
+    project_id, mode, _watermark = artifact.rsplit("-", 2)
+    return uuid.UUID(project_id), mode
+
+
+class ExportArtifactCache:
+    """Directory of finished ZIP archives with an LRU size cap."""
+
+    def __init__(self, directory: str = EXPORT_CACHE_DIR, max_bytes: int = EXPORT_CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path_for(self, artifact: str) -> Path:
+        if not _ARTIFACT_ID.fullmatch(artifact):
+            raise ValueError(f"Invalid export artifact id: {artifact!r}")
+        return self.directory / f"{artifact}.zip"
+
+    def get(self, artifact: str) -> Optional[Path]:
+        """Return the artifact's path if it exists, marking it recently used."""
+        if not _ARTIFACT_ID.fullmatch(artifact):
+            return None
+        path = self.path_for(artifact)
+        try:
+            # Recency lives in atime so mtime (Last-Modified) stays stable
+            os.utime(path, (time.time(), path.stat().st_mtime))
+        except FileNotFoundError:
+            return None
+        return path
+
+    def store(self, artifact: str, chunks: Iterable[bytes]) -> Path:
+        """Write a complete artifact, then evict old ones beyond the size cap."""
+        for _ in self.stream_and_store(artifact, chunks):
+            pass
+        return self.path_for(artifact)
+
+    def stream_and_store(self, artifact: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Pass chunks through while writing them to the cache.
+
+        The artifact only becomes visible once every chunk has been written, so
+        an abandoned download never leaves a truncated archive behind.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        completed = False
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in chunks:
+                    tmp.write(chunk)
+                    yield chunk
+            os.replace(tmp_name, self.path_for(artifact))
+            completed = True
+        finally:
+            if not completed:
+                Path(tmp_name).unlink(missing_ok=True)
+        self.evict(keep=artifact)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """Delete least-recently-used artifacts until the cache fits its cap."""
+        with self._lock:
+            entries = []
+            for path in self.directory.glob("*.zip"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if keep is not None and path.stem == keep:
+                    continue
+                try:
+                    path.unlink()
+                except (FileNotFoundError, PermissionError):
+                    # Already gone, or still open for download on Windows
+                    continue
+                total -= size
+
+    def stats(self) -> Dict[str, int]:
+        files = list(self.directory.glob("*.zip")) if self.directory.exists() else []
+        return {
+            "artifacts": len(files),
+            "bytes": sum(f.stat().st_size for f in files),
+            "max_bytes": self.max_bytes,
+        }
+
+
+@dataclass
+class ExportJob:
+    id: str
+    project_id: Optional[uuid.UUID]
+    mode: str
+    # Empty for artifacts built elsewhere; the route names them from the project
+    filename: str
+    status: str = "queued"  # queued, running, succeeded, failed
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+
+
+class ExportJobManager:
+    """Runs export builds on a small thread pool and tracks their progress."""
+
+    def __init__(
+        self,
+        artifacts: ExportArtifactCache,
+        workers: int = EXPORT_JOB_WORKERS,
+        ttl_seconds: float = EXPORT_JOB_TTL_SECONDS,
+    ):
+        self.artifacts = artifacts
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+        self._jobs: Dict[str, ExportJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        artifact: str,
+        project_id: uuid.UUID,
+        mode: str,
+        filename: str,
+        build: Callable[[], Iterable[bytes]],
+    ) -> ExportJob:
+        """
+        Queue ``build()`` to be written as ``artifact``.
+
+        Jobs are identified by their artifact, so asking again for unchanged
+        data returns the existing job, or a finished one if it is cached.
+        """
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(artifact)
+            if job is not None and job.status in ("queued", "running"):
+                return job
+            job = ExportJob(id=artifact, project_id=project_id, mode=mode, filename=filename)
+            self._jobs[artifact] = job
+            if self.artifacts.get(artifact) is not None:
+                job.status = "succeeded"
+                job.finished_at = job.created_at
+                return job
+        self._executor.submit(self._run, job, build)
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+        if job is None and self.artifacts.get(job_id) is not None:
+            # Built by another worker process, or before a restart
+            try:
+                project_id, mode = parse_artifact_id(job_id)
+            except ValueError:
+                return None
+            return ExportJob(
+                id=job_id, project_id=project_id, mode=mode, filename="", status="succeeded"
+            )
+        return job
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _prune(self) -> None:
+        """Forget jobs that finished more than ``ttl_seconds`` ago; call with the lock held."""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at.timestamp() < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _run(self, job: ExportJob, build: Callable[[], Iterable[bytes]]) -> None:
+        job.status = "running"
+        try:
+            self.artifacts.store(job.id, build())
+            job.status = "succeeded"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+
+
+export_artifacts = ExportArtifactCache()
+export_jobs = ExportJobManager(export_artifacts)
@@ -1,41 +1,257 @@
+import csv
+import hashlib
+import io
 import os
 import zipfile
-import io
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from typing import List, Tuple
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import func, select, true
+from typing import Iterator
 from uuid import UUID
 
-from src.models.base import Submission, Student, Project
+from src.database import ReadSessionLocal
+from src.models.base import AssessmentResult, Submission, Student, Project
+from src.services.naplan_rubric_loader import NARRATIVE_CRITERIA, PERSUASIVE_CRITERIA
+
+# Submissions fetched per round trip while streaming an export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "100"))
+EXPORT_MODES = ("text", "bundle")
+# Fixed entry timestamp (the earliest a ZIP can record) so rebuilding unchanged
+# data gives a byte-identical archive, which the export ETag promises
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def _safe_filename(name: str) -> str:
+    """Remove characters that might be invalid in filenames."""
+    return "".join(c for c in name if c.isalnum() or c in (' ', '_', '-', '.')).strip()
+
+
+def _zip_entry(name: str) -> zipfile.ZipInfo:
+    """Entry header for writestr that does not stamp the current time."""
+    info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.external_attr = 0o600 << 16
+    return info
+
+
+class _ZipChunkSink(io.RawIOBase):
+    """Write-only, non-seekable sink that hands ZipFile output back in chunks.
+
+    ZipFile falls back to data descriptors when it cannot seek, so entries can
+    be emitted as soon as they are compressed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
 
 class ExportService:
     @staticmethod
-    def export_project_submissions_to_zip(db: Session, project_id: UUID) -> Tuple[io.BytesIO, str]:
-        """
-        Export all submissions for a project as raw text files in a zip archive.
-        """
-        project = db.query(Project).filter(Project.id == project_id).first()
-        if not project:
-            return None, ""
-
-        submissions = db.query(Submission, Student).join(Student).filter(
-            Submission.project_id == project_id,
-            Submission.status == "SUBMITTED"
-        ).all()
-
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED, False) as zip_file:
-            for submission, student in submissions:
-                # Create a filename: StudentName_IDCode.txt
-                filename = f"{student.name}_{student.id_code}.txt"
-                # Remove characters that might be invalid in filenames
-                filename = "".join(c for c in filename if c.isalnum() or c in (' ', '_', '-', '.')).strip()
-                
-                # The content_raw preserves original tabs and newlines
-                zip_file.writestr(filename, submission.content_raw)
-
-        zip_buffer.seek(0)
-        zip_filename = f"{project.title}_Submissions.zip"
-        zip_filename = "".join(c for c in zip_filename if c.isalnum() or c in (' ', '_', '-', '.')).strip()
-        
-        return zip_buffer, zip_filename
+    def get_export_filename(project: Project, mode: str = "text") -> str:
+        suffix = "Results" if mode == "bundle" else "Submissions"
+        return _safe_filename(f"{project.title}_{suffix}.zip")
+
+    @staticmethod
+    def iter_export(project: Project, mode: str = "text") -> Iterator[bytes]:
+        """
+        Yield the ZIP for an export mode while it is being built.
+
+        mode=text: one text file per submitted essay.
+        mode=bundle: essays, marking reports and a cohort score sheet.
+        """
+        if mode == "bundle":
+            return ExportService.iter_project_bundle_zip(project.id, project.title, project.genre)
+        return ExportService.iter_project_submissions_zip(project.id)
+
+    @staticmethod
+    def iter_project_submissions_zip(
+        project_id: UUID,
+        session_factory: sessionmaker = ReadSessionLocal,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> Iterator[bytes]:
+        """
+        Yield a ZIP of submitted texts entry by entry.
+
+        Uses its own session because a streaming response outlives the request's
+        dependencies, and reads rows in batches so memory stays flat.
+        """
+        stmt = (
+            select(Student.name, Student.id_code, Submission.content_raw)
+            .join(Student, Submission.student_id == Student.id)
+            .where(
+                Submission.project_id == project_id,
+                Submission.status == "SUBMITTED",
+            )
+            .execution_options(yield_per=batch_size)
+        )
+
+        sink = _ZipChunkSink()
+        db = session_factory()
+        try:
+            with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED, False) as zip_file:
+                for name, id_code, content_raw in db.execute(stmt):
+                    # Create a filename: StudentName_IDCode.txt
+                    filename = _safe_filename(f"{name}_{id_code}.txt")
+                    # The content_raw preserves original tabs and newlines
+                    zip_file.writestr(_zip_entry(filename), content_raw or "")
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+            # Closing the archive writes the central directory
+            yield sink.drain()
+        finally:
+            db.close()
+
+    @staticmethod
+    def get_watermark(db: Session, project_id: UUID) -> str:
+        """
+        Fingerprint of everything a project export contains.
+
+        Changes whenever the project is edited (its title and genre shape the
+        bundle), a submission is saved, submitted or unlocked, an assessment is
+        added, or one of the project's students is renamed or otherwise edited
+        (exports name files after students), so it can key cached export
+        artifacts.
+        """
+        submission_totals = (
+            select(func.count(Submission.id), func.max(Submission.last_updated_at))
+            .where(Submission.project_id == project_id)
+            .subquery()
+        )
+        result_totals = (
+            select(func.count(AssessmentResult.id), func.max(AssessmentResult.generated_at))
+            .join(Submission, AssessmentResult.submission_id == Submission.id)
+            .where(Submission.project_id == project_id)
+            .subquery()
+        )
+        student_version = (
+            select(func.max(Student.updated_at))
+            .join(Submission, Submission.student_id == Student.id)
+            .where(Submission.project_id == project_id)
+            .subquery()
+        )
+        # One statement: the export route already spends queries on auth and the project
+        row = db.execute(
+            select(
+                Project.title,
+                Project.updated_at,
+                *submission_totals.c,
+                *result_totals.c,
+                *student_version.c,
+            )
+            .select_from(Project)
+            .join(submission_totals, true())
+            .join(result_totals, true())
+            .join(student_version, true())
+            .where(Project.id == project_id)
+        ).one_or_none()
+        if row is None:
+            row = (None, None, 0, None, 0, None, None)
+        title, edited, submissions, results, students = (
+            row[0], row[1], row[2:4], row[4:6], row[6]
+        )
+        raw = (
+            f"{project_id}|{title}|{edited}|{tuple(submissions)}|{tuple(results)}|{students}"
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def iter_project_bundle_zip(
+        project_id: UUID,
+        title: str,
+        genre: str,
+        session_factory: sessionmaker = ReadSessionLocal,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> Iterator[bytes]:
+        """
+        Yield a results bundle ZIP:
+
+        - ``essays/<Student>_<ID>.txt``: submitted text
+        - ``reports/<Student>_<ID>.md``: latest AssessmentResult report, if graded
+        - ``<Project>_scores.csv``: one row per student with per-criterion scores
+
+        Everything comes from a single submissions/students/assessment_results
+        query rather than lazy loads per submission.
+        """
+        criteria = list(
+            (PERSUASIVE_CRITERIA if (genre or "").upper() == "PERSUASIVE" else NARRATIVE_CRITERIA)
+        )
+        stmt = (
+            select(
+                Submission.id,
+                Student.name,
+                Student.id_code,
+                Student.class_group,
+                Submission.submitted_at,
+                Submission.content_raw,
+                AssessmentResult.total_score,
+                AssessmentResult.max_score,
+                AssessmentResult.criteria_scores,
+                AssessmentResult.full_report_md,
+            )
+            .join(Student, Submission.student_id == Student.id)
+            .outerjoin(AssessmentResult, AssessmentResult.submission_id == Submission.id)
+            .where(
+                Submission.project_id == project_id,
+                Submission.status == "SUBMITTED",
+            )
+            # Newest assessment first, so repeats of a submission can be skipped
+            .order_by(Student.name, Submission.id, AssessmentResult.generated_at.desc())
+            .execution_options(yield_per=batch_size)
+        )
+
+        scores = io.StringIO()
+        writer = csv.writer(scores)
+        writer.writerow(
+            ["Student", "ID Code", "Class Group", "Submitted At", "Total Score", "Max Score"]
+            + [c.replace("_", " ").title() for c in criteria]
+        )
+
+        sink = _ZipChunkSink()
+        db = session_factory()
+        try:
+            with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED, False) as zip_file:
+                last_submission_id = None
+                for row in db.execute(stmt):
+                    if row.id == last_submission_id:
+                        continue
+                    last_submission_id = row.id
+                    stem = _safe_filename(f"{row.name}_{row.id_code}")
+                    zip_file.writestr(_zip_entry(f"essays/{stem}.txt"), row.content_raw or "")
+                    if row.full_report_md:
+                        zip_file.writestr(_zip_entry(f"reports/{stem}.md"), row.full_report_md)
+                    criterion_scores = row.criteria_scores or {}
+                    writer.writerow(
+                        [
+                            row.name,
+                            row.id_code,
+                            row.class_group,
+                            row.submitted_at.isoformat() if row.submitted_at else "",
+                            "" if row.total_score is None else row.total_score,
+                            "" if row.max_score is None else row.max_score,
+                        ]
+                        + [(criterion_scores.get(c) or {}).get("score", "") for c in criteria]
+                    )
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+                # utf-8-sig so Excel detects the encoding of student names
+                zip_file.writestr(
+                    _zip_entry(_safe_filename(f"{title}_scores.csv")),
+                    scores.getvalue().encode("utf-8-sig"),
+                )
+            yield sink.drain()
+        finally:
+            db.close()
@@ -0,0 +1,498 @@
+"""Persisted grading jobs with leases, heartbeats and crash recovery.
+
+Every grade, whether a teacher is waiting on it or it is part of an
+overnight batch, is a ``grading_jobs`` row that moves through
+queued -> running -> succeeded/failed:
+
+- A worker claims a queued job with a conditional UPDATE, so two workers
+  (threads or processes) can never run the same job. Claiming takes a lease
+  of ``GRADING_LEASE_SECONDS`` that a heartbeat thread keeps extending while
+  the model call runs.
+- A running job whose lease has expired belonged to a process that died
+  mid-grade. On startup, and on every heartbeat while workers run, it is
+  requeued, or failed once it has used ``GRADING_JOB_MAX_ATTEMPTS``.
+- On shutdown, workers stop claiming and running jobs get
+  ``GRADING_SHUTDOWN_GRACE_SECONDS`` to finish. Anything still running is
+  then checkpointed back to queued (the interrupted attempt is not counted),
+  so the next start picks it up straight away.
+- A job whose submission already has a result is marked succeeded without
+  calling the model again, so re-running a job after a crash that happened
+  between saving the result and finishing the job is harmless.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from anyio import to_thread
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.database import SessionLocal
+from src.models.base import AssessmentResult, GradingJob, Submission
+from src.services.metrics import GRADING_JOBS_REQUEUED
+from src.services.naplan_marking_service import NAPLANMarkingService
+from src.services.ollama_client import OllamaClient
+from src.services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Background graders; Ollama usually runs one generation at a time
+GRADING_WORKERS = int(os.getenv("GRADING_WORKERS", "1"))
+GRADING_LEASE_SECONDS = float(os.getenv("GRADING_LEASE_SECONDS", "120"))
+GRADING_HEARTBEAT_SECONDS = float(os.getenv("GRADING_HEARTBEAT_SECONDS", "30"))
+# How often idle workers look for jobs queued by other processes
+GRADING_POLL_SECONDS = float(os.getenv("GRADING_POLL_SECONDS", "5"))
+GRADING_JOB_MAX_ATTEMPTS = int(os.getenv("GRADING_JOB_MAX_ATTEMPTS", "3"))
+GRADING_SHUTDOWN_GRACE_SECONDS = float(os.getenv("GRADING_SHUTDOWN_GRACE_SECONDS", "30"))
+
+ACTIVE_STATUSES = ("queued", "running")
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class AlreadyQueuedError(ValueError):
+    """The submission already has a queued or running job."""
+
+    def __init__(self, job_id: Optional[uuid.UUID]):
+        super().__init__(f"Submission is already queued for grading (job {job_id})")
+        self.job_id = job_id
+
+
+class GradingJobManager:
+    """Queues grading jobs, runs them on worker threads and keeps their leases alive."""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        workers: int = GRADING_WORKERS,
+        lease_seconds: float = GRADING_LEASE_SECONDS,
+        heartbeat_seconds: float = GRADING_HEARTBEAT_SECONDS,
+        poll_seconds: float = GRADING_POLL_SECONDS,
+        max_attempts: int = GRADING_JOB_MAX_ATTEMPTS,
+        shutdown_grace_seconds: float = GRADING_SHUTDOWN_GRACE_SECONDS,
+        client_factory: Callable[[], OllamaClient] = OllamaClient,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.shutdown_grace_seconds = shutdown_grace_seconds
+        self.client_factory = client_factory
+        # Identifies this process's leases; unique per start
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.recovered = 0
+        self.checkpointed = 0
+        self._active: Set[uuid.UUID] = set()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._wake = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    # Queueing
+
+    def enqueue(self, db: Session, submission_id: uuid.UUID) -> GradingJob:
+        """Queue a grade, or return the submission's queued or running job."""
+        job = self.active_job(db, submission_id)
+        if job is not None:
+            return job
+        job = GradingJob(submission_id=submission_id, status="queued", attempts=0)
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            # Queued concurrently by another request; anything else is a real error
+            job = self.active_job(db, submission_id)
+            if job is None:
+                raise
+            return job
+        self._wake.set()
+        return job
+
+    def enqueue_project(self, db: Session, project_id: uuid.UUID) -> List[GradingJob]:
+        """Queue every submitted, ungraded submission of a project (e.g. for an overnight batch)."""
+        graded = select(AssessmentResult.submission_id)
+        submission_ids = db.execute(
+            select(Submission.id)
+            .where(
+                Submission.project_id == project_id,
+                Submission.status == "SUBMITTED",
+                Submission.id.not_in(graded),
+            )
+            .order_by(Submission.submitted_at, Submission.id)
+        ).scalars().all()
+        return [self.enqueue(db, submission_id) for submission_id in submission_ids]
+
+    @staticmethod
+    def active_job(db: Session, submission_id: uuid.UUID) -> Optional[GradingJob]:
+        return db.execute(
+            select(GradingJob).where(
+                GradingJob.submission_id == submission_id,
+                GradingJob.status.in_(ACTIVE_STATUSES),
+            )
+        ).scalar_one_or_none()
+
+    @staticmethod
+    def get(db: Session, job_id: uuid.UUID) -> Optional[GradingJob]:
+        return db.get(GradingJob, job_id)
+
+    @staticmethod
+    def list_jobs(
+        db: Session, status: Optional[str] = None, project_id: Optional[uuid.UUID] = None, limit: int = 100
+    ) -> List[GradingJob]:
+        stmt = select(GradingJob).order_by(GradingJob.created_at.desc()).limit(limit)
+        if status is not None:
+            stmt = stmt.where(GradingJob.status == status)
+        if project_id is not None:
+            stmt = stmt.join(Submission, GradingJob.submission_id == Submission.id).where(
+                Submission.project_id == project_id
+            )
+        return list(db.execute(stmt).scalars())
+
+    @staticmethod
+    def counts(db: Session) -> Dict[str, int]:
+        counts = {status: 0 for status in JOB_STATUSES}
+        for status, count in db.execute(
+            select(GradingJob.status, func.count(GradingJob.id)).group_by(GradingJob.status)
+        ):
+            counts[status] = count
+        return counts
+
+    # Leases
+
+    def _lease_values(self, now: datetime) -> Dict[str, Any]:
+        return {
+            "lease_owner": self.owner,
+            "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+            "heartbeat_at": now,
+        }
+
+    def claim(self, db: Session) -> Optional[GradingJob]:
+        """Take the oldest queued job, or None if there is nothing to do."""
+        while True:
+            job_id = db.execute(
+                select(GradingJob.id)
+                .where(GradingJob.status == "queued")
+                .order_by(GradingJob.created_at)
+                .limit(1)
+            ).scalar()
+            if job_id is None:
+                db.commit()
+                return None
+            now = _now()
+            claimed = db.execute(
+                update(GradingJob)
+                .where(GradingJob.id == job_id, GradingJob.status == "queued")
+                .values(
+                    status="running",
+                    attempts=GradingJob.attempts + 1,
+                    started_at=now,
+                    **self._lease_values(now),
+                )
+            ).rowcount
+            db.commit()
+            if claimed == 1:
+                with self._lock:
+                    self._active.add(job_id)
+                job = db.get(GradingJob, job_id, populate_existing=True)
+                # Release the writer connection before the model call
+                db.commit()
+                return job
+            # Another worker took it first; try the next one
+
+    def heartbeat(self) -> int:
+        """Extend the leases of every job this process is running."""
+        with self._lock:
+            active = list(self._active)
+        if not active:
+            return 0
+        db = self.session_factory()
+        try:
+            extended = db.execute(
+                update(GradingJob)
+                .where(
+                    GradingJob.id.in_(active),
+                    GradingJob.status == "running",
+                    GradingJob.lease_owner == self.owner,
+                )
+                .values(**self._lease_values(_now()))
+            ).rowcount
+            db.commit()
+            return extended
+        finally:
+            db.close()
+
+    def recover(self) -> int:
+        """Requeue (or fail, when out of attempts) running jobs whose lease has expired."""
+        db = self.session_factory()
+        try:
+            now = _now()
+            expired = db.execute(
+                select(GradingJob.id, GradingJob.attempts, GradingJob.lease_owner).where(
+                    GradingJob.status == "running", GradingJob.lease_expires_at < now
+                )
+            ).all()
+            recovered = 0
+            for job_id, attempts, owner in expired:
+                exhausted = attempts >= self.max_attempts
+                changed = db.execute(
+                    update(GradingJob)
+                    .where(
+                        GradingJob.id == job_id,
+                        GradingJob.status == "running",
+                        GradingJob.lease_expires_at < now,
+                    )
+                    .values(
+                        status="failed" if exhausted else "queued",
+                        error=(
+                            f"Lease held by {owner} expired during attempt {attempts}"
+                            + (f"; gave up after {attempts} attempts" if exhausted else "")
+                        ),
+                        finished_at=now if exhausted else None,
+                        lease_owner=None,
+                        lease_expires_at=None,
+                    )
+                ).rowcount
+                if changed:
+                    recovered += 1
+                    if not exhausted:
+                        GRADING_JOBS_REQUEUED.inc(reason="lease_expired")
+                    logger.warning(
+                        "Grading job %s lost its worker (%s); %s",
+                        job_id, owner, "failed" if exhausted else "requeued",
+                    )
+            db.commit()
+        finally:
+            db.close()
+        if recovered:
+            self.recovered += recovered
+            self._wake.set()
+        return recovered
+
+    def _finish(self, db: Session, job_id: uuid.UUID, status: str, **values: Any) -> bool:
+        """Record a job's outcome, unless its lease was taken away meanwhile."""
+        now = _now()
+        if status != "queued":
+            values.setdefault("finished_at", now)
+        finished = db.execute(
+            update(GradingJob)
+            .where(GradingJob.id == job_id, GradingJob.lease_owner == self.owner)
+            .values(status=status, lease_owner=None, lease_expires_at=None, heartbeat_at=now, **values)
+        ).rowcount
+        db.commit()
+        with self._lock:
+            self._active.discard(job_id)
+        if not finished:
+            logger.warning("Grading job %s was reassigned before it finished", job_id)
+        return bool(finished)
+
+    # Running
+
+    def execute(
+        self,
+        db: Session,
+        job: GradingJob,
+        client: Optional[OllamaClient] = None,
+        retry: bool = True,
+        check_existing: bool = True,
+    ) -> AssessmentResult:
+        """
+        Grade a job this process has claimed and record the outcome.
+
+        Errors are re-raised after being recorded. Unexpected ones requeue
+        the job while attempts remain (``retry``); invalid submissions fail it.
+        A submission that already has a result (graded before a crash was
+        noticed) succeeds without calling the model again.
+        """
+        job_id, submission_id, attempts = job.id, job.submission_id, job.attempts
+        with span("grading.job", job_id=str(job_id), attempt=attempts):
+            existing = check_existing and db.execute(
+                select(AssessmentResult)
+                .where(AssessmentResult.submission_id == submission_id)
+                .limit(1)
+            ).scalar_one_or_none()
+            if existing:
+                self._finish(db, job_id, "succeeded", assessment_id=existing.id, error=None)
+                return existing
+            service = NAPLANMarkingService(db, client or self.client_factory())
+            try:
+                result = service.grade_submission(submission_id)
+            except ValueError as exc:
+                db.rollback()
+                self._finish(db, job_id, "failed", error=str(exc))
+                raise
+            except Exception as exc:
+                db.rollback()
+                requeue = retry and attempts < self.max_attempts
+                if requeue:
+                    GRADING_JOBS_REQUEUED.inc(reason="error")
+                self._finish(
+                    db, job_id, "queued" if requeue else "failed",
+                    error=f"Attempt {attempts}: {type(exc).__name__}: {exc}",
+                )
+                raise
+            self._finish(db, job_id, "succeeded", assessment_id=result.id, error=None)
+            return result
+
+    def run_inline(
+        self, db: Session, submission_id: uuid.UUID, client: OllamaClient
+    ) -> Tuple[GradingJob, AssessmentResult]:
+        """
+        Grade now, in the calling thread, under a job row.
+
+        Used when a teacher waits for the grade: the job records the attempt,
+        and if the process dies mid-grade the expired lease gets it requeued.
+        A failure is reported to the caller rather than retried. The caller
+        has already checked for an existing result.
+        """
+        now = _now()
+        job = GradingJob(
+            submission_id=submission_id, status="running", attempts=1, started_at=now,
+            **self._lease_values(now),
+        )
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            active = self.active_job(db, submission_id)
+            raise AlreadyQueuedError(active.id if active is not None else None) from e
+        with self._lock:
+            self._active.add(job.id)
+        return job, self.execute(db, job, client, retry=False, check_existing=False)
+
+    def process_next(self) -> Optional[GradingJob]:
+        """Claim and run one queued job; returns it, or None when the queue is empty."""
+        client = self.client_factory()
+        if not client.check_health():
+            # Leave the queue alone until Ollama is back rather than burning attempts
+            return None
+        db = self.session_factory()
+        try:
+            job = self.claim(db)
+            if job is None:
+                return None
+            try:
+                self.execute(db, job, client)
+            except Exception:
+                logger.exception("Grading job %s failed", job.id)
+            return db.get(GradingJob, job.id, populate_existing=True)
+        finally:
+            db.close()
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            job = None
+            try:
+                job = self.process_next()
+            except Exception:
+                logger.exception("Grading worker error")
+            if job is None:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def _beat(self) -> None:
+        while not self._stopping.wait(self.heartbeat_seconds):
+            try:
+                self.heartbeat()
+                if self.workers:
+                    # Pick up work abandoned by other processes, too
+                    self.recover()
+            except Exception:
+                logger.exception("Grading heartbeat failed")
+
+    # Lifecycle
+
+    def _start_threads(self) -> None:
+        self._stopping.clear()
+        self._threads = [threading.Thread(target=self._beat, name="grading-heartbeat", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._work, name=f"grading-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def checkpoint(self) -> int:
+        """Hand this process's running jobs back to the queue without counting the attempt."""
+        with self._lock:
+            active = list(self._active)
+            self._active.clear()
+        if not active:
+            return 0
+        db = self.session_factory()
+        try:
+            requeued = db.execute(
+                update(GradingJob)
+                .where(
+                    GradingJob.id.in_(active),
+                    GradingJob.status == "running",
+                    GradingJob.lease_owner == self.owner,
+                )
+                .values(
+                    status="queued",
+                    attempts=GradingJob.attempts - 1,
+                    error="Interrupted by shutdown; requeued",
+                    lease_owner=None,
+                    lease_expires_at=None,
+                )
+            ).rowcount
+            db.commit()
+        finally:
+            db.close()
+        self.checkpointed += requeued
+        GRADING_JOBS_REQUEUED.inc(requeued, reason="shutdown")
+        logger.warning("Requeued %d grading job(s) still running at shutdown", requeued)
+        return requeued
+
+    def _drain(self, grace_seconds: float) -> None:
+        self._stopping.set()
+        self._wake.set()
+        deadline = time.monotonic() + grace_seconds
+        for thread in self._threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        # Grades run inline by requests get the same grace period
+        while self._active and time.monotonic() < deadline:
+            time.sleep(0.1)
+        self._threads = []
+        self.checkpoint()
+
+    async def start(self) -> None:
+        if self._threads:
+            return
+        await to_thread.run_sync(self.recover)
+        self._start_threads()
+
+    async def stop(self, grace_seconds: Optional[float] = None) -> None:
+        """Stop claiming jobs, let running ones finish within the grace period, requeue the rest."""
+        grace = self.shutdown_grace_seconds if grace_seconds is None else grace_seconds
+        await to_thread.run_sync(self._drain, grace)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            active = len(self._active)
+        return {
+            "owner": self.owner,
+            "workers": self.workers,
+            "running": bool(self._threads),
+            "active": active,
+            "recovered": self.recovered,
+            "checkpointed": self.checkpointed,
+            "lease_seconds": self.lease_seconds,
+            "max_attempts": self.max_attempts,
+        }
+
+
+grading_jobs = GradingJobManager()
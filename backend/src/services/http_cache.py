@@ -0,0 +1,145 @@
+"""Conditional GET support and an in-process cache of rendered responses.
+
+Read-heavy student endpoints are fetched by every device at the start of a
+lesson. Routes compute a validator (ETag / Last-Modified) from cheap row
+version aggregates; matching ``If-None-Match`` / ``If-Modified-Since``
+requests get a 304, and everyone else gets a body rendered once per
+validator. Cached bodies are keyed by their ETag, so a stale entry can never
+be served even when another worker made the change; services still call
+``response_cache.invalidate()`` on writes to release memory early.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag from the values that determine a response."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:24]}"'
+
+
+CachedBody = Tuple[bytes, Dict[str, str]]
+
+
+class ResponseCache:
+    """Per-namespace LRU of rendered JSON bodies (and their extra headers)."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._namespaces: Dict[str, "OrderedDict[Tuple[str, str], CachedBody]"] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, namespace: str, key: str, etag: str) -> Optional[CachedBody]:
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            cached = entries.get((key, etag)) if entries is not None else None
+            if cached is None:
+                self.misses += 1
+                return None
+            entries.move_to_end((key, etag))
+            self.hits += 1
+            return cached
+
+    def put(self, namespace: str, key: str, etag: str, cached: CachedBody) -> None:
+        with self._lock:
+            entries = self._namespaces.setdefault(namespace, OrderedDict())
+            entries[(key, etag)] = cached
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def invalidate(self, namespace: str) -> None:
+        with self._lock:
+            self._namespaces.pop(namespace, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = {ns: len(e) for ns, e in self._namespaces.items()}
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+response_cache = ResponseCache()
+
+
+class ConditionalGet:
+    """
+    Dependency that answers a GET from a validator.
+
+    Usage in a route::
+
+        def route(conditional: ConditionalGet = Depends()):
+            return conditional.respond("projects", etag, last_modified,
+                                       build=lambda: (rows, {}), adapter=...)
+    """
+
+    def __init__(self, request: Request):
+        self.request = request
+
+    def is_not_modified(self, etag: str, last_modified: Optional[datetime]) -> bool:
+        if_none_match = self.request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+            tags = [t.strip() for t in if_none_match.split(",")]
+            return "*" in tags or etag in tags or etag.removeprefix("W/") in tags
+        if_modified_since = self.request.headers.get("if-modified-since")
+        if if_modified_since and last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return _as_utc(last_modified).replace(microsecond=0) <= since
+        return False
+
+    def respond(
+        self,
+        namespace: str,
+        etag: str,
+        last_modified: Optional[datetime],
+        build: Callable[[], Tuple[Any, Dict[str, str]]],
+        adapter: TypeAdapter,
+        vary: str = "",
+    ) -> Response:
+        """
+        304 if the client is current, else the cached or freshly rendered body.
+
+        ``build`` returns the payload and any extra response headers (such as
+        a pagination cursor). ``vary`` distinguishes cache entries whose URL is
+        the same but whose content depends on the caller, e.g. class group.
+        """
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if last_modified is not None:
+            headers["Last-Modified"] = formatdate(_as_utc(last_modified).timestamp(), usegmt=True)
+        if self.is_not_modified(etag, last_modified):
+            return Response(status_code=304, headers=headers)
+
+        key = f"{self.request.url}|{vary}"
+        cached = response_cache.get(namespace, key, etag)
+        if cached is None:
+            payload, extra_headers = build()
+            # ORM rows go through the response schema, like response_model would
+            payload = adapter.validate_python(payload, from_attributes=True)
+            cached = (adapter.dump_json(payload), extra_headers)
+            response_cache.put(namespace, key, etag, cached)
+        body, extra_headers = cached
+        return Response(
+            content=body, media_type="application/json", headers={**headers, **extra_headers}
+        )
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Stored timestamps are naive UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
@@ -0,0 +1,186 @@
+"""Short-lived cache of verified tokens and the identities they belong to.
+
+Every authenticated request (including each autosave) used to decode its JWT
+and load the Student/Teacher row. Both results are cached here for a few
+seconds so most requests skip the decode and the database round trip.
+Entries are keyed by token (claims) and by ``(role, subject)`` (identities);
+roster imports invalidate every student identity. With several workers, the
+invalidations are relayed to the others over the broadcast backend (see
+``set_relay``), so no worker keeps a revoked identity for the rest of the TTL.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from src.models.base import Student, Teacher
+
+IDENTITY_CACHE_TTL_SECONDS = float(os.getenv("IDENTITY_CACHE_TTL_SECONDS", "30"))
+IDENTITY_CACHE_MAX_ENTRIES = int(os.getenv("IDENTITY_CACHE_MAX_ENTRIES", "5000"))
+
+
+@dataclass(frozen=True)
+class StudentIdentity:
+    """Read-only snapshot of the Student columns routes need (no password hash)."""
+
+    id: uuid.UUID
+    name: str
+    year_level: int
+    id_code: str
+    class_group: str
+    avatar_id: str
+    created_at: datetime
+
+    @classmethod
+    def from_model(cls, student: Student) -> "StudentIdentity":
+        return cls(
+            id=student.id,
+            name=student.name,
+            year_level=student.year_level,
+            id_code=student.id_code,
+            class_group=student.class_group,
+            avatar_id=student.avatar_id,
+            created_at=student.created_at,
+        )
+
+
+@dataclass(frozen=True)
+class TeacherIdentity:
+    """Read-only snapshot of the Teacher columns routes need (no password hash)."""
+
+    id: uuid.UUID
+    username: str
+    full_name: str
+    created_at: datetime
+
+    @classmethod
+    def from_model(cls, teacher: Teacher) -> "TeacherIdentity":
+        return cls(
+            id=teacher.id,
+            username=teacher.username,
+            full_name=teacher.full_name,
+            created_at=teacher.created_at,
+        )
+
+
+Identity = Union[StudentIdentity, TeacherIdentity]
+
+
+class IdentityCache:
+    """Thread-safe TTL/LRU cache for decoded claims and identity snapshots."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = IDENTITY_CACHE_TTL_SECONDS,
+        max_entries: int = IDENTITY_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._claims: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._identities: "OrderedDict[Tuple[str, str], Tuple[float, Identity]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._relay: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._counters = {
+            "claims_hits": 0,
+            "claims_misses": 0,
+            "identity_hits": 0,
+            "identity_misses": 0,
+            "invalidations": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get_claims(self, token: str) -> Optional[Dict[str, Any]]:
+        return self._get(self._claims, token, "claims")
+
+    def put_claims(self, token: str, claims: Dict[str, Any]) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            # Never serve claims past the token's own expiry
+            expires_at = min(expires_at, time.monotonic() + (exp - time.time()))
+        self._put(self._claims, token, claims, expires_at)
+
+    def get_identity(self, role: str, subject: str) -> Optional[Identity]:
+        return self._get(self._identities, (role, subject), "identity")
+
+    def put_identity(self, role: str, subject: str, identity: Identity) -> None:
+        self._put(
+            self._identities,
+            (role, subject),
+            identity,
+            time.monotonic() + self.ttl_seconds,
+        )
+
+    def set_relay(self, relay: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        """Forward every invalidation to ``relay`` (other workers call ``apply_invalidation``)."""
+        self._relay = relay
+
+    def invalidate_role(self, role: str) -> None:
+        """Drop every cached identity for a role, e.g. after a roster import."""
+        self._invalidate({"role": role})
+
+    def apply_invalidation(self, message: Dict[str, Any]) -> None:
+        """Apply an invalidation relayed from another worker."""
+        role = message.get("role")
+        with self._lock:
+            for key in [k for k in self._identities if k[0] == role]:
+                del self._identities[key]
+            self._counters["invalidations"] += 1
+
+    def _invalidate(self, message: Dict[str, Any]) -> None:
+        self.apply_invalidation(message)
+        relay = self._relay
+        if relay is not None:
+            relay(message)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._claims.clear()
+            self._identities.clear()
+            self._counters["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counters)
+            stats["claims_entries"] = len(self._claims)
+            stats["identity_entries"] = len(self._identities)
+        lookups = stats["identity_hits"] + stats["identity_misses"]
+        stats["identity_hit_ratio"] = (
+            round(stats["identity_hits"] / lookups, 4) if lookups else 0.0
+        )
+        stats["ttl_seconds"] = self.ttl_seconds
+        return stats
+
+    def _get(self, store: OrderedDict, key, kind: str):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = store.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del store[key]
+                self._counters[f"{kind}_misses"] += 1
+                return None
+            store.move_to_end(key)
+            self._counters[f"{kind}_hits"] += 1
+            return entry[1]
+
+    def _put(self, store: OrderedDict, key, value, expires_at: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            store[key] = (expires_at, value)
+            store.move_to_end(key)
+            while len(store) > self.max_entries:
+                store.popitem(last=False)
+
+
+identity_cache = IdentityCache()
@@ -0,0 +1,27 @@
+"""Fast JSON encoding for payloads that do not go through a response_model.
+
+Routes with a ``response_model`` are already serialised straight to bytes by
+pydantic-core. Everything else (WebSocket broadcasts, cross-worker relays)
+uses :func:`dumps`, which is backed by orjson when it is installed.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,269 @@
+"""A/B marking: re-mark stored submissions with several model/prompt configurations.
+
+Each configuration marks the same submissions through ``NAPLANMarkingService``,
+several at a time, and every mark is stored as a ``MarkingTrial`` under one
+run ID. Production ``AssessmentResult`` rows are never written. The report
+compares each configuration with a reference (another configuration, or the
+production marks) per criterion, next to its latency and tokens/second.
+
+Configurations run one after another, because Ollama swaps models in and out
+of memory; concurrency applies to submissions within a configuration.
+"""
+
+import json
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, sessionmaker
+
+from src.database import SessionLocal
+from src.models.base import AssessmentResult, MarkingTrial, Submission
+from src.services.naplan_marking_service import NAPLANMarkingService
+from src.services.ollama_client import OllamaClient
+from src.services.tracing import span
+
+PRODUCTION_REFERENCE = "production"
+
+
+@dataclass(frozen=True)
+class MarkingConfig:
+    """One arm of a comparison: a model plus optional prompt and sampling overrides."""
+
+    name: str
+    model: str
+    system_prompt: Optional[str] = None
+    options: Optional[Dict[str, Any]] = None
+    base_url: Optional[str] = None
+
+    def client(self) -> OllamaClient:
+        return OllamaClient(base_url=self.base_url, model=self.model, options=self.options)
+
+    @classmethod
+    def parse(cls, spec: str) -> "MarkingConfig":
+        """``name=model`` or just ``model`` (named after the model)."""
+        name, sep, model = spec.partition("=")
+        if not sep:
+            name, model = spec, spec
+        if not name.strip() or not model.strip():
+            raise ValueError(f"Invalid configuration {spec!r}; expected name=model")
+        return cls(name=name.strip(), model=model.strip())
+
+    @classmethod
+    def load_file(cls, path: str) -> List["MarkingConfig"]:
+        """A JSON list of objects with ``name``, ``model`` and optional overrides."""
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+        return [cls(**entry) for entry in entries]
+
+
+def _percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))], 3)
+
+
+def _agreement(pairs: List[tuple]) -> Dict[str, Any]:
+    """Exact and within-one agreement and mean absolute difference of (trial, reference) scores."""
+    if not pairs:
+        return {"compared": 0, "exact": None, "within_1": None, "mean_abs_diff": None}
+    diffs = [abs(a - b) for a, b in pairs]
+    return {
+        "compared": len(pairs),
+        "exact": round(sum(d == 0 for d in diffs) / len(diffs), 4),
+        "within_1": round(sum(d <= 1 for d in diffs) / len(diffs), 4),
+        "mean_abs_diff": round(statistics.fmean(diffs), 3),
+    }
+
+
+def _criterion_scores(criteria: Optional[dict]) -> Dict[str, int]:
+    return {
+        name: value["score"]
+        for name, value in (criteria or {}).items()
+        if isinstance(value, dict) and isinstance(value.get("score"), int)
+    }
+
+
+class MarkingComparison:
+    @staticmethod
+    def load_submissions(
+        db: Session,
+        project_id: Optional[uuid.UUID] = None,
+        submission_ids: Optional[Sequence[uuid.UUID]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Submission]:
+        """Submitted work (with projects loaded) to re-mark, detached from ``db``."""
+        stmt = (
+            select(Submission)
+            .options(joinedload(Submission.project))
+            .where(Submission.status == "SUBMITTED")
+            .order_by(Submission.submitted_at, Submission.id)
+        )
+        if project_id is not None:
+            stmt = stmt.where(Submission.project_id == project_id)
+        if submission_ids:
+            stmt = stmt.where(Submission.id.in_(submission_ids))
+        if limit:
+            stmt = stmt.limit(limit)
+        submissions = list(db.execute(stmt).scalars())
+        db.expunge_all()
+        return submissions
+
+    @staticmethod
+    def _trial(run_id: str, config: MarkingConfig, client: OllamaClient, submission: Submission) -> MarkingTrial:
+        # assess() never touches the session; trials are saved by the caller
+        service = NAPLANMarkingService(None, client, system_prompt=config.system_prompt)
+        started = time.perf_counter()
+        result, error = None, None
+        with span("comparison.trial", config=config.name, submission_id=str(submission.id)):
+            try:
+                result = service.assess(submission)
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+        trial = MarkingTrial(
+            run_id=run_id,
+            config_name=config.name,
+            submission_id=submission.id,
+            genre=(submission.project.genre or "NARRATIVE").upper(),
+            duration_ms=round((time.perf_counter() - started) * 1000, 3),
+            error=error,
+            model_name=client.model,
+            model_digest=client.model_digest,
+            created_at=datetime.now(timezone.utc),
+        )
+        if result is not None:
+            for column in (
+                "total_score", "max_score", "criteria_scores", "model_name", "model_digest",
+                "prompt_hash", "prompt_eval_count", "eval_count", "prompt_eval_ms", "eval_ms",
+                "attempts",
+            ):
+                setattr(trial, column, getattr(result, column))
+        return trial
+
+    @staticmethod
+    def run(
+        configs: Sequence[MarkingConfig],
+        submissions: Sequence[Submission],
+        concurrency: int = 2,
+        run_id: Optional[str] = None,
+        session_factory: sessionmaker = SessionLocal,
+        on_trial=None,
+    ) -> str:
+        """Mark ``submissions`` with every configuration and store the trials; returns the run ID."""
+        if len({config.name for config in configs}) != len(configs):
+            raise ValueError("Configuration names must be unique")
+        if PRODUCTION_REFERENCE in {config.name for config in configs}:
+            raise ValueError(f"{PRODUCTION_REFERENCE!r} is reserved for the stored marks")
+        clients = {config.name: config.client() for config in configs}
+        # Fail before marking anything, and pick up each model's digest
+        missing = [config.model for config in configs if not clients[config.name].check_health()]
+        if missing:
+            raise ValueError(f"Ollama is not serving: {', '.join(missing)}")
+
+        run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        db = session_factory()
+        try:
+            for config in configs:
+                with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+                    futures = [
+                        pool.submit(MarkingComparison._trial, run_id, config, clients[config.name], submission)
+                        for submission in submissions
+                    ]
+                    # Saved as they finish, so an interrupted run keeps what it marked
+                    for future in as_completed(futures):
+                        trial = future.result()
+                        db.add(trial)
+                        db.commit()
+                        if on_trial is not None:
+                            on_trial(trial)
+        finally:
+            db.close()
+        return run_id
+
+    @staticmethod
+    def report(db: Session, run_id: str, reference: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Per-configuration latency, tokens/second and agreement with ``reference``.
+
+        ``reference`` is a configuration name or ``"production"`` (the latest
+        stored AssessmentResult per submission); it defaults to the first
+        configuration that ran.
+        """
+        trials = list(
+            db.execute(
+                select(MarkingTrial)
+                .where(MarkingTrial.run_id == run_id)
+                .order_by(MarkingTrial.created_at)
+            ).scalars()
+        )
+        if not trials:
+            raise ValueError(f"No trials for run {run_id!r}")
+        by_config: Dict[str, List[MarkingTrial]] = {}
+        for trial in trials:
+            by_config.setdefault(trial.config_name, []).append(trial)
+        reference = reference or trials[0].config_name
+
+        if reference == PRODUCTION_REFERENCE:
+            reference_marks: Dict[uuid.UUID, tuple] = {}
+            rows = db.execute(
+                select(AssessmentResult.submission_id, AssessmentResult.total_score, AssessmentResult.criteria_scores)
+                .where(AssessmentResult.submission_id.in_({t.submission_id for t in trials}))
+                .order_by(AssessmentResult.generated_at)
+            )
+            for submission_id, total, criteria in rows:
+                reference_marks[submission_id] = (total, _criterion_scores(criteria))
+        elif reference in by_config:
+            reference_marks = {
+                t.submission_id: (t.total_score, _criterion_scores(t.criteria_scores))
+                for t in by_config[reference]
+                if t.error is None
+            }
+        else:
+            raise ValueError(f"Unknown reference {reference!r}")
+
+        configs = []
+        for name, config_trials in by_config.items():
+            ok = [t for t in config_trials if t.error is None]
+            durations = [t.duration_ms for t in ok]
+            eval_tokens = sum(t.eval_count or 0 for t in ok)
+            eval_ms = sum(t.eval_ms or 0 for t in ok)
+            # Wall clock from the first trial starting to the last finishing
+            first_start = min(
+                t.created_at.timestamp() - t.duration_ms / 1000 for t in config_trials
+            )
+            elapsed_s = max(t.created_at.timestamp() for t in config_trials) - first_start
+
+            totals: List[tuple] = []
+            criteria: Dict[str, List[tuple]] = {}
+            for trial in ok:
+                marks = reference_marks.get(trial.submission_id)
+                if marks is None:
+                    continue
+                if trial.total_score is not None and marks[0] is not None:
+                    totals.append((trial.total_score, marks[0]))
+                for criterion, score in _criterion_scores(trial.criteria_scores).items():
+                    if criterion in marks[1]:
+                        criteria.setdefault(criterion, []).append((score, marks[1][criterion]))
+
+            configs.append({
+                "config": name,
+                "model": ok[0].model_name if ok else config_trials[0].model_name,
+                "model_digest": ok[0].model_digest if ok else config_trials[0].model_digest,
+                "trials": len(config_trials),
+                "errors": len(config_trials) - len(ok),
+                "latency_ms": {"p50": _percentile(durations, 50), "p95": _percentile(durations, 95)},
+                "throughput_per_min": round(len(ok) / elapsed_s * 60, 2) if elapsed_s > 0 else None,
+                "tokens_per_s": round(eval_tokens / eval_ms * 1000, 1) if eval_ms else None,
+                "mean_attempts": round(statistics.fmean(t.attempts or 1 for t in ok), 2) if ok else None,
+                "agreement": {
+                    "total": _agreement(totals),
+                    "criteria": {c: _agreement(pairs) for c, pairs in sorted(criteria.items())},
+                },
+            })
+        return {"run_id": run_id, "reference": reference, "configs": configs}
@@ -0,0 +1,317 @@
+"""In-process metrics registry rendered in the Prometheus text exposition format.
+
+Counters, gauges and histograms are plain Python objects guarded by a lock,
+so recording costs a dict lookup and an addition. Everything the backend
+measures is declared at the bottom of this module; ``GET /api/metrics``
+renders the registry, plus values collected at scrape time (query totals,
+WAL size, WebSocket connections).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from src.services.query_stats import route_template
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; spans a fast autosave through a slow model call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, +Inf count, sum)
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += 1
+            entry[2] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[1] if entry else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = {key: (list(e[0]), e[1], e[2]) for key, e in self._values.items()}
+        lines = []
+        for key, (buckets, count, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, buckets, strict=True):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsMiddleware:
+    """Counts and times every HTTP request by route template.
+
+    Unmatched paths (static files, 404s) are grouped as ``(unmatched)`` so
+    arbitrary URLs cannot grow the label set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = route_template(scope) or "(unmatched)"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(route=route, method=method, status=str(status["code"]))
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=method)
+
+
+def instrument_sessions(factory: sessionmaker, role: str) -> None:
+    """Time each commit of sessions made by ``factory``, from the final flush to COMMIT."""
+
+    @event.listens_for(factory, "before_commit")
+    def _start_commit(session):
+        session.info["commit_started"] = time.perf_counter()
+
+    @event.listens_for(factory, "after_commit")
+    def _stop_commit(session):
+        started = session.info.pop("commit_started", None)
+        if started is not None:
+            DB_COMMIT_SECONDS.observe(time.perf_counter() - started, role=role)
+
+
+# A collector returns (name, type, help, [(labels, value), ...]) families
+Collected = Tuple[str, str, str, Iterable[Tuple[Dict[str, str], float]]]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Collected]]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def collector(self, collect: Callable[[], Iterable[Collected]]) -> None:
+        """Register a callable whose values are read at scrape time."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        for collect in self._collectors:
+            for name, kind, documentation, samples in collect():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(
+                        f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter(
+    "abigail_http_requests_total", "HTTP requests by route template, method and status.",
+    ("route", "method", "status"),
+)
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "abigail_http_request_duration_seconds", "HTTP request latency by route template.",
+    ("route", "method"),
+)
+AUTOSAVES = metrics.counter(
+    "abigail_autosaves_total", "Draft autosaves by outcome (saved, locked).", ("outcome",)
+)
+AUTOSAVE_SECONDS = metrics.histogram(
+    "abigail_autosave_duration_seconds", "Time to persist and broadcast a draft autosave."
+)
+GRADING_REQUESTS = metrics.counter(
+    "abigail_grading_total", "AI grading attempts by outcome (graded, rejected, failed).", ("outcome",)
+)
+GRADING_IN_PROGRESS = metrics.gauge(
+    "abigail_grading_in_progress", "Submissions currently being graded."
+)
+GRADING_SECONDS = metrics.histogram(
+    "abigail_grading_duration_seconds", "End-to-end time to grade one submission."
+)
+OLLAMA_REQUESTS = metrics.counter(
+    "abigail_ollama_requests_total", "Ollama generate calls by model and outcome.", ("model", "outcome")
+)
+OLLAMA_SECONDS = metrics.histogram(
+    "abigail_ollama_request_duration_seconds", "Ollama generate latency by model.", ("model",)
+)
+BROADCASTS = metrics.counter(
+    "abigail_broadcasts_total", "Dashboard messages published."
+)
+BROADCAST_SECONDS = metrics.histogram(
+    "abigail_broadcast_duration_seconds", "Time to publish one dashboard message.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+WEBSOCKET_CONNECTIONS = metrics.gauge(
+    "abigail_websocket_connections", "Open dashboard WebSocket connections on this worker."
+)
+GRADING_JOBS_REQUEUED = metrics.counter(
+    "abigail_grading_jobs_requeued_total",
+    "Grading jobs put back on the queue, by reason (lease_expired, shutdown, error).",
+    ("reason",),
+)
+DB_COMMIT_SECONDS = metrics.histogram(
+    "abigail_db_commit_duration_seconds",
+    "Session commit latency (final flush plus COMMIT) by engine role.",
+    ("role",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+)
+ROSTER_IMPORTS = metrics.counter(
+    "abigail_roster_imports_total", "Roster CSV imports by outcome.", ("outcome",)
+)
+ROSTER_IMPORT_SECONDS = metrics.histogram(
+    "abigail_roster_import_duration_seconds", "Time to import one roster CSV."
+)
+ROSTER_ROWS = metrics.counter(
+    "abigail_roster_rows_total", "Roster rows processed by result (created, updated, errors).",
+    ("result",),
+)
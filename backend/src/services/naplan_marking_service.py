@@ -1,15 +1,22 @@
 """NAPLAN marking service: orchestrates Ollama + rubric to produce assessment results."""
 
+import hashlib
 import json
+import logging
+import os
 import re
 from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
 
-from src.models.base import AssessmentResult, Project, Submission
+from src.models.base import AssessmentResult, Submission
+from src.services.metrics import GRADING_IN_PROGRESS, GRADING_REQUESTS, GRADING_SECONDS
 from src.services.naplan_rubric_loader import load_narrative_rubric, load_persuasive_rubric
-from src.services.ollama_client import OllamaClient
+from src.services.ollama_client import OllamaClient, durations_ms
+from src.services.tracing import span
 
 
 SYSTEM_NARRATIVE = """You are an expert NAPLAN narrative writing assessor. Assess fairly and consistently using the rubric. Return only valid JSON with no extra commentary."""
@@ -19,6 +26,11 @@ SYSTEM_PERSUASIVE = """You are an expert NAPLAN persuasive writing assessor. Ass
 NARRATIVE_MAX = 47
 PERSUASIVE_MAX = 48
 
+# Model calls per grade; above 1, a reply that is not valid JSON is retried
+GRADING_MAX_ATTEMPTS = max(1, int(os.getenv("GRADING_MAX_ATTEMPTS", "1")))
+
+logger = logging.getLogger(__name__)
+
 
 def _extract_json(text: str) -> dict:
     """Extract JSON from LLM response, handling markdown code blocks."""
@@ -134,6 +146,16 @@ Return exactly this structure (no other text):
 """
 
 
+def _prompt_hash(system: str, build_prompt: Callable[[str, dict], str], rubric: dict) -> str:
+    """Fingerprint of the system prompt, prompt template and rubric, without the student text.
+
+    Results sharing a hash were produced by the same instructions, so a
+    change of template or rubric shows up as a new hash in historical data.
+    """
+    template = build_prompt("{student_text}", rubric)
+    return hashlib.sha256(f"{system}\n{template}".encode("utf-8")).hexdigest()[:16]
+
+
 def _normalise_criteria(parsed: dict, genre: str) -> dict:
     """Ensure each criterion has score, max_score, feedback, evidence, recommendations."""
     criteria = parsed.get("criteria") or {}
@@ -187,29 +209,97 @@ def _build_full_report_md(parsed: dict, genre: str, max_score: int) -> str:
 class NAPLANMarkingService:
     """Orchestrates loading rubric, calling Ollama, parsing response, and saving result."""
 
-    def __init__(self, db: Session, ollama_client: OllamaClient):
+    def __init__(self, db: Session, ollama_client: OllamaClient, system_prompt: Optional[str] = None):
         self.db = db
         self.ollama = ollama_client
+        # Replaces the genre's system prompt, e.g. to trial a prompt variant
+        self.system_prompt = system_prompt
 
     def grade_submission(self, submission_id: UUID) -> AssessmentResult:
-        submission = self.db.query(Submission).filter(Submission.id == submission_id).first()
+        with GRADING_IN_PROGRESS.track_inprogress(), GRADING_SECONDS.time(), \
+                span("grading.grade_submission", submission_id=str(submission_id)):
+            try:
+                result = self._grade(submission_id)
+            except ValueError:
+                GRADING_REQUESTS.inc(outcome="rejected")
+                raise
+            except Exception:
+                GRADING_REQUESTS.inc(outcome="failed")
+                raise
+        GRADING_REQUESTS.inc(outcome="graded")
+        return result
+
+    def _grade(self, submission_id: UUID) -> AssessmentResult:
+        # Submission and its project in one round trip
+        with span("grading.load_submission"):
+            submission = self.db.execute(
+                select(Submission)
+                .options(joinedload(Submission.project))
+                .where(Submission.id == submission_id)
+            ).scalar_one_or_none()
         if not submission:
             raise ValueError("Submission not found")
         if submission.status != "SUBMITTED":
             raise ValueError("Submission must be SUBMITTED to grade")
-        project = self.db.query(Project).filter(Project.id == submission.project_id).first()
-        if not project:
+        if not submission.project:
             raise ValueError("Project not found")
-        genre = (project.genre or "NARRATIVE").upper()
+        # End the read so the writer connection is free during the model call
+        self.db.commit()
+        result = self.assess(submission)
+        with span("grading.save_result"):
+            self.db.add(result)
+            self.db.flush()
+            self.db.refresh(result)
+            self.db.commit()
+        return result
+
+    def assess(self, submission: Submission) -> AssessmentResult:
+        """Mark a submission (with its project loaded) and return the result unsaved."""
+        genre = (submission.project.genre or "NARRATIVE").upper()
         if genre == "NARRATIVE":
             return self._grade_narrative(submission)
         return self._grade_persuasive(submission)
 
+    def _generate_json(self, prompt: str, system: str) -> Tuple[dict, Dict[str, Any]]:
+        """
+        Ask the model for the assessment JSON, retrying replies that do not parse.
+
+        Returns the parsed reply and the run metadata stored on the result;
+        token counts and times are summed over every attempt.
+        """
+        run: Dict[str, Any] = {
+            "model_name": self.ollama.model,
+            "model_digest": self.ollama.model_digest,
+            "prompt_eval_count": None,
+            "eval_count": None,
+            "prompt_eval_ms": None,
+            "eval_ms": None,
+            "attempts": 0,
+        }
+        for attempt in range(1, GRADING_MAX_ATTEMPTS + 1):
+            data = self.ollama.generate_detailed(prompt=prompt, system=system)
+            run["attempts"] = attempt
+            run["model_name"] = data.get("model") or run["model_name"]
+            reported = {**data, **durations_ms(data)}
+            for key in ("prompt_eval_count", "eval_count", "prompt_eval_ms", "eval_ms"):
+                if reported.get(key) is not None:
+                    run[key] = (run[key] or 0) + reported[key]
+            response = data.get("response", "")
+            with span("grading.parse_response", attempt=attempt, response_chars=len(response)):
+                try:
+                    return _extract_json(response), run
+                except ValueError:
+                    if attempt == GRADING_MAX_ATTEMPTS:
+                        raise
+                    logger.warning("Model reply was not valid JSON (attempt %d); retrying", attempt)
+
     def _grade_narrative(self, submission: Submission) -> AssessmentResult:
-        rubric = load_narrative_rubric()
-        prompt = _build_narrative_prompt(submission.content_raw or "", rubric)
-        response = self.ollama.generate(prompt=prompt, system=SYSTEM_NARRATIVE)
-        parsed = _extract_json(response)
+        with span("grading.load_rubric", genre="NARRATIVE"):
+            rubric = load_narrative_rubric()
+        with span("grading.build_prompt"):
+            prompt = _build_narrative_prompt(submission.content_raw or "", rubric)
+        system = self.system_prompt or SYSTEM_NARRATIVE
+        parsed, run = self._generate_json(prompt, system)
         criteria = _normalise_criteria(parsed, "NARRATIVE")
         total = min(NARRATIVE_MAX, max(0, int(parsed.get("total_score", 0))))
         strengths = list(parsed.get("overall_strengths") or [])[:10]
@@ -227,17 +317,18 @@ class NAPLANMarkingService:
             overall_weaknesses=weaknesses,
             criteria_scores=criteria,
             full_report_md=full_md,
+            prompt_hash=_prompt_hash(system, _build_narrative_prompt, rubric),
+            **run,
         )
-        self.db.add(result)
-        self.db.commit()
-        self.db.refresh(result)
         return result
 
     def _grade_persuasive(self, submission: Submission) -> AssessmentResult:
-        rubric = load_persuasive_rubric()
-        prompt = _build_persuasive_prompt(submission.content_raw or "", rubric)
-        response = self.ollama.generate(prompt=prompt, system=SYSTEM_PERSUASIVE)
-        parsed = _extract_json(response)
+        with span("grading.load_rubric", genre="PERSUASIVE"):
+            rubric = load_persuasive_rubric()
+        with span("grading.build_prompt"):
+            prompt = _build_persuasive_prompt(submission.content_raw or "", rubric)
+        system = self.system_prompt or SYSTEM_PERSUASIVE
+        parsed, run = self._generate_json(prompt, system)
         criteria = _normalise_criteria(parsed, "PERSUASIVE")
         total = min(PERSUASIVE_MAX, max(0, int(parsed.get("total_score", 0))))
         strengths = list(parsed.get("overall_strengths") or [])[:10]
@@ -255,8 +346,7 @@ class NAPLANMarkingService:
             overall_weaknesses=weaknesses,
             criteria_scores=criteria,
             full_report_md=full_md,
+            prompt_hash=_prompt_hash(system, _build_persuasive_prompt, rubric),
+            **run,
         )
-        self.db.add(result)
-        self.db.commit()
-        self.db.refresh(result)
         return result
@@ -2,7 +2,22 @@
 
 import os
 import requests
-from typing import Optional
+from typing import Any, Dict, Optional
+
+from src.services.metrics import OLLAMA_REQUESTS, OLLAMA_SECONDS
+from src.services.tracing import span
+
+# Ollama reports these durations in nanoseconds
+_TIMINGS = ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration")
+
+
+def durations_ms(data: Dict[str, Any]) -> Dict[str, float]:
+    """Ollama's reported timings in milliseconds, e.g. ``eval_duration`` -> ``eval_ms``."""
+    return {
+        f"{name.replace('_duration', '')}_ms": round(data[name] / 1e6, 3)
+        for name in _TIMINGS
+        if isinstance(data.get(name), (int, float))
+    }
 
 
 class OllamaClient:
@@ -13,13 +28,28 @@ class OllamaClient:
         base_url: Optional[str] = None,
         model: Optional[str] = None,
         timeout: int = 300,
+        options: Optional[Dict[str, Any]] = None,
     ):
         self.base_url = (base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")).rstrip("/")
         self.model = model or os.getenv("OLLAMA_MODEL", "mistral")
         self.timeout = timeout
+        # Sampling and runtime parameters, e.g. {"temperature": 0, "num_ctx": 8192}
+        self.options = options
+        # Set by check_health() from the model listing
+        self.model_digest: Optional[str] = None
 
     def generate(self, prompt: str, system: str = "", stream: bool = False) -> str:
         """Send a prompt to Ollama and return the full response text."""
+        return self.generate_detailed(prompt, system=system, stream=stream).get("response", "")
+
+    def generate_detailed(self, prompt: str, system: str = "", stream: bool = False) -> Dict[str, Any]:
+        """
+        Send a prompt to Ollama and return its whole response body.
+
+        Besides ``response`` this carries the token counts (``prompt_eval_count``,
+        ``eval_count``) and the server-side timings, which are also recorded
+        on the current trace span.
+        """
         payload = {
             "model": self.model,
             "prompt": prompt,
@@ -27,15 +57,29 @@ class OllamaClient:
         }
         if system:
             payload["system"] = system
+        if self.options:
+            payload["options"] = self.options
 
-        response = requests.post(
-            f"{self.base_url}/api/generate",
-            json=payload,
-            timeout=self.timeout,
-        )
-        response.raise_for_status()
-        data = response.json()
-        return data.get("response", "")
+        outcome = "error"
+        with span("ollama.generate", model=self.model, prompt_chars=len(prompt)) as call:
+            try:
+                with OLLAMA_SECONDS.time(model=self.model):
+                    response = requests.post(
+                        f"{self.base_url}/api/generate",
+                        json=payload,
+                        timeout=self.timeout,
+                    )
+                    response.raise_for_status()
+                    data = response.json()
+                outcome = "ok"
+            finally:
+                OLLAMA_REQUESTS.inc(model=self.model, outcome=outcome)
+            call.set(
+                prompt_eval_count=data.get("prompt_eval_count"),
+                eval_count=data.get("eval_count"),
+                **durations_ms(data),
+            )
+        return data
 
     def check_health(self) -> bool:
         """Check if Ollama is running and the model is available."""
@@ -44,8 +88,15 @@ class OllamaClient:
             if response.status_code != 200:
                 return False
             data = response.json()
-            models = [m.get("name", "") for m in data.get("models", [])]
+            models = {m.get("name", ""): m.get("digest") for m in data.get("models", [])}
             # Model may be listed as "mistral" or "mistral:latest"
-            return any(self.model in m for m in models)
+            matches = [name for name in models if self.model in name]
+            if not matches:
+                return False
+            exact = next(
+                (name for name in (self.model, f"{self.model}:latest") if name in models), matches[0]
+            )
+            self.model_digest = models[exact]
+            return True
         except Exception:
             return False
@@ -1,14 +1,18 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import select, update
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import func, select, update
 from uuid import UUID
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 from src.models.base import Project
+from src.models.types import JsonArrayContains
 from src.schemas.project import ProjectCreate
+from src.services.http_cache import response_cache
 
 class ProjectService:
     @staticmethod
     def list_projects(db: Session) -> List[Project]:
-        return db.query(Project).all()
+        # Columns only: project.submissions would cost a query per project
+        return db.query(Project).options(raiseload("*")).all()
 
     @staticmethod
     def create_project(db: Session, project_data: ProjectCreate) -> Project:
@@ -22,8 +26,10 @@ class ProjectService:
             is_active=project_data.is_active
         )
         db.add(project)
-        db.commit()
+        db.flush()
         db.refresh(project)
+        db.commit()
+        response_cache.invalidate("projects")
         return project
 
     @staticmethod
@@ -41,8 +47,10 @@ class ProjectService:
             project.asset_paths = project_data.asset_paths
             project.assigned_class_groups = project_data.assigned_class_groups
             project.is_active = project_data.is_active
-            db.commit()
+            db.flush()
             db.refresh(project)
+            db.commit()
+            response_cache.invalidate("projects")
         return project
 
     @staticmethod
@@ -50,14 +58,23 @@ class ProjectService:
         project = ProjectService.get_project(db, project_id)
         if project:
             project.is_active = not project.is_active
-            db.commit()
+            db.flush()
             db.refresh(project)
+            db.commit()
+            response_cache.invalidate("projects")
         return project
 
+    @staticmethod
+    def get_projects_version(db: Session) -> Tuple[int, Optional[datetime]]:
+        """Row count and newest updated_at: changes whenever any project changes."""
+        count, last_modified = db.execute(
+            select(func.count(Project.id), func.max(Project.updated_at))
+        ).one()
+        return count, last_modified
+
     @staticmethod
     def get_projects_by_class_group(db: Session, class_group: str) -> List[Project]:
-        # SQLite JSON contains check
-        return db.query(Project).filter(
+        return db.query(Project).options(raiseload("*")).filter(
             Project.is_active == True,
-            Project.assigned_class_groups.contains(class_group)
+            JsonArrayContains(Project.assigned_class_groups, class_group)
         ).all()
@@ -0,0 +1,297 @@
+"""Per-query timing for the database engines.
+
+Each engine is tagged with a role ("read" or "write"); every statement's
+execution time is recorded against that role so the effect of the
+reader/writer split (and any lock waits) can be observed.
+
+Statements are also aggregated by fingerprint (SQL with whitespace and
+IN-lists normalised) and by the FastAPI route that issued them, with a
+latency histogram and the rows returned or affected. Statements slower than
+``SLOW_QUERY_MS`` are logged together with their query plan.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.requests import HTTPConnection
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "250"))
+# Distinct (role, route, statement) entries kept; the rest are pooled as "(other)"
+QUERY_STATS_MAX_STATEMENTS = int(os.getenv("QUERY_STATS_MAX_STATEMENTS", "500"))
+SLOW_QUERY_LOG_SIZE = 50
+# Upper bounds (ms) of the latency histogram buckets; a final bucket catches the rest
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+# Route template of the request being served, set by tag_route()
+current_route: ContextVar[Optional[str]] = ContextVar("current_route", default=None)
+
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+|:\w+))+\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_WHITESPACE = re.compile(r"\s+")
+
+StatementKey = Tuple[str, Optional[str], str]
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """Normalise a statement so executions differing only in IN-list length or literals group together."""
+    text = _WHITESPACE.sub(" ", statement).strip()
+    text = _PLACEHOLDER_LIST.sub("(?)", text)
+    return _NUMBER.sub("?", text)
+
+
+def route_template(scope) -> Optional[str]:
+    """The matched route's path template (e.g. ``/api/student/projects/{project_id}``)."""
+    route = scope.get("route")
+    if route is None or not hasattr(route, "path_format"):
+        return None
+    # Routes of included routers carry their path without the router prefix;
+    # recover the prefix from the request path
+    path = scope["path"]
+    rendered = route.path_format.format(**scope.get("path_params", {}))
+    prefix = path[: len(path) - len(rendered)] if path.endswith(rendered) else ""
+    return prefix + route.path
+
+
+async def tag_route(connection: HTTPConnection) -> None:
+    """App-wide dependency: tag this request's queries with its route template.
+
+    Async so it runs in the request's own context, which the threadpool copies
+    into every sync dependency and route.
+    """
+    current_route.set(route_template(connection.scope))
+
+
+class _StatementStats:
+    __slots__ = ("count", "total_s", "max_s", "rows", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+
+
+class QueryStats:
+    """Thread-safe running totals of statement counts and durations per role."""
+
+    def __init__(
+        self,
+        slow_query_ms: float = SLOW_QUERY_MS,
+        max_statements: int = QUERY_STATS_MAX_STATEMENTS,
+    ):
+        self.slow_query_ms = slow_query_ms
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._roles: Dict[str, Dict[str, float]] = {}
+        self._statements: Dict[StatementKey, _StatementStats] = {}
+        self._slow: deque = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+
+    def record(
+        self,
+        role: str,
+        seconds: float,
+        statement: Optional[str] = None,
+        route: Optional[str] = None,
+        rows: Optional[int] = None,
+    ) -> Optional[StatementKey]:
+        """Record one execution; returns the key later rows can be added to."""
+        key = None
+        with self._lock:
+            totals = self._roles.setdefault(role, {"queries": 0, "total_s": 0.0, "max_s": 0.0})
+            totals["queries"] += 1
+            totals["total_s"] += seconds
+            totals["max_s"] = max(totals["max_s"], seconds)
+            if statement is not None:
+                key = (role, route, fingerprint(statement))
+                entry = self._statements.get(key)
+                if entry is None:
+                    if len(self._statements) >= self.max_statements:
+                        key = (role, None, "(other)")
+                    entry = self._statements.setdefault(key, _StatementStats())
+                entry.count += 1
+                entry.total_s += seconds
+                entry.max_s = max(entry.max_s, seconds)
+                if rows is not None:
+                    entry.rows += rows
+                ms = seconds * 1000
+                bucket = next(
+                    (i for i, bound in enumerate(HISTOGRAM_BUCKETS_MS) if ms <= bound),
+                    len(HISTOGRAM_BUCKETS_MS),
+                )
+                entry.buckets[bucket] += 1
+        return key
+
+    def add_rows(self, key: StatementKey, rows: int) -> None:
+        with self._lock:
+            entry = self._statements.get(key)
+            if entry is not None:
+                entry.rows += rows
+
+    def record_slow(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._slow.append(entry)
+        logger.warning(
+            "Slow query (%.1f ms, %s, route %s): %s\nPlan:\n%s",
+            entry["duration_ms"], entry["role"], entry["route"], entry["statement"],
+            "\n".join(entry["plan"] or ["(not available)"]),
+        )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._roles.clear()
+            self._statements.clear()
+            self._slow.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            roles = {role: dict(totals) for role, totals in self._roles.items()}
+        return {
+            role: {
+                "queries": int(totals["queries"]),
+                "total_ms": round(totals["total_s"] * 1000, 3),
+                "mean_ms": round(totals["total_s"] * 1000 / totals["queries"], 3),
+                "max_ms": round(totals["max_s"] * 1000, 3),
+            }
+            for role, totals in roles.items()
+        }
+
+    def statements(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """The ``limit`` statements with the most total time, slowest first."""
+        with self._lock:
+            entries = [
+                (key, entry.count, entry.total_s, entry.max_s, entry.rows, list(entry.buckets))
+                for key, entry in self._statements.items()
+            ]
+        entries.sort(key=lambda e: e[2], reverse=True)
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}ms"]
+        return [
+            {
+                "role": role,
+                "route": route,
+                "statement": statement,
+                "count": count,
+                "total_ms": round(total_s * 1000, 3),
+                "mean_ms": round(total_s * 1000 / count, 3),
+                "max_ms": round(max_s * 1000, 3),
+                "rows": rows,
+                "histogram": dict(zip(labels, buckets, strict=True)),
+            }
+            for (role, route, statement), count, total_s, max_s, rows, buckets in entries[:limit]
+        ]
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._slow)
+
+
+query_stats = QueryStats()
+
+
+class RowCountingCursor(sqlite3.Cursor):
+    """Counts fetched rows, since sqlite3 reports rowcount -1 for SELECTs.
+
+    The count is handed to ``on_close`` when SQLAlchemy closes the cursor
+    after the result is consumed.
+    """
+
+    rows_fetched = 0
+    on_close: Optional[Callable[[int], None]] = None
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            self.rows_fetched += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self.rows_fetched += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self.rows_fetched += len(rows)
+        return rows
+
+    def close(self):
+        report, self.on_close = self.on_close, None
+        if report is not None:
+            report(self.rows_fetched)
+        super().close()
+
+
+class RowCountingConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors count fetched rows (``connect_args={"factory": ...}``)."""
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or RowCountingCursor)
+
+
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+
+def _explain(cursor, statement: str, parameters, dialect: str) -> Optional[List[str]]:
+    """Query plan for a slow statement, run on the same DBAPI connection."""
+    if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return None
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute(prefix + statement, parameters)
+        rows = explain_cursor.fetchall()
+    except Exception as exc:
+        return [f"(EXPLAIN failed: {exc})"]
+    finally:
+        explain_cursor.close()
+    if dialect == "sqlite":
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+
+def instrument_engine(engine: Engine, role: str, stats: QueryStats = query_stats) -> None:
+    """Time every statement executed on ``engine`` and record it under ``role``."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_started"].pop()
+        route = current_route.get()
+        rowcount = cursor.rowcount
+        key = stats.record(
+            role, seconds, statement, route, rows=rowcount if rowcount >= 0 else None
+        )
+        if rowcount < 0 and isinstance(cursor, RowCountingCursor) and key is not None:
+            cursor.rows_fetched = 0
+            cursor.on_close = lambda rows: stats.add_rows(key, rows)
+
+        duration_ms = seconds * 1000
+        if duration_ms >= stats.slow_query_ms:
+            plan = None if executemany else _explain(
+                cursor, statement, parameters, conn.dialect.name
+            )
+            stats.record_slow({
+                "role": role,
+                "route": route,
+                "statement": statement,
+                "duration_ms": round(duration_ms, 3),
+                "at": time.time(),
+                "plan": plan,
+            })
@@ -1,12 +1,117 @@
 import csv
 import io
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from typing import List, Dict, Any
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import func, insert, select, tuple_, update
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import uuid
+from datetime import datetime, timezone
 
 from src.models.base import Student
-from src.services.auth import get_password_hash
+from src.services.auth import get_password_hash, verify_password
+from src.services.metrics import ROSTER_IMPORTS, ROSTER_IMPORT_SECONDS, ROSTER_ROWS
+from src.services.http_cache import response_cache
+from src.services.identity_cache import identity_cache
+from src.services.pagination import decode_cursor, encode_cursor
+from src.services.tracing import span
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+REQUIRED_COLUMNS = ["Name", "Year Level", "ID Code", "Class Group", "Password", "Avatar ID"]
+
+# Rows written per INSERT/UPDATE batch and per commit
+ROSTER_CHUNK_SIZE = int(os.getenv("ROSTER_CHUNK_SIZE", "500"))
+# Processes used for bcrypt during imports; 0 hashes on threads instead
+ROSTER_HASH_PROCESSES = int(os.getenv("ROSTER_HASH_PROCESSES", str(os.cpu_count() or 1)))
+# Small rosters are hashed inline: starting worker processes costs more than it saves
+ROSTER_POOL_THRESHOLD = 16
+
+
+def resolve_password_hash(password: str, existing_hash: Optional[str] = None) -> str:
+    """Return ``existing_hash`` if it already matches ``password``, else a new hash.
+
+    Module-level so it can be shipped to a process pool.
+    """
+    if existing_hash:
+        try:
+            if verify_password(password, existing_hash):
+                return existing_hash
+        except ValueError:
+            # Corrupt stored hash: fall through and replace it
+            pass
+    return get_password_hash(password)
+
+
+def _chunked(rows: Iterable[Dict[str, str]], size: int) -> Iterator[List[Dict[str, str]]]:
+    chunk: List[Dict[str, str]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _hash_executor() -> Executor:
+    if ROSTER_HASH_PROCESSES > 0:
+        try:
+            # Never fork the threaded server: a child would inherit locks (and
+            # the password semaphore) held by other threads at fork time
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            return ProcessPoolExecutor(
+                max_workers=ROSTER_HASH_PROCESSES,
+                mp_context=multiprocessing.get_context(method),
+            )
+        except (OSError, NotImplementedError, ValueError):
+            # Platforms/frozen builds without multiprocessing support
+            pass
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+
+
+class _HashPool:
+    """bcrypt work for one import.
+
+    Hashes inline until the import as a whole has queued ROSTER_POOL_THRESHOLD
+    passwords, then starts the executor for the rest. Rows are streamed, so the
+    running total stands in for the size of the whole batch.
+    """
+
+    def __init__(self) -> None:
+        self.executor: Optional[Executor] = None
+        self.jobs = 0
+
+    def resolve(self, passwords: List[str], current: List[Optional[str]]) -> List[Any]:
+        """``resolve_password_hash`` for each pair; exceptions are returned, not raised."""
+        self.jobs += len(passwords)
+        if self.executor is None and self.jobs >= ROSTER_POOL_THRESHOLD:
+            self.executor = _hash_executor()
+
+        outcomes: List[Any] = []
+        if self.executor is None:
+            for password, existing_hash in zip(passwords, current, strict=True):
+                try:
+                    outcomes.append(resolve_password_hash(password, existing_hash))
+                except Exception as e:
+                    outcomes.append(e)
+            return outcomes
+        futures = [
+            self.executor.submit(resolve_password_hash, password, existing_hash)
+            for password, existing_hash in zip(passwords, current, strict=True)
+        ]
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+
 
 class RosterService:
     @staticmethod
@@ -15,11 +120,66 @@ class RosterService:
         Process student roster CSV.
         Expected columns: Name, Year Level, ID Code, Class Group, Password, Avatar ID
         """
-        # Use io.StringIO to treat the string as a file
         # utf-8-sig is handled by the caller or by reading the BOM if present
-        f = io.StringIO(csv_content)
-        reader = csv.DictReader(f)
-        
+        reader = csv.DictReader(io.StringIO(csv_content))
+        return RosterService.import_rows(db, reader)
+
+    @staticmethod
+    def import_stream(
+        db: Session,
+        binary_file: BinaryIO,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """
+        Import a roster CSV from a binary file object without reading it all in.
+
+        The file is decoded incrementally (a UTF-8 BOM is skipped) and rows are
+        upserted chunk by chunk. A UnicodeDecodeError is raised at the first
+        undecodable chunk; earlier chunks have already been committed.
+        """
+        text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+        try:
+            return RosterService.import_rows(db, csv.DictReader(text), on_progress)
+        finally:
+            # Leave the caller's file open
+            text.detach()
+
+    @staticmethod
+    def import_rows(
+        db: Session,
+        rows: Iterable[Dict[str, str]],
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict[str, Any]:
+        """
+        Validate and bulk-upsert roster rows in chunks of ROSTER_CHUNK_SIZE.
+
+        Existing students are prefetched in one query, passwords are hashed in a
+        process pool (unchanged passwords keep their current hash) and each chunk
+        is written with bulk INSERT/UPDATE statements and committed.
+        ``on_progress`` receives a summary after every chunk.
+        """
+        with ROSTER_IMPORT_SECONDS.time(), span("roster.import") as import_span:
+            try:
+                results = RosterService._import_rows(db, rows, on_progress)
+            except Exception:
+                ROSTER_IMPORTS.inc(outcome="failed")
+                raise
+            import_span.set(
+                rows=results["total"], created=results["created"],
+                updated=results["updated"], errors=len(results["errors"]),
+            )
+        ROSTER_IMPORTS.inc(outcome="succeeded")
+        ROSTER_ROWS.inc(results["created"], result="created")
+        ROSTER_ROWS.inc(results["updated"], result="updated")
+        ROSTER_ROWS.inc(len(results["errors"]), result="errors")
+        return results
+
+    @staticmethod
+    def _import_rows(
+        db: Session,
+        rows: Iterable[Dict[str, str]],
+        on_progress: Optional[ProgressCallback],
+    ) -> Dict[str, Any]:
         results = {
             "total": 0,
             "created": 0,
@@ -27,56 +187,172 @@ class RosterService:
             "errors": []
         }
 
-        for row in reader:
+        existing = {
+            id_code: (student_id, password_hash)
+            for student_id, id_code, password_hash in db.execute(
+                select(Student.id, Student.id_code, Student.password_hash)
+            )
+        }
+        # Release the writer connection while the first chunk's passwords hash
+        db.commit()
+
+        hash_pool = _HashPool()
+        try:
+            for chunk in _chunked(rows, ROSTER_CHUNK_SIZE):
+                RosterService._import_chunk(db, chunk, existing, hash_pool, results)
+                if on_progress is not None:
+                    on_progress({
+                        "processed": results["total"],
+                        "created": results["created"],
+                        "updated": results["updated"],
+                        "errors": len(results["errors"]),
+                    })
+        finally:
+            hash_pool.shutdown()
+            # Names, class groups and passwords may have changed for any student
+            identity_cache.invalidate_role("student")
+            response_cache.invalidate("students")
+        return results
+
+    @staticmethod
+    def _import_chunk(
+        db: Session,
+        rows: List[Dict[str, str]],
+        existing: Dict[str, tuple],
+        hash_pool: _HashPool,
+        results: Dict[str, Any],
+    ) -> None:
+        # id_code -> student values; later rows for the same id_code update the
+        # earlier ones, as when rows were applied one by one
+        pending: Dict[str, Dict[str, Any]] = {}
+        row_numbers: Dict[str, int] = {}
+        for row in rows:
             results["total"] += 1
+            row_number = results["total"]
             try:
-                # Basic validation
-                required = ["Name", "Year Level", "ID Code", "Class Group", "Password", "Avatar ID"]
-                missing = [col for col in required if col not in row or not row[col]]
+                missing = [col for col in REQUIRED_COLUMNS if col not in row or not row[col]]
                 if missing:
-                    results["errors"].append(f"Row {results['total']}: Missing columns {missing}")
+                    results["errors"].append(f"Row {row_number}: Missing columns {missing}")
                     continue
 
                 id_code = row["ID Code"].strip()
-                
-                # Check for existing student
-                existing_student = db.execute(
-                    select(Student).where(Student.id_code == id_code)
-                ).scalar_one_or_none()
-
-                if existing_student:
-                    # Update existing student
-                    existing_student.name = row["Name"].strip()
-                    existing_student.year_level = int(row["Year Level"])
-                    existing_student.class_group = row["Class Group"].strip()
-                    existing_student.avatar_id = row["Avatar ID"].strip()
-                    if row["Password"]:
-                        existing_student.password_hash = get_password_hash(row["Password"])
-                    results["updated"] += 1
+                values = {
+                    "name": row["Name"].strip(),
+                    "year_level": int(row["Year Level"]),
+                    "id_code": id_code,
+                    "class_group": row["Class Group"].strip(),
+                    "avatar_id": row["Avatar ID"].strip(),
+                    "password": row["Password"],
+                }
+            except Exception as e:
+                results["errors"].append(f"Row {row_number}: {str(e)}")
+                continue
+
+            if id_code in existing or id_code in pending:
+                results["updated"] += 1
+            else:
+                results["created"] += 1
+            pending[id_code] = values
+            row_numbers[id_code] = row_number
+
+        with span("roster.hash_passwords", rows=len(pending)):
+            hashes = RosterService._resolve_hashes(
+                pending, existing, row_numbers, hash_pool, results
+            )
+
+        creates: List[Dict[str, Any]] = []
+        updates: List[Dict[str, Any]] = []
+        for id_code, values in pending.items():
+            if id_code not in hashes:
+                continue
+            record = {k: v for k, v in values.items() if k != "password"}
+            record["password_hash"] = hashes[id_code]
+            record["updated_at"] = datetime.now(timezone.utc)
+            if id_code in existing:
+                record["id"] = existing[id_code][0]
+                updates.append(record)
+            else:
+                record["id"] = uuid.uuid4()
+                creates.append(record)
+            # Later chunks that repeat this id_code become updates
+            existing[id_code] = (record["id"], record["password_hash"])
+
+        with span("roster.write_chunk", created=len(creates), updated=len(updates)):
+            if creates:
+                db.execute(insert(Student), creates)
+            if updates:
+                db.execute(update(Student), updates)
+            db.commit()
+
+    @staticmethod
+    def _resolve_hashes(
+        pending: Dict[str, Dict[str, Any]],
+        existing: Dict[str, tuple],
+        row_numbers: Dict[str, int],
+        hash_pool: _HashPool,
+        results: Dict[str, Any],
+    ) -> Dict[str, str]:
+        """
+        Hash every pending password, reusing stored hashes that still match.
+
+        Checking a stored hash costs a full bcrypt verify, so existing students
+        go through the hash pool like new ones. Nothing derived from the
+        plaintext is kept to shortcut that check.
+        """
+        hashes: Dict[str, str] = {}
+        id_codes = list(pending)
+        passwords = [pending[c]["password"] for c in id_codes]
+        current = [existing[c][1] if c in existing else None for c in id_codes]
+
+        outcomes = hash_pool.resolve(passwords, current) if passwords else []
+        for id_code, outcome in zip(id_codes, outcomes, strict=True):
+            if isinstance(outcome, Exception):
+                results["errors"].append(f"Row {row_numbers[id_code]}: {str(outcome)}")
+                if id_code in existing:
+                    results["updated"] -= 1
                 else:
-                    # Create new student
-                    new_student = Student(
-                        id=uuid.uuid4(),
-                        name=row["Name"].strip(),
-                        year_level=int(row["Year Level"]),
-                        id_code=id_code,
-                        class_group=row["Class Group"].strip(),
-                        avatar_id=row["Avatar ID"].strip(),
-                        password_hash=get_password_hash(row["Password"])
-                    )
-                    db.add(new_student)
-                    results["created"] += 1
-                
-                # Commit periodically or at the end
-                if (results["created"] + results["updated"]) % 50 == 0:
-                    print(f"Processed {results['total']} rows... (Committing)")
-                    db.commit()
+                    results["created"] -= 1
+            else:
+                hashes[id_code] = outcome
+        return hashes
 
-            except Exception as e:
-                results["errors"].append(f"Row {results['total']}: {str(e)}")
+    @staticmethod
+    def list_students(
+        db: Session,
+        limit: int,
+        cursor: Optional[str] = None,
+        class_group: Optional[str] = None,
+    ) -> Tuple[List[Student], Optional[str]]:
+        """One page of students ordered by (class_group, name, id), plus the next cursor."""
+        # Columns only: touching student.submissions would cost a query per row
+        stmt = select(Student).options(raiseload("*"))
+        if class_group is not None:
+            stmt = stmt.where(Student.class_group == class_group)
+        if cursor is not None:
+            last_group, last_name, last_id = decode_cursor(cursor, 3)
+            stmt = stmt.where(
+                tuple_(Student.class_group, Student.name, Student.id)
+                > (last_group, last_name, uuid.UUID(last_id))
+            )
+        stmt = stmt.order_by(Student.class_group, Student.name, Student.id).limit(limit + 1)
 
-        db.commit()
-        return results
+        rows = db.execute(stmt).scalars().all()
+        if len(rows) <= limit:
+            return rows, None
+        page = rows[:limit]
+        last = page[-1]
+        return page, encode_cursor(last.class_group, last.name, last.id)
+
+    @staticmethod
+    def get_roster_version(
+        db: Session, class_group: Optional[str] = None
+    ) -> Tuple[int, Optional[datetime]]:
+        """Row count and newest updated_at of the (optionally filtered) roster."""
+        stmt = select(func.count(Student.id), func.max(Student.updated_at))
+        if class_group is not None:
+            stmt = stmt.where(Student.class_group == class_group)
+        count, last_modified = db.execute(stmt).one()
+        return count, last_modified
 
     @staticmethod
     def get_class_groups(db: Session) -> List[str]:
@@ -0,0 +1,173 @@
+"""Background WAL checkpointing and ``PRAGMA optimize`` for the SQLite database.
+
+SQLite's automatic checkpoint (``wal_autocheckpoint``) runs inside whichever
+commit crosses the threshold and never shrinks the ``-wal`` file, so during a
+long exam session the file keeps growing and an unlucky autosave pays for the
+checkpoint. This task checkpoints on a timer instead:
+
+- ``PASSIVE`` every ``SQLITE_CHECKPOINT_INTERVAL`` seconds. It copies what it
+  can without waiting for readers, so it never stalls a request.
+- ``TRUNCATE`` once the WAL exceeds ``SQLITE_CHECKPOINT_TRUNCATE_BYTES``, and
+  on shutdown, which resets the file to zero bytes.
+- ``PRAGMA optimize`` every ``SQLITE_OPTIMIZE_INTERVAL`` seconds and on
+  shutdown, so the planner's statistics keep up with the data.
+
+Checkpoints run on the writer connection, so they queue behind writes rather
+than contending with them.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from anyio import to_thread
+
+from src.database import IS_SQLITE, engine, read_engine
+from src.services.sqlite_profile import SQLITE_PROFILE, SQLITE_PROFILE_NAME
+
+logger = logging.getLogger(__name__)
+
+SQLITE_CHECKPOINT_INTERVAL = float(os.getenv("SQLITE_CHECKPOINT_INTERVAL", "60"))
+SQLITE_CHECKPOINT_TRUNCATE_BYTES = int(
+    os.getenv("SQLITE_CHECKPOINT_TRUNCATE_BYTES", str(64 * 1024 * 1024))
+)
+SQLITE_OPTIMIZE_INTERVAL = float(os.getenv("SQLITE_OPTIMIZE_INTERVAL", "3600"))
+
+CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+
+
+class SQLiteMaintenance:
+    """Runs checkpoints and optimize on a timer and records what they did."""
+
+    def __init__(
+        self,
+        checkpoint_interval: float = SQLITE_CHECKPOINT_INTERVAL,
+        truncate_bytes: int = SQLITE_CHECKPOINT_TRUNCATE_BYTES,
+        optimize_interval: float = SQLITE_OPTIMIZE_INTERVAL,
+    ):
+        self.checkpoint_interval = checkpoint_interval
+        self.truncate_bytes = truncate_bytes
+        self.optimize_interval = optimize_interval
+        self.checkpoints: Dict[str, int] = {mode: 0 for mode in CHECKPOINT_MODES}
+        self.last_checkpoint: Optional[Dict[str, Any]] = None
+        self.optimizes = 0
+        self.last_optimize_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def wal_path(self) -> Optional[str]:
+        database = engine.url.database
+        if not IS_SQLITE or not database or database == ":memory:":
+            return None
+        return f"{database}-wal"
+
+    def wal_bytes(self) -> int:
+        path = self.wal_path
+        if path is None:
+            return 0
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def checkpoint(self, mode: str = "PASSIVE") -> Dict[str, Any]:
+        """Run ``PRAGMA wal_checkpoint(mode)`` on the writer connection."""
+        mode = mode.upper()
+        if mode not in CHECKPOINT_MODES:
+            raise ValueError(f"Unknown checkpoint mode {mode!r}")
+        wal_before = self.wal_bytes()
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            busy, log_frames, checkpointed = conn.exec_driver_sql(
+                f"PRAGMA wal_checkpoint({mode})"
+            ).one()
+        result = {
+            "mode": mode,
+            "busy": bool(busy),
+            "log_frames": log_frames,
+            "checkpointed_frames": checkpointed,
+            "wal_bytes_before": wal_before,
+            "wal_bytes_after": self.wal_bytes(),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "at": time.time(),
+        }
+        self.checkpoints[mode] += 1
+        self.last_checkpoint = result
+        return result
+
+    def optimize(self) -> None:
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA optimize")
+        self.optimizes += 1
+        self.last_optimize_at = time.time()
+
+    def run_once(self) -> Dict[str, Any]:
+        """One maintenance pass: the checkpoint the WAL size calls for, then optimize if due."""
+        mode = "TRUNCATE" if self.wal_bytes() > self.truncate_bytes else "PASSIVE"
+        result = self.checkpoint(mode)
+        if self.last_optimize_at is None or time.time() - self.last_optimize_at >= self.optimize_interval:
+            self.optimize()
+        return result
+
+    async def start(self) -> None:
+        if not IS_SQLITE or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Leave a zero-length WAL and fresh statistics for the next start
+        try:
+            await to_thread.run_sync(self.checkpoint, "TRUNCATE")
+            await to_thread.run_sync(self.optimize)
+        except Exception:
+            logger.exception("Final SQLite checkpoint failed")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            try:
+                await to_thread.run_sync(self.run_once)
+            except Exception:
+                # A failed pass (e.g. writer pool timeout under load) is retried next interval
+                logger.exception("SQLite maintenance pass failed")
+
+    def live_pragmas(self) -> Dict[str, Any]:
+        """The pragma values a reader connection actually has, for comparison with the profile."""
+        if not IS_SQLITE:
+            return {}
+        with read_engine.connect() as conn:
+            return {
+                pragma: conn.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+                for pragma in ("journal_mode", *SQLITE_PROFILE, "query_only")
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "profile": SQLITE_PROFILE_NAME,
+            "configured": dict(SQLITE_PROFILE),
+            "pragmas": self.live_pragmas(),
+            "wal": {
+                "bytes": self.wal_bytes(),
+                "truncate_bytes": self.truncate_bytes,
+            },
+            "checkpoint_interval_s": self.checkpoint_interval,
+            "optimize_interval_s": self.optimize_interval,
+            "running": self._task is not None,
+            "checkpoints": dict(self.checkpoints),
+            "last_checkpoint": self.last_checkpoint,
+            "optimizes": self.optimizes,
+            "last_optimize_at": self.last_optimize_at,
+        }
+
+
+sqlite_maintenance = SQLiteMaintenance()
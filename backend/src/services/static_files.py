@@ -0,0 +1,98 @@
+"""Static file serving with precompressed siblings and per-file cache headers."""
+
+import mimetypes
+import os
+import re
+from typing import Optional, Pattern, Set
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Vite emits bundles as assets/<name>-<8 char hash>.<ext>
+VITE_HASHED_ASSET = re.compile(r"assets/[^/]+-[A-Za-z0-9_-]{8}\.[a-z0-9]+")
+
+# Preferred first; siblings are produced at build time by precompress_static.py
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> Set[str]:
+    """Content codings the client accepts (``q=0`` excluded)."""
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if coding and params not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding.lower())
+    return accepted
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with cache headers per file and precompressed responses.
+
+    - Files whose path (relative to the mounted directory) matches
+      ``immutable_pattern`` are content-hashed and can never change under
+      that name, so browsers keep them for a year without revalidating.
+    - HTML entry points must be revalidated so a new build is picked up.
+    - If ``<file>.br`` or ``<file>.gz`` exists and the client accepts that
+      coding, the sibling is sent with ``Content-Encoding`` instead.
+
+    Everything else keeps Starlette's default ETag/Last-Modified handling.
+    """
+
+    def __init__(self, *args, immutable_pattern: Optional[Pattern[str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable_pattern = immutable_pattern
+
+    def file_response(self, full_path, stat_result, scope: Scope, status_code: int = 200) -> Response:
+        full_path = os.fspath(full_path)
+        request_headers = Headers(scope=scope)
+        response = self._precompressed_response(full_path, request_headers, status_code)
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        elif "content-encoding" not in response.headers:
+            response.headers["Vary"] = "Accept-Encoding"
+
+        cache_control = self._cache_control(full_path)
+        if cache_control:
+            response.headers["Cache-Control"] = cache_control
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def _precompressed_response(
+        self, full_path: str, request_headers: Headers, status_code: int
+    ) -> Optional[Response]:
+        siblings = [
+            (coding, full_path + suffix)
+            for coding, suffix in PRECOMPRESSED_ENCODINGS
+            if os.path.isfile(full_path + suffix)
+        ]
+        if not siblings:
+            return None
+        accepted = accepted_encodings(request_headers.get("accept-encoding"))
+        for coding, sibling in siblings:
+            if coding in accepted:
+                # stat_result makes FileResponse set ETag/Last-Modified up front
+                return FileResponse(
+                    sibling,
+                    status_code=status_code,
+                    media_type=mimetypes.guess_type(full_path)[0] or "text/plain",
+                    stat_result=os.stat(sibling),
+                    headers={"Content-Encoding": coding, "Vary": "Accept-Encoding"},
+                )
+        return FileResponse(full_path, status_code=status_code, stat_result=os.stat(full_path))
+
+    def _cache_control(self, full_path: str) -> Optional[str]:
+        relative = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+        if self.immutable_pattern is not None and self.immutable_pattern.fullmatch(relative):
+            return IMMUTABLE_CACHE_CONTROL
+        if relative.endswith(".html"):
+            return REVALIDATE_CACHE_CONTROL
+        return None
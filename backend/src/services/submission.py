@@ -1,10 +1,11 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import select, tuple_
 from uuid import UUID
 from datetime import datetime, timezone
-from typing import List, Optional
-from src.models.base import Submission
+from typing import List, Optional, Tuple
+from src.models.base import Student, Submission
 from src.schemas.submission import SubmissionCreate, SubmissionUpdate
+from src.services.pagination import as_naive_utc, decode_cursor, encode_cursor
 
 class SubmissionService:
     @staticmethod
@@ -44,8 +45,9 @@ class SubmissionService:
             )
             db.add(submission)
         
-        db.commit()
+        db.flush()
         db.refresh(submission)
+        db.commit()
         return submission
 
     @staticmethod
@@ -57,8 +59,9 @@ class SubmissionService:
         
         submission.status = "SUBMITTED"
         submission.submitted_at = datetime.now(timezone.utc)
-        db.commit()
+        db.flush()
         db.refresh(submission)
+        db.commit()
         return submission
 
     @staticmethod
@@ -69,15 +72,58 @@ class SubmissionService:
         
         submission.status = "DRAFT"
         submission.submitted_at = None
-        db.commit()
+        db.flush()
         db.refresh(submission)
+        db.commit()
         return submission
 
     @staticmethod
     def get_project_submissions(db: Session, project_id: UUID) -> List[Submission]:
-        stmt = select(Submission).where(Submission.project_id == project_id)
+        stmt = (
+            select(Submission)
+            .options(raiseload("*"))
+            .where(Submission.project_id == project_id)
+        )
         return db.execute(stmt).scalars().all()
 
     @staticmethod
-    def get_all_submissions(db: Session) -> List[Submission]:
-        return db.query(Submission).all()
+    def list_submissions(
+        db: Session,
+        limit: int,
+        cursor: Optional[str] = None,
+        class_group: Optional[str] = None,
+        project_id: Optional[UUID] = None,
+        status: Optional[str] = None,
+        updated_since: Optional[datetime] = None,
+    ) -> Tuple[List[Submission], Optional[str]]:
+        """
+        One page of submissions ordered by (last_updated_at, id).
+
+        Returns the page and the cursor for the next one (None on the last
+        page). Ascending update order lets dashboards resume from updated_since.
+        Relationships raise if touched, so serialising a page stays one query.
+        """
+        stmt = select(Submission).options(raiseload("*"))
+        if class_group is not None:
+            stmt = stmt.join(Student, Submission.student_id == Student.id).where(
+                Student.class_group == class_group
+            )
+        if project_id is not None:
+            stmt = stmt.where(Submission.project_id == project_id)
+        if status is not None:
+            stmt = stmt.where(Submission.status == status)
+        if updated_since is not None:
+            stmt = stmt.where(Submission.last_updated_at >= as_naive_utc(updated_since))
+        if cursor is not None:
+            last_updated_at, last_id = decode_cursor(cursor, 2)
+            stmt = stmt.where(
+                tuple_(Submission.last_updated_at, Submission.id)
+                > (datetime.fromisoformat(last_updated_at), UUID(last_id))
+            )
+        stmt = stmt.order_by(Submission.last_updated_at, Submission.id).limit(limit + 1)
+
+        rows = db.execute(stmt).scalars().all()
+        if len(rows) <= limit:
+            return rows, None
+        page = rows[:limit]
+        return page, encode_cursor(page[-1].last_updated_at, page[-1].id)
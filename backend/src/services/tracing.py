@@ -0,0 +1,270 @@
+"""Request tracing: nested, timed spans written to a rotating JSONL file.
+
+``TracingMiddleware`` opens a trace per HTTP request, named after its route
+template and keyed by a request ID (taken from ``X-Request-ID`` or
+generated, and echoed back on the response). Code anywhere below it wraps
+work in :func:`span`; the current trace and span live in context variables,
+which the threadpool copies into sync routes, so services need no extra
+arguments. Spans opened outside a request start a trace of their own.
+
+Each finished trace at least ``TRACE_MIN_MS`` long becomes one JSON line in
+``TRACE_FILE``, appended by a background thread so requests never wait on
+the file. Run ``python trace_report.py`` to summarise where the time went.
+"""
+
+import itertools
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.services.json_codec import dumps
+from src.services.query_stats import route_template
+
+logger = logging.getLogger(__name__)
+
+# Empty disables writing; spans are still timed
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join("traces", "traces.jsonl"))
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+TRACE_BACKUP_COUNT = int(os.getenv("TRACE_BACKUP_COUNT", "5"))
+# Traces shorter than this are dropped; 0 keeps every request
+TRACE_MIN_MS = float(os.getenv("TRACE_MIN_MS", "250"))
+# Traces waiting for the writer thread; beyond this they are dropped
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "1000"))
+
+REQUEST_ID_HEADER = b"x-request-id"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "name", "attributes", "_started", "start_ms", "duration_ms")
+
+    def __init__(self, span_id: int, parent_id: Optional[int], name: str, start_ms: float, attributes: Dict[str, Any]):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ms = start_ms
+        self.duration_ms: Optional[float] = None
+        self._started = time.perf_counter()
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "start_ms": self.start_ms,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.started_at = time.time()
+        self.spans: List[Span] = []
+        self._started = time.perf_counter()
+        self._ids = itertools.count(1)
+
+    def open_span(self, name: str, parent: Optional[Span], attributes: Dict[str, Any]) -> Span:
+        start_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        return Span(next(self._ids), parent.span_id if parent else None, name, start_ms, attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        root = next((s for s in self.spans if s.parent_id is None), None)
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name if root else None,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            "duration_ms": root.duration_ms if root else None,
+            # Parents finish after their children; list them in start order
+            "spans": [s.to_dict() for s in sorted(self.spans, key=lambda s: (s.start_ms, s.span_id))],
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class TraceWriter:
+    """Appends finished traces to a size-rotated JSONL file.
+
+    ``write`` only queues the trace; a daemon thread serialises it and does
+    the file I/O, so the event loop never blocks on disk. When the queue is
+    full the trace is dropped and counted rather than waited for.
+    """
+
+    def __init__(
+        self,
+        path: str = TRACE_FILE,
+        max_bytes: int = TRACE_MAX_BYTES,
+        backup_count: int = TRACE_BACKUP_COUNT,
+        min_ms: float = TRACE_MIN_MS,
+        queue_size: int = TRACE_QUEUE_SIZE,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.min_ms = min_ms
+        self.written = 0
+        self.dropped = 0
+        self._handler: Optional[RotatingFileHandler] = None
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+    def _get_handler(self) -> RotatingFileHandler:
+        if self._handler is None or self._handler.baseFilename != os.path.abspath(self.path):
+            if self._handler is not None:
+                self._handler.close()
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._handler = RotatingFileHandler(
+                self.path, maxBytes=self.max_bytes, backupCount=self.backup_count,
+                encoding="utf-8", delay=True,
+            )
+        return self._handler
+
+    def write(self, trace: Trace) -> None:
+        """Queue a finished trace for the writer thread."""
+        if not self.path:
+            return
+        root = next((s for s in trace.spans if s.parent_id is None), None)
+        if ((root.duration_ms if root else 0) or 0) < self.min_ms:
+            return
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Block until every queued trace has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="trace-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            trace = self._queue.get()
+            try:
+                self._append(trace)
+            finally:
+                self._queue.task_done()
+
+    def _append(self, trace: Trace) -> None:
+        try:
+            line = dumps(trace.to_dict()).decode("utf-8")
+            # Rotates before the write that would overflow
+            self._get_handler().handle(logging.makeLogRecord({"msg": line, "args": None}))
+            self.written += 1
+        except Exception:
+            logger.exception("Could not write trace %s", trace.trace_id)
+
+
+trace_writer = TraceWriter()
+
+
+@contextmanager
+def start_trace(name: str, trace_id: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+    """Open a new trace whose root span is ``name``; it is written when the block exits."""
+    trace = Trace(trace_id or uuid.uuid4().hex)
+    trace_token = _current_trace.set(trace)
+    try:
+        with _open_span(trace, name, attributes) as root:
+            yield root
+    finally:
+        _current_trace.reset(trace_token)
+        trace_writer.write(trace)
+
+
+@contextmanager
+def _open_span(trace: Trace, name: str, attributes: Dict[str, Any]) -> Iterator[Span]:
+    span_ = trace.open_span(name, _current_span.get(), attributes)
+    token = _current_span.set(span_)
+    try:
+        yield span_
+    except BaseException as exc:
+        span_.attributes["error"] = type(exc).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        span_.duration_ms = round((time.perf_counter() - span_._started) * 1000, 3)
+        trace.spans.append(span_)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Time a block as a child of the current span (or as a new trace outside one)."""
+    trace = _current_trace.get()
+    if trace is None:
+        with start_trace(name, **attributes) as root:
+            yield root
+        return
+    with _open_span(trace, name, attributes) as child:
+        yield child
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+class TracingMiddleware:
+    """Wraps each HTTP request in a trace and returns its ID as ``X-Request-ID``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == REQUEST_ID_HEADER:
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.set(status=message["status"])
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER, request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        method = scope["method"]
+        with start_trace(f"{method} {scope['path']}", trace_id=request_id, method=method) as root:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # The route is only known once routing has run
+                route = route_template(scope) or "(unmatched)"
+                root.name = f"{method} {route}"
+                root.set(route=route)
@@ -0,0 +1,144 @@
+"""Shared pytest setup: run the app against a throwaway SQLite database.
+
+Set DATABASE_URL to run the suite against PostgreSQL instead (as CI does).
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="abigail-tests-")
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(_TEST_DB_DIR, 'test_assessment.db')}"
+)
+os.environ.setdefault("EXPORT_CACHE_DIR", os.path.join(_TEST_DB_DIR, "export_cache"))
+os.environ.setdefault("STIMULUS_ASSET_DIR", os.path.join(_TEST_DB_DIR, "stimulus_assets"))
+# Tests run grading jobs explicitly instead of on background workers
+os.environ.setdefault("GRADING_WORKERS", "0")
+os.environ.setdefault("TRACE_FILE", os.path.join(_TEST_DB_DIR, "traces", "traces.jsonl"))
+os.environ.setdefault("TRACE_MIN_MS", "0")
+# Minimum bcrypt cost keeps password hashing from dominating test time
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+# Add backend to path so we can import src
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def app_lifespan():
+    """Run the startup/shutdown hooks once so tables and the default teacher exist."""
+    from fastapi.testclient import TestClient
+
+    from src.database import IS_SQLITE, engine
+    from src.main import app
+    from src.models.base import Base
+
+    if not IS_SQLITE:
+        # A server database outlives the run, so start each one from empty
+        Base.metadata.drop_all(bind=engine)
+    with TestClient(app):
+        yield
+
+
+@pytest.fixture
+def db():
+    from src.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def teacher_headers():
+    from fastapi.testclient import TestClient
+
+    from src.main import app
+
+    r = TestClient(app).post(
+        "/api/auth/login", json={"username": "admin", "password": "abigail2026"}
+    )
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+@pytest.fixture
+def make_submission(db):
+    """Create a project with one student submission per call; returns the Submission."""
+    import uuid
+
+    from src.models.base import Project, Student, Submission
+
+    def factory(project=None, content="Once upon a time.", status="SUBMITTED", genre="NARRATIVE"):
+        if project is None:
+            project = Project(
+                title=f"Test Project {uuid.uuid4().hex[:6]}",
+                genre=genre,
+                instructions="Write a story.",
+                stimulus_html="<p>Stimulus</p>",
+                assigned_class_groups=["TST"],
+            )
+            db.add(project)
+            db.flush()
+        code = uuid.uuid4().hex[:8]
+        student = Student(
+            name=f"Student {code}",
+            year_level=7,
+            id_code=f"T-{code}",
+            class_group="TST",
+            avatar_id="avatar1",
+            password_hash="x",
+        )
+        db.add(student)
+        db.flush()
+        # Relationships are set directly so tests never lazy-load them later,
+        # which would hold the single writer connection open
+        submission = Submission(
+            student=student,
+            project=project,
+            content_raw=content,
+            status=status,
+        )
+        db.add(submission)
+        db.commit()
+        return submission
+
+    return factory
+
+
+@pytest.fixture
+def query_budget():
+    """Fail the test if a block runs more SQL statements than its budget.
+
+        with query_budget(2) as statements:
+            client.get("/api/submissions", headers=teacher_headers)
+
+    Statements on every engine count; PRAGMAs issued by connection setup and
+    SQLite maintenance do not.
+    """
+    from contextlib import contextmanager
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @contextmanager
+    def budget(limit: int):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if not statement.lstrip().upper().startswith("PRAGMA"):
+                statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "before_cursor_execute", record)
+        if len(statements) > limit:
+            listing = "\n\n".join(statements)
+            pytest.fail(f"{len(statements)} queries, budget {limit}:\n\n{listing}")
+
+    return budget
@@ -0,0 +1,64 @@
+"""
+Tests for the stimulus asset pipeline.
+Run with: python -m pytest tests/test_assets.py -v
+"""
+import io
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from src.main import app
+from src.services.static_files import IMMUTABLE_CACHE_CONTROL
+
+client = TestClient(app)
+
+
+def _jpeg(width, height, color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def _upload(headers, data, filename):
+    return client.post(
+        "/api/projects/upload-asset",
+        files={"file": (filename, data, "application/octet-stream")},
+        headers=headers,
+    )
+
+
+def test_image_upload_is_hashed_resized_and_deduplicated(teacher_headers):
+    data = _jpeg(2000, 1000)
+    r = _upload(teacher_headers, data, "IMG_0001.JPG")
+    assert r.status_code == 200, r.text
+    asset = r.json()
+    assert asset["deduplicated"] is False
+    assert asset["original"] == f"/stimulus_assets/{asset['hash']}.jpg"
+    assert {(v["width"], v["format"]) for v in asset["variants"]} == {
+        (w, f) for w in (480, 960, 1600) for f in ("webp", "jpg")
+    }
+    assert asset["path"].endswith(f"{asset['hash']}-1600.webp")
+
+    served = client.get(asset["path"])
+    assert served.status_code == 200
+    assert served.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert Image.open(io.BytesIO(served.content)).size == (1600, 800)
+    manifest = client.get(f"/stimulus_assets/{asset['hash']}.json")
+    assert manifest.headers.get("cache-control") != IMMUTABLE_CACHE_CONTROL
+
+    again = _upload(teacher_headers, data, "copy.jpg").json()
+    assert again["deduplicated"] is True
+    assert again["path"] == asset["path"]
+
+
+def test_non_image_upload_keeps_original(teacher_headers):
+    r = _upload(teacher_headers, b"%PDF-1.4 not really", "../notes.pdf")
+    assert r.status_code == 200
+    asset = r.json()
+    assert asset["variants"] == []
+    assert asset["path"] == asset["original"] == f"/stimulus_assets/{asset['hash']}.pdf"
+    assert client.get(asset["path"]).content == b"%PDF-1.4 not really"
+
+
+def test_upload_requires_teacher():
+    assert _upload({}, _jpeg(10, 10), "a.jpg").status_code == 401
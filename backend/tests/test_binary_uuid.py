@@ -0,0 +1,86 @@
+"""
+Tests for 16-byte UUID keys and the migration of existing hex-keyed databases.
+Run with: python -m pytest tests/test_binary_uuid.py -v
+"""
+import os
+import time
+import uuid
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from src.database import IS_SQLITE, engine
+from src.models.base import AssessmentResult, Student
+from src.models.types import uuid7
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic")
+
+
+def test_uuid7_is_time_ordered():
+    first = uuid7()
+    time.sleep(0.002)
+    second = uuid7()
+    assert first.version == 7 and first.variant == uuid.RFC_4122
+    assert first < second
+    assert first.bytes < second.bytes
+
+
+def test_keys_are_stored_as_16_byte_blobs(make_submission):
+    submission = make_submission()
+    if not IS_SQLITE:
+        return
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT typeof(id), length(id), typeof(student_id) FROM submissions WHERE id = :id"),
+            {"id": submission.id.bytes},
+        ).one()
+    assert tuple(row) == ("blob", 16, "blob")
+    assert submission.id.version == 7
+
+
+def test_migration_converts_hex_keys(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    config = Config()
+    config.set_main_option("script_location", ALEMBIC_DIR)
+    command.upgrade(config, "postgres_jsonb_001")
+
+    student_id, project_id, submission_id, result_id = (uuid.uuid4() for _ in range(4))
+    legacy = create_engine(url)
+    with legacy.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO students (id, name, year_level, id_code, class_group, avatar_id, password_hash, created_at) "
+            "VALUES (:id, 'Ada', 7, 'A1', '7A', 'a1', 'x', '2026-01-01')"
+        ), {"id": student_id.hex})
+        conn.execute(text(
+            "INSERT INTO projects (id, title, genre, instructions, stimulus_html, asset_paths, assigned_class_groups, is_active, created_at) "
+            "VALUES (:id, 'P', 'NARRATIVE', 'i', 's', '[]', '[\"7A\"]', 1, '2026-01-01')"
+        ), {"id": project_id.hex})
+        conn.execute(text(
+            "INSERT INTO submissions (id, student_id, project_id, content_raw, status, last_updated_at) "
+            "VALUES (:id, :student, :project, 'text', 'SUBMITTED', '2026-01-01')"
+        ), {"id": submission_id.hex, "student": student_id.hex, "project": project_id.hex})
+        conn.execute(text(
+            "INSERT INTO assessment_results (id, submission_id, genre, total_score, max_score, generated_at, "
+            "overall_strengths, overall_weaknesses, criteria_scores, full_report_md) "
+            "VALUES (:id, :submission, 'NARRATIVE', 30, 47, '2026-01-01', '[]', '[]', '{}', '')"
+        ), {"id": result_id.hex, "submission": submission_id.hex})
+
+    command.upgrade(config, "head")
+    with Session(legacy) as session:
+        assert session.get(Student, student_id).name == "Ada"
+        assert session.get(AssessmentResult, result_id).submission_id == submission_id
+    with legacy.connect() as conn:
+        # References still resolve to the converted keys
+        name = conn.execute(text(
+            "SELECT students.name FROM submissions JOIN students ON students.id = submissions.student_id "
+            "JOIN projects ON projects.id = submissions.project_id WHERE submissions.id = :id"
+        ), {"id": submission_id.bytes}).scalar()
+        assert name == "Ada"
+
+    command.downgrade(config, "postgres_jsonb_001")
+    with legacy.connect() as conn:
+        assert conn.execute(text("SELECT student_id FROM submissions")).scalar() == student_id.hex
+    legacy.dispose()
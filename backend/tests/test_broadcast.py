@@ -0,0 +1,174 @@
+"""
+Tests for the WebSocket broadcast backends.
+Run with: python -m pytest tests/test_broadcast.py -v
+"""
+import asyncio
+import json
+import os
+import socket
+import sys
+import textwrap
+
+import pytest
+
+from src.api.ws import ConnectionManager
+from src.services.broadcast import InProcessBackend, UnixSocketBackend, default_socket_dir
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+requires_unix = pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX") or sys.platform == "win32",
+    reason="Unix datagram sockets are not available on this platform",
+)
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.received = []
+
+    async def send_text(self, text):
+        self.received.append(json.loads(text))
+
+
+class BrokenWebSocket:
+    async def send_text(self, text):
+        raise RuntimeError("connection closed")
+
+
+def test_in_process_broadcast_reaches_local_connections():
+    async def scenario():
+        manager = ConnectionManager(InProcessBackend())
+        ws = FakeWebSocket()
+        broken = BrokenWebSocket()
+        manager.active_connections.extend([broken, ws])
+        await manager.broadcast({"type": "PING"})
+        return manager, ws
+
+    manager, ws = asyncio.run(scenario())
+    assert ws.received == [{"type": "PING"}]
+    # Dead sockets are dropped instead of aborting the broadcast
+    assert len(manager.active_connections) == 1
+
+
+@requires_unix
+def test_unix_backend_fans_out_between_workers(tmp_path):
+    async def scenario():
+        worker_a = ConnectionManager(UnixSocketBackend(str(tmp_path)))
+        worker_b = ConnectionManager(UnixSocketBackend(str(tmp_path)))
+        ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+        worker_a.active_connections.append(ws_a)
+        worker_b.active_connections.append(ws_b)
+        await worker_a.start()
+        await worker_b.start()
+        try:
+            await worker_a.broadcast({"type": "SUBMISSION_UPDATED", "data": {"id": "1"}})
+            for _ in range(50):
+                if ws_b.received:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await worker_a.stop()
+            await worker_b.stop()
+        return ws_a, ws_b
+
+    ws_a, ws_b = asyncio.run(scenario())
+    assert ws_a.received == [{"type": "SUBMISSION_UPDATED", "data": {"id": "1"}}]
+    assert ws_b.received == ws_a.received
+    assert list(tmp_path.glob("*.sock")) == []
+
+
+@requires_unix
+def test_unix_backend_across_processes(tmp_path):
+    """A second worker process publishes; this process's dashboards receive it."""
+    publisher = textwrap.dedent(
+        f"""
+        import asyncio
+        from src.services.broadcast import UnixSocketBackend
+
+        async def main():
+            backend = UnixSocketBackend({str(tmp_path)!r})
+            await backend.start()
+            await backend.publish({{"type": "SUBMISSION_UPDATED", "from": "worker-2"}})
+            await backend.stop()
+
+        asyncio.run(main())
+        """
+    )
+
+    async def scenario():
+        manager = ConnectionManager(UnixSocketBackend(str(tmp_path)))
+        ws = FakeWebSocket()
+        manager.active_connections.append(ws)
+        await manager.start()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, "-c", publisher, cwd=BACKEND_DIR
+            )
+            assert await proc.wait() == 0
+            for _ in range(100):
+                if ws.received:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await manager.stop()
+        return ws
+
+    ws = asyncio.run(scenario())
+    assert ws.received == [{"type": "SUBMISSION_UPDATED", "from": "worker-2"}]
+
+
+@requires_unix
+def test_unix_backend_removes_stale_peer_sockets(tmp_path):
+    stale = tmp_path / "99999-deadbeef.sock"
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(str(stale))
+    sock.close()
+
+    async def scenario():
+        backend = UnixSocketBackend(str(tmp_path))
+        await backend.start()
+        try:
+            await backend.publish({"type": "PING"})
+        finally:
+            await backend.stop()
+
+    asyncio.run(scenario())
+    assert not stale.exists()
+
+
+@requires_unix
+def test_unix_backend_oversized_message_is_only_delivered_locally(tmp_path, caplog):
+    async def scenario():
+        worker_a = ConnectionManager(UnixSocketBackend(str(tmp_path)))
+        worker_b = ConnectionManager(UnixSocketBackend(str(tmp_path)))
+        ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+        worker_a.active_connections.append(ws_a)
+        worker_b.active_connections.append(ws_b)
+        await worker_a.start()
+        await worker_b.start()
+        try:
+            await worker_a.broadcast({"type": "BIG", "data": "x" * (70 * 1024)})
+            await asyncio.sleep(0.05)
+        finally:
+            await worker_a.stop()
+            await worker_b.stop()
+        return worker_a, ws_a, ws_b
+
+    worker_a, ws_a, ws_b = asyncio.run(scenario())
+    assert [m["type"] for m in ws_a.received] == ["BIG"]
+    assert ws_b.received == []
+    assert worker_a.backend.dropped == 1
+    assert "not sent to other workers" in caplog.text
+
+
+def test_default_socket_dir_is_per_deployment(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    relative = default_socket_dir("sqlite:///./local_assessment.db")
+    assert relative == default_socket_dir(f"sqlite:///{tmp_path}/local_assessment.db")
+    assert relative != default_socket_dir("sqlite:///./other.db")
+    (tmp_path / "other").mkdir()
+    monkeypatch.chdir(tmp_path / "other")
+    assert relative != default_socket_dir("sqlite:///./local_assessment.db")
+    assert default_socket_dir("postgresql+psycopg://u:p@host/a") != default_socket_dir(
+        "postgresql+psycopg://u:p@host/b"
+    )
@@ -0,0 +1,65 @@
+"""
+Tests for gzip/brotli response compression.
+Run with: python -m pytest tests/test_compression.py -v
+"""
+import brotli
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.json_codec import dumps, loads
+
+client = TestClient(app)
+
+ESSAY = "<p>The wind howled through the empty streets of the town.</p>" * 40
+
+
+def _listing(headers, encoding):
+    return client.get(
+        "/api/submissions",
+        params={"class_group": "TST", "limit": 5},
+        headers={**headers, "Accept-Encoding": encoding},
+    )
+
+
+def test_large_json_is_compressed_per_accept_encoding(make_submission, teacher_headers):
+    first = make_submission(content=ESSAY)
+    for _ in range(4):
+        make_submission(project=first.project, content=ESSAY)
+
+    plain = _listing(teacher_headers, "identity")
+    assert "content-encoding" not in plain.headers
+
+    gz = _listing(teacher_headers, "gzip")
+    assert gz.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in gz.headers["vary"].lower()
+    assert gz.json() == plain.json()
+
+    br = client.stream(
+        "GET",
+        "/api/submissions",
+        params={"class_group": "TST", "limit": 5},
+        headers={**teacher_headers, "Accept-Encoding": "br, gzip"},
+    )
+    with br as response:
+        assert response.headers["content-encoding"] == "br"
+        raw = b"".join(response.iter_raw())
+    assert len(raw) < len(plain.content) / 4
+    assert loads(brotli.decompress(raw)) == plain.json()
+
+
+def test_small_and_zip_responses_are_not_compressed(make_submission, teacher_headers):
+    r = client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+
+    submission = make_submission(content=ESSAY)
+    r = client.get(
+        f"/api/submissions/export/{submission.project_id}",
+        headers={**teacher_headers, "Accept-Encoding": "br, gzip"},
+    )
+    assert r.status_code == 200
+    assert "content-encoding" not in r.headers
+
+
+def test_json_codec_round_trip():
+    message = {"type": "SUBMISSION_UPDATED", "data": {"id": "1", "word_count": 3}}
+    assert loads(dumps(message)) == message
@@ -0,0 +1,59 @@
+"""
+Tests for the sync-route concurrency model.
+Run with: python -m pytest tests/test_concurrency.py -v
+"""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from src.api.ws import manager
+from src.main import app
+from src.services.auth import create_access_token
+
+client = TestClient(app)
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.received = []
+
+    async def send_text(self, text):
+        self.received.append(json.loads(text))
+
+
+def test_http_routes_run_on_the_threadpool():
+    """Routes use the sync session, so none may run on the event loop."""
+    coroutines = [
+        route.path
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        and route.path.startswith("/api/")
+        and route.path != "/api/health"
+        and asyncio.iscoroutinefunction(route.endpoint)
+    ]
+    assert coroutines == []
+
+
+def test_concurrent_autosaves_broadcast_from_worker_threads(make_submission):
+    submission = make_submission(status="DRAFT")
+    token = create_access_token(data={"sub": str(submission.student_id), "role": "student"})
+    headers = {"Authorization": f"Bearer {token}"}
+    url = f"/api/student/submissions/{submission.project_id}"
+    ws = RecordingWebSocket()
+    manager.active_connections.append(ws)
+    try:
+        def save(i):
+            return client.post(url, json={"content_raw": f"Draft {i}"}, headers=headers).status_code
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            codes = list(pool.map(save, range(16)))
+    finally:
+        manager.disconnect(ws)
+
+    assert codes == [200] * 16
+    updates = [m for m in ws.received if m["type"] == "SUBMISSION_UPDATED"]
+    assert len(updates) == 16
+    assert {m["data"]["id"] for m in updates} == {str(submission.id)}
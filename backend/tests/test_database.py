@@ -0,0 +1,108 @@
+"""
+Tests for the SQLite writer connection / read-only reader pool split.
+Run with: python -m pytest tests/test_database.py -v
+"""
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from src.database import IS_SQLITE, ReadSessionLocal, SessionLocal, engine
+from src.main import app
+from src.services.query_stats import query_stats
+
+client = TestClient(app)
+
+requires_sqlite = pytest.mark.skipif(not IS_SQLITE, reason="reader/writer split is SQLite-only")
+
+
+@requires_sqlite
+def test_reader_connections_are_query_only():
+    session = ReadSessionLocal()
+    try:
+        with pytest.raises(OperationalError, match="readonly"):
+            session.execute(text("UPDATE projects SET title = title"))
+    finally:
+        session.close()
+
+
+@requires_sqlite
+def test_reads_do_not_wait_for_an_open_write(make_submission):
+    make_submission()
+    assert engine.pool.size() == 1
+
+    writer = SessionLocal()
+    try:
+        # Hold the write lock (and the only writer connection) mid-transaction
+        writer.execute(text("UPDATE students SET name = name"))
+        query_stats.reset()
+        started = time.perf_counter()
+        r = client.get("/api/student/list", params={"class_group": "TST"})
+        elapsed = time.perf_counter() - started
+    finally:
+        writer.rollback()
+        writer.close()
+
+    assert r.status_code == 200 and r.json()
+    assert elapsed < 2
+    stats = query_stats.stats()
+    assert stats["read"]["queries"] >= 2
+    assert "write" not in stats
+
+
+@requires_sqlite
+def test_connections_use_the_configured_profile():
+    from src.services.sqlite_profile import SQLITE_PROFILE
+
+    for bind in (engine, ReadSessionLocal.kw["bind"]):
+        with bind.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == SQLITE_PROFILE["busy_timeout"]
+            assert conn.exec_driver_sql("PRAGMA wal_autocheckpoint").scalar() == SQLITE_PROFILE["wal_autocheckpoint"]
+            assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == SQLITE_PROFILE["cache_size"]
+
+
+@requires_sqlite
+def test_truncate_checkpoint_empties_the_wal(make_submission):
+    from src.services.sqlite_maintenance import sqlite_maintenance
+
+    make_submission(content="x" * 5000)
+    assert sqlite_maintenance.wal_bytes() > 0
+
+    result = sqlite_maintenance.checkpoint("TRUNCATE")
+    assert result["busy"] is False
+    assert result["wal_bytes_after"] == 0
+    assert sqlite_maintenance.wal_bytes() == 0
+
+    make_submission()
+    result = sqlite_maintenance.run_once()
+    assert result["mode"] == "PASSIVE"
+    assert sqlite_maintenance.last_optimize_at is not None
+
+
+def test_diagnostics_requires_teacher():
+    assert client.get("/api/diagnostics").status_code == 401
+
+
+def test_diagnostics_reports_profile_and_caches(teacher_headers):
+    r = client.get("/api/diagnostics", headers=teacher_headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert set(body["caches"]) == {"identity", "responses", "exports"}
+    assert body["database"]["queries"]
+    if IS_SQLITE:
+        sqlite = body["database"]["sqlite"]
+        assert sqlite["running"] is True
+        assert sqlite["pragmas"]["query_only"] == 1
+        assert sqlite["pragmas"]["mmap_size"] == sqlite["configured"]["mmap_size"]
+
+
+@requires_sqlite
+def test_checkpoint_endpoint_validates_mode(teacher_headers):
+    r = client.post("/api/diagnostics/checkpoint", params={"mode": "sideways"}, headers=teacher_headers)
+    assert r.status_code == 400
+    r = client.post("/api/diagnostics/checkpoint", params={"mode": "passive"}, headers=teacher_headers)
+    assert r.status_code == 200
+    assert r.json()["mode"] == "PASSIVE"
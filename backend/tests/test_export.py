@@ -0,0 +1,252 @@
+"""
+Tests for project submission exports.
+Run with: python -m pytest tests/test_export.py -v
+"""
+import io
+import uuid
+import zipfile
+from urllib.parse import quote
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.export_service import ExportService
+
+client = TestClient(app)
+
+
+def test_export_streams_valid_zip(make_submission, teacher_headers):
+    first = make_submission(content="Line one\n\tIndented line")
+    project = first.project
+    make_submission(project=project, content="Second essay")
+    make_submission(project=project, content="Still drafting", status="DRAFT")
+
+    r = client.get(f"/api/submissions/export/{project.id}", headers=teacher_headers)
+
+    assert r.status_code == 200
+    assert "_Submissions.zip" in r.headers["content-disposition"]
+    with zipfile.ZipFile(io.BytesIO(r.content)) as archive:
+        names = archive.namelist()
+        assert len(names) == 2
+        contents = {archive.read(n).decode("utf-8") for n in names}
+    assert contents == {"Line one\n\tIndented line", "Second essay"}
+
+
+def test_export_yields_an_entry_at_a_time(make_submission):
+    first = make_submission(content="a" * 1000)
+    for _ in range(3):
+        make_submission(project=first.project, content="b" * 1000)
+
+    chunks = list(ExportService.iter_project_submissions_zip(first.project_id, batch_size=2))
+
+    # One chunk per entry plus the central directory
+    assert len(chunks) == 5
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.testzip() is None
+
+
+def test_rebuilt_export_is_byte_identical(make_submission, monkeypatch):
+    import time
+
+    submission = make_submission(content="Stable essay")
+    first = b"".join(ExportService.iter_export(submission.project, "bundle"))
+    # Entries must not carry the build time
+    later = time.time() + 86400
+    monkeypatch.setattr(time, "time", lambda: later)
+    second = b"".join(ExportService.iter_export(submission.project, "bundle"))
+    assert first == second
+
+
+def test_export_unknown_project_404(teacher_headers):
+    r = client.get(f"/api/submissions/export/{uuid.uuid4()}", headers=teacher_headers)
+    assert r.status_code == 404
+
+
+def test_bundle_includes_reports_and_scores(db, make_submission, teacher_headers):
+    import csv
+
+    from src.models.base import AssessmentResult
+
+    graded = make_submission(content="Graded essay")
+    project = graded.project
+    make_submission(project=project, content="Ungraded essay")
+    db.add(AssessmentResult(
+        submission_id=graded.id,
+        genre="NARRATIVE",
+        total_score=30,
+        max_score=47,
+        criteria_scores={"audience": {"score": 4, "max_score": 6}},
+        full_report_md="# Report",
+    ))
+    db.commit()
+
+    r = client.get(f"/api/submissions/export/{project.id}?mode=bundle", headers=teacher_headers)
+    assert r.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(r.content)) as archive:
+        names = archive.namelist()
+        assert len([n for n in names if n.startswith("essays/")]) == 2
+        reports = [n for n in names if n.startswith("reports/")]
+        assert len(reports) == 1 and archive.read(reports[0]) == b"# Report"
+        sheet = [n for n in names if n.endswith("_scores.csv")][0]
+        rows = list(csv.reader(io.StringIO(archive.read(sheet).decode("utf-8-sig"))))
+    assert rows[0][:6] == ["Student", "ID Code", "Class Group", "Submitted At", "Total Score", "Max Score"]
+    assert "Audience" in rows[0]
+    graded_row = [row for row in rows[1:] if row[4] == "30"][0]
+    assert graded_row[rows[0].index("Audience")] == "4"
+
+
+def test_repeat_export_served_from_cache_with_etag_and_range(db, make_submission, teacher_headers):
+    from src.services.export_jobs import export_artifacts
+
+    submission = make_submission(content="Cached essay " * 50)
+    project = submission.project
+    url = f"/api/submissions/export/{project.id}"
+
+    first = client.get(url, headers=teacher_headers)
+    etag = first.headers["etag"]
+    assert export_artifacts.get(etag.strip('"')) is not None
+
+    second = client.get(url, headers=teacher_headers)
+    assert second.content == first.content
+    assert second.headers["etag"] == etag
+    assert second.headers["accept-ranges"] == "bytes"
+
+    not_modified = client.get(url, headers={**teacher_headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    listed = client.get(url, headers={**teacher_headers, "If-None-Match": f'"other", {etag}'})
+    assert listed.status_code == 304
+    # A tag that merely contains part of ours is a different tag
+    partial_tag = client.get(url, headers={**teacher_headers, "If-None-Match": f'"x{etag[1:-1]}x"'})
+    assert partial_tag.status_code == 200
+
+    partial = client.get(url, headers={**teacher_headers, "Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.content == first.content[:10]
+
+    make_submission(project=project, content="Late essay")
+    assert client.get(url, headers=teacher_headers).headers["etag"] != etag
+
+
+def test_renaming_a_student_changes_the_export_etag(db, make_submission, teacher_headers):
+    submission = make_submission(content="Named essay")
+    url = f"/api/submissions/export/{submission.project_id}"
+    etag = client.get(url, headers=teacher_headers).headers["etag"]
+
+    submission.student.name = "Renamed Student"
+    db.commit()
+    renamed = client.get(url, headers=teacher_headers)
+    assert renamed.headers["etag"] != etag
+    assert client.get(url, headers={**teacher_headers, "If-None-Match": etag}).status_code == 200
+
+
+def test_changing_the_genre_changes_the_export_etag(db, make_submission, teacher_headers):
+    submission = make_submission(content="Genre essay")
+    url = f"/api/submissions/export/{submission.project_id}?mode=bundle"
+    etag = client.get(url, headers=teacher_headers).headers["etag"]
+
+    submission.project.genre = "PERSUASIVE"
+    db.commit()
+    assert client.get(url, headers=teacher_headers).headers["etag"] != etag
+
+
+def test_background_export_job(make_submission, teacher_headers):
+    import time
+
+    submission = make_submission(content="Job essay")
+    r = client.post(
+        f"/api/submissions/export/{submission.project_id}/jobs?mode=bundle",
+        headers=teacher_headers,
+    )
+    assert r.status_code == 202
+    job_id = r.json()["job_id"]
+
+    for _ in range(100):
+        job = client.get(f"/api/submissions/export-jobs/{job_id}", headers=teacher_headers).json()
+        if job["status"] in ("succeeded", "failed"):
+            break
+        time.sleep(0.02)
+    assert job["status"] == "succeeded", job
+
+    download = client.get(job["download_url"], headers=teacher_headers)
+    assert download.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(download.content)) as archive:
+        assert any(n.startswith("essays/") for n in archive.namelist())
+
+    # Asking again for unchanged data reuses the finished artifact
+    again = client.post(
+        f"/api/submissions/export/{submission.project_id}/jobs?mode=bundle",
+        headers=teacher_headers,
+    )
+    assert again.json()["status"] == "succeeded"
+    assert again.json()["job_id"] == job_id
+
+
+def test_export_built_by_another_worker_keeps_its_filename(make_submission, teacher_headers):
+    import time
+
+    from src.services.export_jobs import export_jobs
+
+    submission = make_submission(content="Shared essay")
+    r = client.post(
+        f"/api/submissions/export/{submission.project_id}/jobs", headers=teacher_headers
+    )
+    job_id = r.json()["job_id"]
+    expected = r.json()["filename"]
+    for _ in range(100):
+        if export_jobs.get(job_id).status == "succeeded":
+            break
+        time.sleep(0.02)
+    # This worker never saw the job; only the shared artifact cache has it
+    export_jobs._jobs.clear()
+
+    job = client.get(f"/api/submissions/export-jobs/{job_id}", headers=teacher_headers).json()
+    assert job["status"] == "succeeded"
+    assert job["filename"] == expected
+    download = client.get(job["download_url"], headers=teacher_headers)
+    assert quote(expected) in download.headers["content-disposition"]
+
+
+def test_artifact_cache_evicts_least_recently_used(tmp_path):
+    import os
+
+    from src.services.export_jobs import ExportArtifactCache
+
+    cache = ExportArtifactCache(str(tmp_path), max_bytes=250)
+    cache.store("a", [b"x" * 100])
+    cache.store("b", [b"x" * 100])
+    os.utime(cache.path_for("a"), (1, 1))
+    os.utime(cache.path_for("b"), (2, 2))
+    cache.get("a")  # a is now the most recently used
+    cache.store("c", [b"x" * 100])
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.get("../etc/passwd") is None
+
+
+def test_finished_export_jobs_expire(tmp_path):
+    import time
+    from datetime import timedelta
+
+    from src.services.export_jobs import ExportArtifactCache, ExportJobManager, artifact_id
+
+    project_id = uuid.uuid4()
+    old, new = artifact_id(project_id, "text", "a1"), artifact_id(project_id, "text", "b2")
+    manager = ExportJobManager(ExportArtifactCache(str(tmp_path)), workers=1, ttl_seconds=60)
+    try:
+        job = manager.submit(old, project_id, "text", "old.zip", lambda: [b"zip"])
+        for _ in range(100):
+            if job.finished_at is not None:
+                break
+            time.sleep(0.01)
+        assert manager.get(old) is job
+
+        job.finished_at -= timedelta(seconds=61)
+        manager.submit(new, project_id, "text", "new.zip", lambda: [b"zip"])
+        assert old not in manager._jobs
+        # The archive is still cached, so the job can still be looked up and downloaded
+        expired = manager.get(old)
+        assert expired.status == "succeeded"
+        assert (expired.project_id, expired.mode) == (project_id, "text")
+    finally:
+        manager.shutdown()
@@ -0,0 +1,188 @@
+"""
+Tests for persisted grading jobs: queueing, leases, crash recovery and shutdown.
+Run with: python -m pytest tests/test_grading_jobs.py -v
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from src.main import app
+from src.models.base import AssessmentResult, GradingJob
+from src.services import ollama_client
+from src.services.grading_jobs import GradingJobManager
+
+client = TestClient(app)
+
+VALID_REPLY = '{"total_score": 30, "criteria": {}}'
+
+
+class _FakeResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self._body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def ollama_calls(monkeypatch):
+    """Fake a healthy Ollama; returns the list of generate payloads it received."""
+    calls = []
+
+    def post(*args, **kwargs):
+        calls.append(kwargs.get("json"))
+        return _FakeResponse({"model": "mistral:latest", "response": VALID_REPLY})
+
+    monkeypatch.setattr(
+        ollama_client.requests, "get",
+        lambda *args, **kwargs: _FakeResponse({"models": [{"name": "mistral:latest", "digest": "sha256:1"}]}),
+    )
+    monkeypatch.setattr(ollama_client.requests, "post", post)
+    return calls
+
+
+@pytest.fixture
+def manager(db):
+    # Jobs are claimed oldest first across the whole table, so start empty
+    db.execute(delete(GradingJob))
+    db.commit()
+    return GradingJobManager(workers=0, lease_seconds=60, max_attempts=2)
+
+
+def _expire_lease(db, job):
+    db.execute(
+        GradingJob.__table__.update()
+        .where(GradingJob.id == job.id)
+        .values(lease_expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+    )
+    db.commit()
+
+
+def test_enqueue_returns_the_active_job(db, manager, make_submission):
+    submission = make_submission()
+    first = manager.enqueue(db, submission.id)
+    assert first.status == "queued"
+    assert manager.enqueue(db, submission.id).id == first.id
+    assert manager.counts(db)["queued"] == 1
+
+
+def test_process_next_grades_and_records_result(db, manager, make_submission, ollama_calls):
+    submission = make_submission()
+    job = manager.enqueue(db, submission.id)
+
+    done = manager.process_next()
+    assert done.id == job.id
+    assert done.status == "succeeded"
+    assert done.attempts == 1
+    assert done.lease_owner is None
+    result = db.get(AssessmentResult, done.assessment_id)
+    assert result.submission_id == submission.id
+    assert len(ollama_calls) == 1
+    db.commit()
+    assert manager.process_next() is None
+
+
+def test_expired_lease_is_requeued_then_failed(db, manager, make_submission):
+    job = manager.enqueue(db, make_submission().id)
+
+    # A worker that claims the job and dies, twice
+    for attempt in (1, 2):
+        dead = GradingJobManager(workers=0, lease_seconds=60)
+        claimed = dead.claim(db)
+        assert claimed.id == job.id and claimed.attempts == attempt
+        _expire_lease(db, claimed)
+        assert manager.recover() == 1
+        db.refresh(job)
+
+        if attempt == 1:
+            assert job.status == "queued"
+            assert "expired" in job.error
+        else:
+            assert job.status == "failed"
+            assert "gave up after 2 attempts" in job.error
+            assert job.finished_at is not None
+
+
+def test_live_lease_is_left_alone(db, manager, make_submission):
+    job = manager.enqueue(db, make_submission().id)
+    other = GradingJobManager(workers=0, lease_seconds=60)
+    other.claim(db)
+    assert manager.recover() == 0
+    db.refresh(job)
+    assert job.status == "running"
+    db.commit()
+    assert other.heartbeat() == 1
+
+
+def test_shutdown_checkpoints_running_jobs(db, manager, make_submission):
+    job = manager.enqueue(db, make_submission().id)
+    manager.claim(db)
+
+    manager._drain(grace_seconds=0)
+    db.refresh(job)
+    assert job.status == "queued"
+    # The interrupted attempt does not count against the job
+    assert job.attempts == 0
+    assert job.lease_owner is None
+    assert manager.stats()["checkpointed"] == 1
+
+
+def test_already_graded_submission_skips_the_model(db, manager, make_submission, teacher_headers, ollama_calls):
+    submission = make_submission()
+    r = client.post(f"/api/marking/grade/{submission.id}", headers=teacher_headers)
+    assert r.status_code == 200, r.text
+    assert len(ollama_calls) == 1
+
+    # Crashed after saving the result but before finishing the job
+    job = GradingJob(submission_id=submission.id, status="queued", attempts=0)
+    db.add(job)
+    db.commit()
+    done = manager.process_next()
+    assert done.status == "succeeded"
+    assert str(done.assessment_id) == r.json()["assessment_id"]
+    assert len(ollama_calls) == 1
+
+
+def test_job_routes(db, manager, make_submission, teacher_headers, ollama_calls):
+    submission = make_submission()
+    make_submission(project=submission.project)
+    make_submission(project=submission.project, status="DRAFT")
+
+    r = client.post(f"/api/marking/projects/{submission.project_id}/jobs", headers=teacher_headers)
+    assert r.status_code == 202, r.text
+    jobs = r.json()
+    assert len(jobs) == 2
+    assert {job["status"] for job in jobs} == {"queued"}
+
+    r = client.post(f"/api/marking/grade/{submission.id}/jobs", headers=teacher_headers)
+    assert r.status_code == 202
+    assert r.json()["id"] in {job["id"] for job in jobs}
+    # Grading while a job is queued would grade it twice
+    r = client.post(f"/api/marking/grade/{submission.id}", headers=teacher_headers)
+    assert r.status_code == 409
+    assert not ollama_calls
+
+    r = client.get(
+        "/api/marking/jobs",
+        params={"status": "queued", "project_id": str(submission.project_id)},
+        headers=teacher_headers,
+    )
+    assert r.status_code == 200
+    assert r.json()["counts"]["queued"] == 2
+    assert len(r.json()["jobs"]) == 2
+
+    r = client.get(f"/api/marking/jobs/{jobs[0]['id']}", headers=teacher_headers)
+    assert r.status_code == 200
+    assert r.json()["submission_id"] in {str(submission.id), jobs[1]["submission_id"]}
+    r = client.get(f"/api/marking/jobs/{submission.id}", headers=teacher_headers)
+    assert r.status_code == 404
+    r = client.post(f"/api/marking/grade/{jobs[0]['id']}/jobs", headers=teacher_headers)
+    assert r.status_code == 404
+
@@ -0,0 +1,73 @@
+"""
+Tests for ETag / conditional GET on the read-heavy student endpoints.
+Run with: python -m pytest tests/test_http_cache.py -v
+"""
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.auth import create_access_token
+
+client = TestClient(app)
+
+
+def _student_headers(student):
+    token = create_access_token(data={"sub": str(student.id), "role": "student"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_student_list_not_modified(make_submission):
+    make_submission()
+    r = client.get("/api/student/list", params={"class_group": "TST"})
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    assert r.headers["last-modified"]
+
+    r = client.get("/api/student/list", params={"class_group": "TST"},
+                   headers={"If-None-Match": etag})
+    assert r.status_code == 304 and r.content == b""
+
+    make_submission()  # adds a student to TST
+    r = client.get("/api/student/list", params={"class_group": "TST"},
+                   headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+
+
+def test_project_etag_changes_after_update(make_submission, teacher_headers):
+    submission = make_submission()
+    project = submission.project
+    headers = _student_headers(submission.student)
+
+    r = client.get(f"/api/student/projects/{project.id}", headers=headers)
+    assert r.status_code == 200
+    assert r.json()["title"] == project.title
+    etag = r.headers["etag"]
+
+    r = client.get("/api/student/projects", headers=headers)
+    assert r.status_code == 200 and any(p["id"] == str(project.id) for p in r.json())
+    list_etag = r.headers["etag"]
+
+    r = client.get(f"/api/student/projects/{project.id}",
+                   headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 304
+
+    r = client.put(
+        f"/api/projects/{project.id}",
+        json={
+            "title": "Renamed",
+            "genre": project.genre,
+            "instructions": project.instructions,
+            "stimulus_html": project.stimulus_html,
+            "assigned_class_groups": ["TST"],
+        },
+        headers=teacher_headers,
+    )
+    assert r.status_code == 200, r.text
+
+    r = client.get(f"/api/student/projects/{project.id}",
+                   headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag and r.json()["title"] == "Renamed"
+
+    r = client.get("/api/student/projects", headers={**headers, "If-None-Match": list_etag})
+    assert r.status_code == 200
+    assert any(p["title"] == "Renamed" for p in r.json())
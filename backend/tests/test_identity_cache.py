@@ -0,0 +1,116 @@
+"""
+Tests for the token/identity cache used by the auth dependencies.
+Run with: python -m pytest tests/test_identity_cache.py -v
+"""
+import asyncio
+import socket
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.ws import ConnectionManager
+from src.main import app
+from src.services.broadcast import UnixSocketBackend
+from src.services.identity_cache import IdentityCache, TeacherIdentity, identity_cache
+
+client = TestClient(app)
+
+
+def _teacher_identity():
+    return TeacherIdentity(
+        id=uuid.uuid4(),
+        username="t",
+        full_name="Teacher",
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+def test_identity_hit_miss_and_invalidation():
+    cache = IdentityCache(ttl_seconds=30)
+    identity = _teacher_identity()
+    assert cache.get_identity("teacher", str(identity.id)) is None
+    cache.put_identity("teacher", str(identity.id), identity)
+    assert cache.get_identity("teacher", str(identity.id)) is identity
+    cache.invalidate_role("teacher")
+    assert cache.get_identity("teacher", str(identity.id)) is None
+
+    stats = cache.stats()
+    assert stats["identity_hits"] == 1
+    assert stats["identity_misses"] == 2
+    assert stats["invalidations"] == 1
+
+
+def test_entries_expire_and_respect_token_exp():
+    cache = IdentityCache(ttl_seconds=0.05)
+    cache.put_identity("teacher", "a", _teacher_identity())
+    time.sleep(0.06)
+    assert cache.get_identity("teacher", "a") is None
+
+    cache = IdentityCache(ttl_seconds=60)
+    cache.put_claims("token", {"sub": "a", "exp": time.time() - 1})
+    assert cache.get_claims("token") is None
+
+
+def test_invalidate_role_and_lru_bound():
+    cache = IdentityCache(ttl_seconds=30, max_entries=2)
+    for subject in ("a", "b", "c"):
+        cache.put_identity("student", subject, _teacher_identity())
+    assert cache.get_identity("student", "a") is None
+    cache.put_identity("teacher", "t", _teacher_identity())
+    cache.invalidate_role("student")
+    assert cache.get_identity("student", "c") is None
+    assert cache.get_identity("teacher", "t") is not None
+
+
+def test_repeat_requests_skip_identity_lookup():
+    r = client.post("/api/auth/login", json={"username": "admin", "password": "abigail2026"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    identity_cache.clear()
+    before = identity_cache.stats()
+
+    first = client.get("/api/auth/me", headers=headers)
+    second = client.get("/api/auth/me", headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    after = identity_cache.stats()
+    assert after["identity_misses"] - before["identity_misses"] == 1
+    assert after["identity_hits"] - before["identity_hits"] == 1
+
+
+@pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX") or sys.platform == "win32",
+    reason="Unix datagram sockets are not available on this platform",
+)
+def test_invalidation_reaches_other_workers(tmp_path):
+    identity = _teacher_identity()
+    caches = [IdentityCache(ttl_seconds=30), IdentityCache(ttl_seconds=30)]
+    managers = [ConnectionManager(UnixSocketBackend(str(tmp_path))) for _ in caches]
+    for cache, manager in zip(caches, managers):
+        manager.subscribe("identity_cache", cache.apply_invalidation)
+        cache.set_relay(lambda message, manager=manager: manager.publish_internal("identity_cache", message))
+        cache.put_identity("teacher", str(identity.id), identity)
+
+    async def scenario():
+        for manager in managers:
+            await manager.start()
+        try:
+            # Roster writes run on the threadpool
+            await asyncio.to_thread(caches[0].invalidate_role, "teacher")
+            for _ in range(50):
+                if caches[1].get_identity("teacher", str(identity.id)) is None:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            for manager in managers:
+                await manager.stop()
+
+    asyncio.run(scenario())
+    assert caches[0].get_identity("teacher", str(identity.id)) is None
+    assert caches[1].get_identity("teacher", str(identity.id)) is None
+    # Applied once on each worker; the publisher ignores its own relay
+    assert [cache.stats()["invalidations"] for cache in caches] == [1, 1]
@@ -0,0 +1,126 @@
+"""
+Tests for the A/B marking harness (marking_trials and the comparison report).
+Run with: python -m pytest tests/test_marking_comparison.py -v
+"""
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+import compare_models
+from src.database import ReadSessionLocal
+from src.models.base import AssessmentResult, MarkingTrial
+from src.services import ollama_client
+from src.services.marking_comparison import MarkingComparison, MarkingConfig
+
+REPLIES = {
+    "big": {"total_score": 30, "criteria": {
+        "audience": {"score": 4, "max_score": 6}, "spelling": {"score": 5, "max_score": 6},
+    }},
+    "small": {"total_score": 28, "criteria": {
+        "audience": {"score": 4, "max_score": 6}, "spelling": {"score": 3, "max_score": 6},
+    }},
+}
+
+
+class _FakeResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self._body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def fake_ollama(monkeypatch):
+    monkeypatch.setattr(
+        ollama_client.requests, "get",
+        lambda *args, **kwargs: _FakeResponse({"models": [
+            {"name": "big:latest", "digest": "sha256:b1"}, {"name": "small:latest", "digest": "sha256:s1"},
+        ]}),
+    )
+
+    def post(url, **kwargs):
+        model = kwargs["json"]["model"]
+        return _FakeResponse({
+            "model": model,
+            "response": json.dumps(REPLIES[model]),
+            "eval_count": 200 if model == "big" else 300,
+            "eval_duration": 10_000_000_000 if model == "big" else 5_000_000_000,
+        })
+
+    monkeypatch.setattr(ollama_client.requests, "post", post)
+
+
+def test_parse_config():
+    assert MarkingConfig.parse("mistral") == MarkingConfig(name="mistral", model="mistral")
+    assert MarkingConfig.parse("q4=qwen2.5:3b").model == "qwen2.5:3b"
+    with pytest.raises(ValueError):
+        MarkingConfig.parse("q4=")
+
+
+def test_run_stores_trials_and_reports_agreement(make_submission, fake_ollama):
+    project = make_submission().project
+    for _ in range(2):
+        make_submission(project=project)
+    with ReadSessionLocal() as db:
+        results_before = db.scalar(select(func.count(AssessmentResult.id)))
+        submissions = MarkingComparison.load_submissions(db, project_id=project.id)
+    assert len(submissions) == 3
+
+    run_id = MarkingComparison.run(
+        [MarkingConfig.parse("A=big"), MarkingConfig.parse("B=small")],
+        submissions, concurrency=2, run_id=f"test-{project.id}",
+    )
+
+    with ReadSessionLocal() as db:
+        assert db.scalar(select(func.count(AssessmentResult.id))) == results_before
+        trials = db.scalars(select(MarkingTrial).where(MarkingTrial.run_id == run_id)).all()
+        report = MarkingComparison.report(db, run_id)
+    assert len(trials) == 6 and all(t.error is None for t in trials)
+    assert {t.model_digest for t in trials} == {"sha256:b1", "sha256:s1"}
+
+    assert report["reference"] == "A"
+    a, b = report["configs"]
+    assert a["agreement"]["total"]["exact"] == 1.0
+    assert b["agreement"]["total"]["exact"] == 0.0
+    assert b["agreement"]["total"]["mean_abs_diff"] == 2.0
+    assert b["agreement"]["criteria"]["audience"]["exact"] == 1.0
+    assert b["agreement"]["criteria"]["spelling"]["within_1"] == 0.0
+    assert a["tokens_per_s"] == 20.0 and b["tokens_per_s"] == 60.0
+
+
+def test_failed_trials_are_recorded(make_submission, fake_ollama, monkeypatch):
+    submission = make_submission()
+    monkeypatch.setattr(
+        ollama_client.requests, "post",
+        lambda *args, **kwargs: _FakeResponse({"response": "not json"}),
+    )
+    with ReadSessionLocal() as db:
+        submissions = MarkingComparison.load_submissions(db, submission_ids=[submission.id])
+    run_id = MarkingComparison.run([MarkingConfig.parse("big")], submissions, run_id=f"fail-{submission.id}")
+    with ReadSessionLocal() as db:
+        report = MarkingComparison.report(db, run_id)
+        trial = db.scalars(select(MarkingTrial).where(MarkingTrial.run_id == run_id)).one()
+    assert trial.total_score is None and trial.error.startswith("ValueError")
+    assert report["configs"][0]["errors"] == 1
+
+
+def test_cli_runs_from_a_configs_file(make_submission, fake_ollama, tmp_path, capsys):
+    submission = make_submission()
+    arms = tmp_path / "arms.json"
+    arms.write_text(json.dumps([
+        {"name": "big", "model": "big", "options": {"temperature": 0}},
+        {"name": "small", "model": "small"},
+    ]))
+    code = compare_models.main([
+        "--configs", str(arms), "--submission", str(submission.id), "--run-id", f"cli-{submission.id}",
+    ])
+    assert code == 0
+    out = capsys.readouterr().out
+    assert "Per-criterion agreement" in out and "spelling" in out
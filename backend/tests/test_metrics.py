@@ -0,0 +1,86 @@
+"""
+Tests for the Prometheus metrics registry and the /api/metrics endpoint.
+Run with: python -m pytest tests/test_metrics.py -v
+"""
+from fastapi.testclient import TestClient
+
+from src.api import metrics as metrics_api
+from src.main import app
+from src.services.auth import create_access_token
+from src.services.metrics import (
+    AUTOSAVES,
+    DB_COMMIT_SECONDS,
+    HTTP_REQUESTS,
+    Histogram,
+    MetricsRegistry,
+)
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("test_seconds", "Test latency.", ("route",), buckets=(0.1, 1))
+    latency.observe(0.05, route="/a")
+    latency.observe(0.5, route="/a")
+    latency.observe(5, route="/a")
+    text = registry.render()
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{route="/a",le="1"} 2' in text
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in text
+    assert 'test_seconds_count{route="/a"} 3' in text
+    assert "# TYPE test_seconds histogram" in text
+    assert isinstance(latency, Histogram)
+
+
+def test_requests_are_labelled_by_route_template(make_submission, teacher_headers):
+    submission = make_submission()
+    route = "/api/submissions/project/{project_id}"
+    before = HTTP_REQUESTS.value(route=route, method="GET", status="200")
+    client.get(f"/api/submissions/project/{submission.project_id}", headers=teacher_headers)
+    assert HTTP_REQUESTS.value(route=route, method="GET", status="200") == before + 1
+
+    before = HTTP_REQUESTS.value(route="(unmatched)", method="GET", status="404")
+    client.get("/api/no-such-route")
+    assert HTTP_REQUESTS.value(route="(unmatched)", method="GET", status="404") == before + 1
+
+
+def test_autosave_outcomes_and_commit_latency(make_submission):
+    draft = make_submission(status="DRAFT")
+    locked = make_submission(status="SUBMITTED")
+    saved_before = AUTOSAVES.value(outcome="saved")
+    locked_before = AUTOSAVES.value(outcome="locked")
+    commits_before = DB_COMMIT_SECONDS.count(role="write")
+
+    for submission in (draft, locked):
+        token = create_access_token(data={"sub": str(submission.student_id), "role": "student"})
+        r = client.post(
+            f"/api/student/submissions/{submission.project_id}",
+            json={"content_raw": "Autosaved text."},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert r.status_code == 200
+
+    assert AUTOSAVES.value(outcome="saved") == saved_before + 1
+    assert AUTOSAVES.value(outcome="locked") == locked_before + 1
+    assert DB_COMMIT_SECONDS.count(role="write") > commits_before
+
+
+def test_metrics_endpoint_exposition():
+    r = client.get("/api/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = r.text
+    assert "# TYPE abigail_http_requests_total counter" in body
+    assert "# TYPE abigail_grading_in_progress gauge" in body
+    assert "abigail_db_queries_total{role=" in body
+    assert "abigail_threadpool_size " in body
+
+
+def test_metrics_token(monkeypatch):
+    monkeypatch.setattr(metrics_api, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/api/metrics").status_code == 401
+    wrong = client.get("/api/metrics", headers={"Authorization": "Bearer nope"})
+    assert wrong.status_code == 401
+    ok = client.get("/api/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert ok.status_code == 200
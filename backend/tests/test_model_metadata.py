@@ -0,0 +1,89 @@
+"""
+Tests for the model and run metadata recorded on each AssessmentResult.
+Run with: python -m pytest tests/test_model_metadata.py -v
+"""
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services import naplan_marking_service, ollama_client
+
+client = TestClient(app)
+
+VALID_REPLY = '{"total_score": 30, "criteria": {}}'
+
+
+class _FakeResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self._body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._body
+
+
+def _fake_ollama(monkeypatch, replies):
+    """Serve /api/tags and a queue of /api/generate replies."""
+    replies = list(replies)
+    monkeypatch.setattr(
+        ollama_client.requests, "get",
+        lambda *args, **kwargs: _FakeResponse(
+            {"models": [{"name": "mistral:latest", "digest": "sha256:f974a74358d6"}]}
+        ),
+    )
+    monkeypatch.setattr(
+        ollama_client.requests, "post",
+        lambda *args, **kwargs: _FakeResponse({
+            "model": "mistral:latest",
+            "response": replies.pop(0),
+            "prompt_eval_count": 1800,
+            "eval_count": 400,
+            "prompt_eval_duration": 2_500_000_000,
+            "eval_duration": 8_000_000_000,
+        }),
+    )
+
+
+def _grade(submission, teacher_headers):
+    r = client.post(f"/api/marking/grade/{submission.id}", headers=teacher_headers)
+    assert r.status_code == 200, r.text
+    r = client.get(f"/api/marking/results/{r.json()['assessment_id']}", headers=teacher_headers)
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_result_records_model_and_run(make_submission, teacher_headers, monkeypatch):
+    _fake_ollama(monkeypatch, [VALID_REPLY] * 3)
+    first = _grade(make_submission(content="The storm came at dusk."), teacher_headers)
+    assert first["model_name"] == "mistral:latest"
+    assert first["model_digest"] == "sha256:f974a74358d6"
+    assert first["prompt_eval_count"] == 1800
+    assert first["eval_count"] == 400
+    assert first["prompt_eval_ms"] == 2500.0
+    assert first["eval_ms"] == 8000.0
+    assert first["attempts"] == 1
+
+    # Same template and rubric, different essay: same prompt hash
+    second = _grade(make_submission(content="A different story entirely."), teacher_headers)
+    assert second["prompt_hash"] == first["prompt_hash"]
+    persuasive = _grade(make_submission(genre="PERSUASIVE"), teacher_headers)
+    assert persuasive["prompt_hash"] != first["prompt_hash"]
+
+
+def test_invalid_reply_is_not_retried_by_default(make_submission, teacher_headers, monkeypatch):
+    _fake_ollama(monkeypatch, ["Sorry, here is my assessment", VALID_REPLY])
+    r = client.post(f"/api/marking/grade/{make_submission().id}", headers=teacher_headers)
+    assert r.status_code == 400
+
+
+def test_invalid_reply_is_retried_and_counted(make_submission, teacher_headers, monkeypatch):
+    monkeypatch.setattr(naplan_marking_service, "GRADING_MAX_ATTEMPTS", 2)
+    _fake_ollama(monkeypatch, ["Sorry, here is my assessment", VALID_REPLY])
+    result = _grade(make_submission(), teacher_headers)
+    assert result["attempts"] == 2
+    assert result["total_score"] == 30
+    assert result["eval_count"] == 800
+    assert result["eval_ms"] == 16000.0
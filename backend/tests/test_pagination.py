@@ -0,0 +1,77 @@
+"""
+Tests for keyset-paginated submission and student listings.
+Run with: python -m pytest tests/test_pagination.py -v
+"""
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+
+client = TestClient(app)
+
+
+def _pages(url, headers=None, **params):
+    pages, cursor = [], None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        r = client.get(url, params=query, headers=headers or {})
+        assert r.status_code == 200, r.text
+        pages.append(r.json())
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+
+def test_submissions_keyset_pages_and_filters(make_submission, teacher_headers):
+    first = make_submission(status="DRAFT")
+    project_id = str(first.project_id)
+    for i in range(4):
+        make_submission(project=first.project, status="SUBMITTED" if i % 2 else "DRAFT")
+
+    pages = _pages("/api/submissions", teacher_headers, project_id=project_id, limit=2)
+    assert [len(p) for p in pages] == [2, 2, 1]
+    rows = [s for page in pages for s in page]
+    assert len({s["id"] for s in rows}) == 5
+    keys = [(s["last_updated_at"], s["id"]) for s in rows]
+    assert keys == sorted(keys)
+
+    submitted = _pages(
+        "/api/submissions", teacher_headers, project_id=project_id, status="SUBMITTED"
+    )
+    assert len(submitted[0]) == 2
+
+    future = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+    r = client.get(
+        "/api/submissions",
+        params={"project_id": project_id, "updated_since": future},
+        headers=teacher_headers,
+    )
+    assert r.json() == []
+
+    r = client.get("/api/submissions", params={"class_group": "TST", "limit": 1},
+                   headers=teacher_headers)
+    assert r.status_code == 200 and len(r.json()) == 1
+
+
+def test_student_list_pages_by_class(make_submission):
+    for _ in range(3):
+        make_submission()
+    pages = _pages("/api/student/list", class_group="TST", limit=2)
+    students = [s for page in pages for s in page]
+    assert all(s["class_group"] == "TST" for s in students)
+    assert len(students) == len({s["id"] for s in students}) >= 3
+    keys = [(s["class_group"], s["name"]) for s in students]
+    assert keys == sorted(keys)
+
+
+def test_login_class_groups_are_public(make_submission):
+    make_submission()
+    r = client.get("/api/student/class-groups")
+    assert r.status_code == 200
+    assert "TST" in r.json()
+
+
+def test_invalid_cursor_is_rejected():
+    r = client.get("/api/student/list", params={"cursor": "not-a-cursor"})
+    assert r.status_code == 400
@@ -0,0 +1,59 @@
+"""
+Tests for the dialect-aware JSON columns and class-group filter.
+Run with: python -m pytest tests/test_postgres_support.py -v
+"""
+from sqlalchemy import create_engine, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from src.models.base import AssessmentResult, Base, Project
+from src.models.types import JsonArrayContains
+from src.services.project_service import ProjectService
+
+
+def _compile(element, dialect):
+    return str(element.compile(dialect=dialect))
+
+
+def test_json_columns_are_jsonb_on_postgres_only():
+    pg = _compile(CreateTable(Project.__table__), postgresql.dialect())
+    assert "assigned_class_groups JSONB NOT NULL" in pg
+    lite = _compile(CreateTable(Project.__table__), sqlite.dialect())
+    assert "assigned_class_groups JSON NOT NULL" in lite
+    assert "criteria_scores JSONB" in _compile(
+        CreateTable(AssessmentResult.__table__), postgresql.dialect()
+    )
+
+
+def test_gin_indexes_are_postgres_only():
+    index = next(i for i in Project.__table__.indexes if i.name.endswith("_gin"))
+    assert "USING gin" in _compile(CreateIndex(index), postgresql.dialect())
+
+    lite = create_engine("sqlite://")
+    Base.metadata.create_all(bind=lite)
+    names = {i["name"] for i in inspect(lite).get_indexes("projects")}
+    assert index.name not in names
+
+
+def test_class_group_filter_compiles_per_dialect():
+    stmt = select(Project.id).where(JsonArrayContains(Project.assigned_class_groups, "7A"))
+    assert "@> jsonb_build_array" in _compile(stmt, postgresql.dialect())
+    assert "json_each(projects.assigned_class_groups)" in _compile(stmt, sqlite.dialect())
+
+
+def test_class_group_filter_matches_whole_groups_only(db):
+    exact = Project(
+        title="Exact", genre="NARRATIVE", instructions="i", stimulus_html="s",
+        assigned_class_groups=["7A", "7B"],
+    )
+    prefix = Project(
+        title="Prefix", genre="NARRATIVE", instructions="i", stimulus_html="s",
+        assigned_class_groups=["7AB"],
+    )
+    db.add_all([exact, prefix])
+    db.commit()
+
+    titles = {p.title for p in ProjectService.get_projects_by_class_group(db, "7A")}
+    assert "Exact" in titles
+    assert "Prefix" not in titles
+    db.commit()
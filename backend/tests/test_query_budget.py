@@ -0,0 +1,80 @@
+"""
+Query budgets for the endpoints that return lists or related rows.
+
+Each request is made once to warm the identity and response caches, then
+measured; adding rows must not add queries.
+Run with: python -m pytest tests/test_query_budget.py -v
+"""
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.auth import create_access_token
+from src.services.ollama_client import OllamaClient
+
+client = TestClient(app)
+
+
+def _measure(query_budget, limit, request):
+    request()  # warm caches
+    with query_budget(limit) as statements:
+        response = request()
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+
+def test_dashboard_listing_is_constant(make_submission, teacher_headers, query_budget):
+    project = make_submission().project
+
+    def listing():
+        return client.get(
+            "/api/submissions", params={"project_id": str(project.id)}, headers=teacher_headers
+        )
+
+    few = _measure(query_budget, 1, listing)
+    for _ in range(10):
+        make_submission(project=project)
+    assert _measure(query_budget, 1, listing) == few
+
+    def by_project():
+        return client.get(f"/api/submissions/project/{project.id}", headers=teacher_headers)
+
+    _measure(query_budget, 1, by_project)
+
+
+def test_student_project_list(make_submission, query_budget):
+    submission = make_submission()
+    token = create_access_token(data={"sub": str(submission.student_id), "role": "student"})
+    headers = {"Authorization": f"Bearer {token}"}
+    # Version check only; the list itself comes from the response cache
+    _measure(query_budget, 1, lambda: client.get("/api/student/projects", headers=headers))
+
+
+def test_bundle_export_is_constant(make_submission, teacher_headers, query_budget):
+    project = make_submission().project
+
+    def export():
+        return client.get(
+            f"/api/submissions/export/{project.id}", params={"mode": "bundle"}, headers=teacher_headers
+        )
+
+    # Project and watermark; then one streaming query unless the artifact is cached
+    few = _measure(query_budget, 3, export)
+    for _ in range(10):
+        make_submission(project=project)
+    assert _measure(query_budget, 3, export) == few
+
+
+def test_grading_loads_submission_and_project_together(make_submission, teacher_headers, query_budget, monkeypatch):
+    submission = make_submission()
+    monkeypatch.setattr(OllamaClient, "check_health", lambda self: True)
+    monkeypatch.setattr(
+        OllamaClient, "generate_detailed",
+        lambda self, prompt, system=None: {"response": '{"total_score": 30, "criteria": {}}'},
+    )
+    # Existing-result check, job insert, submission + project, insert, refresh,
+    # job finish; the two job statements make the grade recoverable after a crash
+    with query_budget(6) as statements:
+        r = client.post(f"/api/marking/grade/{submission.id}", headers=teacher_headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["total_score"] == 30
+    assert sum("JOIN projects" in s for s in statements) == 1
@@ -0,0 +1,65 @@
+"""
+Tests for per-statement query stats, route tagging and the slow-query log.
+Run with: python -m pytest tests/test_query_stats.py -v
+"""
+from fastapi.testclient import TestClient
+
+from src.database import IS_SQLITE
+from src.main import app
+from src.services.query_stats import fingerprint, query_stats
+
+client = TestClient(app)
+
+
+def test_fingerprint_groups_in_lists_and_whitespace():
+    a = fingerprint("SELECT id FROM students\n  WHERE id IN (?, ?, ?) LIMIT 10")
+    b = fingerprint("SELECT id FROM students WHERE id IN (?, ?) LIMIT 50")
+    assert a == b == "SELECT id FROM students WHERE id IN (?) LIMIT ?"
+
+
+def test_statements_are_tagged_with_route_and_rows(make_submission, teacher_headers):
+    project = make_submission().project
+    for _ in range(4):
+        make_submission(project=project)
+    client.get("/api/submissions", params={"project_id": str(project.id)}, headers=teacher_headers)
+
+    query_stats.reset()
+    r = client.get("/api/submissions", params={"project_id": str(project.id)}, headers=teacher_headers)
+    assert r.status_code == 200 and len(r.json()) == 5
+
+    listing = [
+        s for s in query_stats.statements(50)
+        if s["route"] == "/api/submissions" and "FROM submissions" in s["statement"]
+    ]
+    assert len(listing) == 1
+    assert listing[0]["count"] == 1
+    assert listing[0]["rows"] == 5
+    assert sum(listing[0]["histogram"].values()) == 1
+
+
+def test_slow_statements_are_logged_with_plan(make_submission, teacher_headers, monkeypatch, caplog):
+    submission = make_submission()
+    monkeypatch.setattr(query_stats, "slow_query_ms", 0)
+    query_stats.reset()
+    with caplog.at_level("WARNING", logger="src.services.query_stats"):
+        client.get(f"/api/submissions/project/{submission.project_id}", headers=teacher_headers)
+
+    slow = [s for s in query_stats.slow_queries() if "FROM submissions" in s["statement"]]
+    assert slow and slow[0]["route"] == "/api/submissions/project/{project_id}"
+    if IS_SQLITE:
+        assert any("ix_submissions_project_id_status" in line for line in slow[0]["plan"])
+    assert "Slow query" in caplog.text
+
+
+def test_query_diagnostics_endpoint(teacher_headers):
+    assert client.get("/api/diagnostics/queries").status_code == 401
+
+    r = client.get("/api/diagnostics/queries", params={"limit": 5}, headers=teacher_headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert set(body) == {"slow_query_ms", "roles", "statements", "slow"}
+    assert len(body["statements"]) <= 5
+
+    assert client.delete("/api/diagnostics/queries", headers=teacher_headers).status_code == 204
+    # Only the statements issued after the reset (the teacher lookup is cached)
+    assert query_stats.statements() == []
@@ -0,0 +1,120 @@
+"""
+Tests for bulk roster import.
+Run with: python -m pytest tests/test_roster_import.py -v
+"""
+import csv
+import io
+
+from sqlalchemy import select
+
+from src.database import SessionLocal
+from src.models.base import Student
+from src.services import roster_service
+from src.services.roster_service import RosterService
+
+HEADER = ["Name", "Year Level", "ID Code", "Class Group", "Password", "Avatar ID"]
+
+
+def _csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADER)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def _students(db, prefix):
+    stmt = select(Student).where(Student.id_code.like(f"{prefix}%")).order_by(Student.id_code)
+    return {s.id_code: s for s in db.execute(stmt).scalars()}
+
+
+def test_import_creates_updates_and_reports_errors():
+    db = SessionLocal()
+    try:
+        results = RosterService.process_csv(db, _csv([
+            ["Ada", "7", "IMP001", "7A", "pw1", "avatar1"],
+            ["Ben", "7", "IMP002", "7A", "pw2", "avatar2"],
+            ["", "7", "IMP003", "7A", "pw3", "avatar3"],
+            ["Cat", "seven", "IMP004", "7A", "pw4", "avatar1"],
+        ]))
+        assert results["total"] == 4
+        assert results["created"] == 2
+        assert results["updated"] == 0
+        assert len(results["errors"]) == 2
+        assert results["errors"][0].startswith("Row 3: Missing columns ['Name']")
+        assert results["errors"][1].startswith("Row 4:")
+
+        original_hash = _students(db, "IMP")["IMP001"].password_hash
+        results = RosterService.process_csv(db, _csv([
+            ["Ada Lovelace", "8", "IMP001", "8B", "pw1", "avatar3"],
+            ["Ben", "7", "IMP002", "7A", "changed", "avatar2"],
+        ]))
+        assert (results["created"], results["updated"], results["errors"]) == (0, 2, [])
+
+        db.expire_all()
+        students = _students(db, "IMP")
+        ada = students["IMP001"]
+        assert (ada.name, ada.year_level, ada.class_group) == ("Ada Lovelace", 8, "8B")
+        # Unchanged password keeps its stored hash; changed password is rehashed
+        assert ada.password_hash == original_hash
+        assert roster_service.verify_password("changed", students["IMP002"].password_hash)
+    finally:
+        db.close()
+
+
+def test_large_import_uses_hash_pool_and_chunks(monkeypatch):
+    # Chunks smaller than the pool threshold: the import as a whole decides
+    monkeypatch.setattr(roster_service, "ROSTER_CHUNK_SIZE", 10)
+    monkeypatch.setattr(roster_service, "ROSTER_HASH_PROCESSES", 2)
+    executors = []
+    real_executor = roster_service._hash_executor
+    monkeypatch.setattr(
+        roster_service, "_hash_executor", lambda: executors.append(real_executor()) or executors[-1]
+    )
+    rows = [[f"Pupil {i}", "5", f"BULK{i:03d}", "5C", f"pw{i}", "avatar1"] for i in range(45)]
+    db = SessionLocal()
+    try:
+        results = RosterService.process_csv(db, _csv(rows))
+        assert (results["total"], results["created"], results["errors"]) == (45, 45, [])
+        assert len(executors) == 1
+        # Worker processes are never forked from the threaded server
+        assert executors[0]._mp_context.get_start_method() in ("forkserver", "spawn")
+        students = _students(db, "BULK")
+        assert len(students) == 45
+        assert roster_service.verify_password("pw39", students["BULK039"].password_hash)
+    finally:
+        db.close()
+
+
+def test_upload_streams_bom_csv_and_reports_progress(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from src.api.ws import manager
+    from src.main import app
+
+    client = TestClient(app)
+    token = client.post(
+        "/api/auth/login", json={"username": "admin", "password": "abigail2026"}
+    ).json()["access_token"]
+
+    messages = []
+
+    async def capture(message):
+        messages.append(message)
+
+    monkeypatch.setattr(manager, "broadcast", capture)
+    monkeypatch.setattr(roster_service, "ROSTER_CHUNK_SIZE", 2)
+    rows = [[f"Streamed {i}", "6", f"STRM{i:02d}", "6D", "pw", "avatar2"] for i in range(5)]
+    payload = b"\xef\xbb\xbf" + _csv(rows).encode("utf-8")
+
+    r = client.post(
+        "/api/roster/upload",
+        headers={"Authorization": f"Bearer {token}"},
+        files={"file": ("roster.csv", payload, "text/csv")},
+    )
+
+    assert r.status_code == 200, r.text
+    assert (r.json()["total"], r.json()["created"], r.json()["errors"]) == (5, 5, [])
+    progress = [m["data"]["processed"] for m in messages if m["type"] == "ROSTER_IMPORT_PROGRESS"]
+    assert progress == [2, 4, 5]
+    assert messages[-1]["type"] == "ROSTER_IMPORT_COMPLETE"
@@ -0,0 +1,64 @@
+"""
+Tests for precompressed, cache-headed static file serving.
+Run with: python -m pytest tests/test_static_files.py -v
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from precompress_static import precompress
+from src.services.static_files import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    VITE_HASHED_ASSET,
+    CachedStaticFiles,
+    accepted_encodings,
+)
+
+BUNDLE = b"console.log('abigail');\n" * 200
+
+
+def _client(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "assets" / "index-Bq3x_9Zk.js").write_bytes(BUNDLE)
+    (tmp_path / "index.html").write_text("<html>" + "<div></div>" * 200 + "</html>")
+    precompress(str(tmp_path))
+    app = FastAPI()
+    app.mount(
+        "/",
+        CachedStaticFiles(directory=str(tmp_path), html=True, immutable_pattern=VITE_HASHED_ASSET),
+    )
+    return TestClient(app)
+
+
+def test_serves_precompressed_sibling_with_immutable_headers(tmp_path):
+    client = _client(tmp_path)
+    assert (tmp_path / "assets" / "index-Bq3x_9Zk.js.gz").exists()
+
+    r = client.get("/assets/index-Bq3x_9Zk.js", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["content-type"].startswith("text/javascript")
+    assert r.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert int(r.headers["content-length"]) < len(BUNDLE)
+    assert r.content == BUNDLE  # httpx decodes the gzip body
+
+    r = client.get("/assets/index-Bq3x_9Zk.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert int(r.headers["content-length"]) == len(BUNDLE)
+
+
+def test_index_is_revalidated(tmp_path):
+    client = _client(tmp_path)
+    r = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+    etag = r.headers["etag"]
+    r = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert r.status_code == 304
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, gzip;q=0.5") == {"gzip"}
+    assert accepted_encodings(None) == set()
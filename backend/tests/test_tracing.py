@@ -0,0 +1,134 @@
+"""
+Tests for request tracing spans, the trace file and trace_report.py.
+Run with: python -m pytest tests/test_tracing.py -v
+"""
+import json
+
+from fastapi.testclient import TestClient
+
+import trace_report
+from src.main import app
+from src.services import ollama_client
+from src.services.ollama_client import OllamaClient
+from src.services.tracing import span, start_trace, trace_writer
+
+client = TestClient(app)
+
+
+def _traces():
+    trace_writer.flush()
+    return list(trace_report.load_traces(trace_writer.path))
+
+
+class _FakeOllamaResponse:
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {
+            "response": '{"total_score": 30, "criteria": {}}',
+            "prompt_eval_count": 1800,
+            "eval_count": 400,
+            "prompt_eval_duration": 2_500_000_000,
+            "eval_duration": 8_000_000_000,
+            "total_duration": 11_000_000_000,
+        }
+
+
+def test_request_id_is_echoed_and_trace_written(teacher_headers):
+    r = client.get("/api/projects", headers={**teacher_headers, "X-Request-ID": "lesson-3.req-42"})
+    assert r.headers["x-request-id"] == "lesson-3.req-42"
+    trace = next(t for t in _traces() if t["trace_id"] == "lesson-3.req-42")
+    assert trace["name"] == "GET /api/projects"
+    root = trace["spans"][0]
+    assert root["parent"] is None and root["attributes"]["status"] == 200
+
+    # Unusable IDs are replaced rather than written to the log
+    r = client.get("/health", headers={"X-Request-ID": "bad id\twith spaces"})
+    assert r.headers["x-request-id"] != "bad id\twith spaces"
+
+
+def test_grading_trace_breaks_down_steps(make_submission, teacher_headers, monkeypatch):
+    submission = make_submission()
+    monkeypatch.setattr(OllamaClient, "check_health", lambda self: True)
+    monkeypatch.setattr(ollama_client.requests, "post", lambda *args, **kwargs: _FakeOllamaResponse())
+
+    r = client.post(
+        f"/api/marking/grade/{submission.id}",
+        headers={**teacher_headers, "X-Request-ID": f"grade-{submission.id}"},
+    )
+    assert r.status_code == 200, r.text
+
+    trace = next(t for t in _traces() if t["trace_id"] == f"grade-{submission.id}")
+    spans = {s["name"]: s for s in trace["spans"]}
+    for name in ("grading.load_submission", "grading.load_rubric", "grading.build_prompt",
+                 "grading.parse_response", "grading.save_result"):
+        assert spans[name]["parent"] == spans["grading.grade_submission"]["id"]
+    ollama = spans["ollama.generate"]["attributes"]
+    assert ollama["eval_count"] == 400
+    assert ollama["prompt_eval_ms"] == 2500.0
+
+    report = trace_report.summarise([trace])
+    assert report["spans"]["ollama.generate (generation)"]["total_ms"] == 8000.0
+    assert report["ollama"]["tokens_per_s"] == 50.0
+    assert any("grading.save_result" in line for line in trace_report.format_tree(trace))
+
+
+def test_spans_outside_requests_start_their_own_trace(tmp_path, monkeypatch):
+    monkeypatch.setattr(trace_writer, "path", str(tmp_path / "traces.jsonl"))
+    with span("job.run", kind="test"):
+        with span("job.step"):
+            pass
+    with start_trace("discarded"):
+        pass
+    trace_writer.flush()
+    lines = (tmp_path / "traces.jsonl").read_text().splitlines()
+    job = json.loads(lines[0])
+    assert job["name"] == "job.run"
+    assert [s["name"] for s in job["spans"]] == ["job.run", "job.step"]
+    assert len(lines) == 2
+
+
+def test_trace_file_rotates_and_report_reads_backups(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(trace_writer, "path", str(tmp_path / "traces.jsonl"))
+    monkeypatch.setattr(trace_writer, "max_bytes", 600)
+    for _ in range(10):
+        with span("job.run"):
+            pass
+    trace_writer.flush()
+    assert len(trace_report.trace_files(trace_writer.path)) > 1
+    assert trace_report.main([trace_writer.path, "--slowest", "1"]) == 0
+    assert "job.run" in capsys.readouterr().out
+    assert len(list(trace_report.load_traces(trace_writer.path))) == 10
+
+
+def test_fast_traces_are_skipped_and_writes_do_not_block(tmp_path, monkeypatch):
+    import threading
+
+    monkeypatch.setattr(trace_writer, "path", str(tmp_path / "traces.jsonl"))
+    monkeypatch.setattr(trace_writer, "min_ms", 50)
+    with span("job.fast"):
+        pass
+    trace_writer.flush()
+    assert not (tmp_path / "traces.jsonl").exists()
+
+    monkeypatch.setattr(trace_writer, "min_ms", 0)
+    written = trace_writer.written
+    writing = threading.Event()
+    release = threading.Event()
+    append = trace_writer._append
+
+    def slow_append(trace):
+        writing.set()
+        release.wait(5)
+        append(trace)
+
+    monkeypatch.setattr(trace_writer, "_append", slow_append)
+    with span("job.slow_disk"):
+        pass
+    assert writing.wait(5)
+    # The caller got its trace queued while the disk write is still stuck
+    assert trace_writer.written == written
+    release.set()
+    trace_writer.flush()
+    assert trace_writer.written == written + 1
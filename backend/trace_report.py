@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Summarise the request traces written by the backend (TRACE_FILE).
+
+    python trace_report.py [trace_file] [--name grade] [--slowest 3]
+
+Reads the trace file and its rotated backups, then prints:
+
+- latency percentiles per trace (route) name
+- per span name: count, mean/p95/max and share of the traced time, with
+  Ollama's own prompt-evaluation and generation time split out
+- the slowest traces as indented span trees
+"""
+
+import argparse
+import json
+import os
+import statistics
+from collections import defaultdict
+from typing import Dict, Iterator, List
+
+DEFAULT_TRACE_FILE = os.getenv("TRACE_FILE", os.path.join("traces", "traces.jsonl"))
+# Server-side Ollama timings reported as pseudo-spans beneath ollama.generate
+OLLAMA_PHASES = (("load_ms", "model load"), ("prompt_eval_ms", "prompt eval"), ("eval_ms", "generation"))
+
+
+def trace_files(path: str) -> List[str]:
+    """The trace file and its rotated backups, oldest first."""
+    backups = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        backups.append(f"{path}.{index}")
+        index += 1
+    files = list(reversed(backups))
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def load_traces(path: str) -> Iterator[dict]:
+    for file_path in trace_files(path):
+        with open(file_path, encoding="utf-8") as f:
+            for raw in f:
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by a crash mid-write
+                    continue
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarise(traces: List[dict]) -> Dict[str, dict]:
+    by_trace: Dict[str, List[float]] = defaultdict(list)
+    by_span: Dict[str, List[float]] = defaultdict(list)
+    tokens: Dict[str, List[float]] = defaultdict(list)
+    traced_ms = 0.0
+    for trace in traces:
+        duration = trace.get("duration_ms") or 0
+        by_trace[trace.get("name") or "?"].append(duration)
+        traced_ms += duration
+        for span in trace.get("spans", []):
+            if span.get("parent") is None:
+                continue
+            by_span[span["name"]].append(span.get("duration_ms") or 0)
+            attributes = span.get("attributes") or {}
+            if span["name"] == "ollama.generate":
+                for key, label in OLLAMA_PHASES:
+                    if attributes.get(key) is not None:
+                        by_span[f"ollama.generate ({label})"].append(attributes[key])
+                for key in ("prompt_eval_count", "eval_count"):
+                    if attributes.get(key) is not None:
+                        tokens[key].append(attributes[key])
+                if attributes.get("eval_count") and attributes.get("eval_ms"):
+                    tokens["tokens_per_s"].append(attributes["eval_count"] / attributes["eval_ms"] * 1000)
+
+    def stats(values: List[float]) -> dict:
+        return {
+            "count": len(values),
+            "total_ms": round(sum(values), 3),
+            "mean_ms": round(statistics.fmean(values), 3),
+            "p50_ms": round(_percentile(values, 50), 3),
+            "p95_ms": round(_percentile(values, 95), 3),
+            "max_ms": round(max(values), 3),
+        }
+
+    spans = {}
+    for name, values in by_span.items():
+        spans[name] = stats(values)
+        spans[name]["share"] = round(sum(values) / traced_ms, 4) if traced_ms else 0.0
+    return {
+        "traces": {name: stats(values) for name, values in by_trace.items()},
+        "spans": spans,
+        "ollama": {key: round(statistics.fmean(values), 1) for key, values in tokens.items()},
+    }
+
+
+def format_tree(trace: dict) -> List[str]:
+    spans = trace.get("spans", [])
+    children = defaultdict(list)
+    for span in spans:
+        children[span.get("parent")].append(span)
+    lines = [f"{trace.get('name')}  {trace.get('duration_ms')} ms  (trace {trace.get('trace_id')})"]
+
+    def walk(parent, depth):
+        for span in sorted(children.get(parent, []), key=lambda s: s.get("start_ms", 0)):
+            attributes = {k: v for k, v in (span.get("attributes") or {}).items() if v is not None}
+            detail = " ".join(f"{k}={v}" for k, v in attributes.items())
+            lines.append(
+                f"{'  ' * depth}+{span.get('start_ms')}ms {span['name']}  {span.get('duration_ms')} ms  {detail}".rstrip()
+            )
+            walk(span["id"], depth + 1)
+
+    root = next((s for s in spans if s.get("parent") is None), None)
+    if root is not None:
+        walk(root["id"], 1)
+    return lines
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", nargs="?", default=DEFAULT_TRACE_FILE)
+    parser.add_argument("--name", help="only traces whose name contains this text, e.g. 'grade'")
+    parser.add_argument("--slowest", type=int, default=3, help="span trees to print for the slowest traces")
+    args = parser.parse_args(argv)
+
+    traces = [
+        t for t in load_traces(args.path)
+        if not args.name or args.name.lower() in (t.get("name") or "").lower()
+    ]
+    if not traces:
+        print(f"No traces found in {args.path}")
+        return 1
+    report = summarise(traces)
+
+    print(f"{len(traces)} traces from {args.path}\n")
+    print(f"{'Trace':<60} {'count':>6} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}")
+    for name, s in sorted(report["traces"].items(), key=lambda item: -item[1]["total_ms"]):
+        print(f"{name[:60]:<60} {s['count']:>6} {s['p50_ms']:>10} {s['p95_ms']:>10} {s['max_ms']:>10}")
+
+    print(f"\n{'Span':<45} {'count':>6} {'mean ms':>10} {'p95 ms':>10} {'max ms':>10} {'share':>7}")
+    for name, s in sorted(report["spans"].items(), key=lambda item: -item[1]["total_ms"]):
+        print(
+            f"{name[:45]:<45} {s['count']:>6} {s['mean_ms']:>10} {s['p95_ms']:>10} "
+            f"{s['max_ms']:>10} {s['share']:>7.1%}"
+        )
+
+    if report["ollama"]:
+        print("\nOllama (mean per call): " + ", ".join(f"{k}={v}" for k, v in report["ollama"].items()))
+
+    if args.slowest > 0:
+        print(f"\nSlowest {args.slowest}:")
+        for trace in sorted(traces, key=lambda t: -(t.get("duration_ms") or 0))[: args.slowest]:
+            print()
+            print("\n".join(format_tree(trace)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,25 +3,64 @@ import { studentApi } from '../../services/api';
 import AvatarGrid from './AvatarGrid';
 import LoginForm from './LoginForm';
 
+const PAGE_SIZE = 60;
+
 const LoginPage = ({ onLoginSuccess }) => {
+  const [classGroups, setClassGroups] = useState([]);
+  const [classGroup, setClassGroup] = useState(null);
   const [students, setStudents] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [selectedStudent, setSelectedStudent] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
-    const fetchStudents = async () => {
+    const fetchClassGroups = async () => {
       try {
-        const response = await studentApi.listStudents();
-        setStudents(response.data);
+        const response = await studentApi.getClassGroups();
+        setClassGroups(response.data);
+        // Nothing to choose between with a single class
+        if (response.data.length === 1) {
+          setClassGroup(response.data[0]);
+        }
       } catch (error) {
-        console.error('Error fetching students:', error);
+        console.error('Error fetching class groups:', error);
       } finally {
         setLoading(false);
       }
     };
-    fetchStudents();
+    fetchClassGroups();
   }, []);
 
+  const fetchStudents = async (cursor = null) => {
+    const params = { class_group: classGroup, limit: PAGE_SIZE };
+    if (cursor) params.cursor = cursor;
+    const page = await studentApi.listStudentsPage(params);
+    setStudents((previous) => (cursor ? [...previous, ...page.data] : page.data));
+    setNextCursor(page.nextCursor);
+  };
+
+  useEffect(() => {
+    if (!classGroup) return;
+    setStudents([]);
+    setNextCursor(null);
+    setLoading(true);
+    fetchStudents()
+      .catch((error) => console.error('Error fetching students:', error))
+      .finally(() => setLoading(false));
+  }, [classGroup]);
+
+  const handleShowMore = async () => {
+    setLoadingMore(true);
+    try {
+      await fetchStudents(nextCursor);
+    } catch (error) {
+      console.error('Error fetching students:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleLogin = async (studentId, password) => {
     const response = await studentApi.login(studentId, password);
     localStorage.setItem('student_token', response.data.access_token);
@@ -36,6 +75,46 @@ const LoginPage = ({ onLoginSuccess }) => {
     );
   }
 
+  const renderClassPicker = () => (
+    <div className="grid grid-cols-2 sm:grid-cols-3 md:grid-cols-4 gap-8 p-4 w-full max-w-4xl">
+      {classGroups.map((group) => (
+        <button
+          key={group}
+          onClick={() => setClassGroup(group)}
+          className="card-premium p-8 text-2xl font-display font-bold text-slate-900 hover:text-primary transition-colors"
+        >
+          {group}
+        </button>
+      ))}
+    </div>
+  );
+
+  const renderStudents = () => (
+    <div className="flex flex-col items-center w-full">
+      {classGroups.length > 1 && (
+        <button
+          onClick={() => setClassGroup(null)}
+          className="self-start mb-4 text-sm font-bold text-slate-500 uppercase tracking-wider hover:text-primary"
+        >
+          ← Class {classGroup}
+        </button>
+      )}
+      <AvatarGrid
+        students={students}
+        onSelect={(student) => setSelectedStudent(student)}
+      />
+      {nextCursor && (
+        <button
+          onClick={handleShowMore}
+          disabled={loadingMore}
+          className="mt-8 px-8 py-3 rounded-full bg-primary text-white font-bold disabled:opacity-50"
+        >
+          {loadingMore ? 'Loading...' : 'Show more'}
+        </button>
+      )}
+    </div>
+  );
+
   return (
     <div className="min-h-screen bg-background py-16 px-6 lg:px-12 font-body">
       <div className="max-w-7xl mx-auto">
@@ -44,7 +123,9 @@ const LoginPage = ({ onLoginSuccess }) => {
             Abigail Spelling
           </h1>
           <p className="text-xl text-slate-500 max-w-2xl mx-auto leading-relaxed font-medium">
-            Welcome back! Select your avatar to start your assessment.
+            {classGroup
+              ? 'Welcome back! Select your avatar to start your assessment.'
+              : 'Welcome back! Choose your class to get started.'}
           </p>
         </div>
 
@@ -55,12 +136,7 @@ const LoginPage = ({ onLoginSuccess }) => {
               onLogin={handleLogin}
               onBack={() => setSelectedStudent(null)}
             />
-          ) : (
-            <AvatarGrid
-              students={students}
-              onSelect={(student) => setSelectedStudent(student)}
-            />
-          )}
+          ) : classGroup ? renderStudents() : renderClassPicker()}
         </div>
       </div>
     </div>
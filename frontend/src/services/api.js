@@ -21,8 +21,29 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// Follow X-Next-Cursor headers from keyset-paginated listings and return
+// every page as one axios-style `{ data }` response.
+const getAllPages = async (url, params = {}) => {
+  const data = [];
+  let cursor = null;
+  do {
+    const response = await api.get(url, { params: cursor ? { ...params, cursor } : params });
+    data.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return { data };
+};
+
+// One page at a time, for views that load more as the user asks for it
+const getPage = async (url, params = {}) => {
+  const response = await api.get(url, { params });
+  return { data: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+};
+
 export const studentApi = {
-  listStudents: () => api.get('/student/list'),
+  listStudents: (params) => getAllPages('/student/list', params),
+  listStudentsPage: (params) => getPage('/student/list', params),
+  getClassGroups: () => api.get('/student/class-groups'),
   login: (studentId, password) => api.post('/student/auth/login', { student_id: studentId, password }),
   getMe: () => api.get('/student/me'),
   getProjects: () => api.get('/student/projects'),
@@ -58,7 +79,7 @@ export const rosterApi = {
 };
 
 export const submissionApi = {
-  getAllSubmissions: () => api.get('/submissions'),
+  getAllSubmissions: (params) => getAllPages('/submissions', params),
   getProjectSubmissions: (projectId) => api.get(`/submissions/project/${projectId}`),
   unlockSubmission: (submissionId) => api.post(`/submissions/${submissionId}/unlock`),
   exportSubmissions: (projectId) => api.get(`/submissions/export/${projectId}`, { responseType: 'blob' }),